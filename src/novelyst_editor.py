@@ -18,20 +18,23 @@ GNU General Public License for more details.
 import os
 import sys
 import tkinter as tk
-from tkinter import messagebox
 from pathlib import Path
-import webbrowser
+import weakref
+from nveditorlib.instrumentation import log_phase
+from nveditorlib.instrumentation import start_phase
 from nveditorlib.nv_editor_globals import *
-from nveditorlib.scene_editor import SceneEditor
-from nveditorlib.configuration import Configuration
+from nveditorlib.wordcount_index import WordCountIndex
+from nveditorlib.scene_cache import SceneCache
+# The editor windows, the configuration, and the tools are imported when needed,
+# so loading the plugin does not delay the start of novelyst.
 
 SETTINGS = dict(
         window_geometry='600x800',
         color_mode=0,
-        color_fg_bright='white',
-        color_bg_bright='black',
-        color_fg_light='antique white',
-        color_bg_light='black',
+        color_fg_bright='black',
+        color_bg_bright='white',
+        color_fg_light='black',
+        color_bg_light='antique white',
         color_fg_dark='light grey',
         color_bg_dark='gray20',
         font_family='Courier',
@@ -40,9 +43,18 @@ SETTINGS = dict(
         paragraph_spacing=18,
         margin_x=40,
         margin_y=20,
+        live_wordcount_delay=300,
+        live_wordcount_max_delay=1000,
+        journal_interval=2000,
+        editor_pool_size=2,
+        statistics_processes=0,
+        undo_budget=1000000,
+        undo_grouping='word',
+        settings_version=0,
         )
 OPTIONS = dict(
         live_wordcount=False,
+        instrumentation=False,
         )
 
 
@@ -50,9 +62,16 @@ class Plugin:
     """novelyst multi-scene "plain text" editor plugin class.
     
     Public methods:
+        apply_changes() -- Apply the changes of all open scene and chapter editors at once. Ask first.
+        export_statistics() -- Write the manuscript statistics to a CSV file.
+        get_chapter_editor(scId) -- Return the open chapter editor showing a scene, or None.
+        normalize_markup() -- Collapse redundant markup in all scenes, and balance the tags. Ask first.
         on_close() -- Actions to be performed when a project is closed.       
         on_quit() -- Actions to be performed when novelyst is closed.
+        open_chapter() -- Create a chapter editor window showing all scenes of the selected chapter.
         open_node() -- Create a scene editor window with a menu bar, a text box, and a status bar.     
+        open_scene(scId) -- Bring up an editor window showing a scene.
+        open_search() -- Bring up the project-wide find and replace window.
     """
     VERSION = '@release'
     NOVELYST_API = '4.34'
@@ -65,83 +84,333 @@ class Plugin:
         
         Positional arguments:
             ui -- reference to the NovelystTk instance of the application.
+            
+        Reading the configuration, building the search index, and loading the window icon 
+        are deferred until the first editor window is opened.
         """
+        start_phase()
         self._ui = ui
-
-        #--- Load configuration.
-        try:
-            homeDir = str(Path.home()).replace('\\', '/')
-            configDir = f'{homeDir}/.pywriter/novelyst/config'
-        except:
-            configDir = '.'
-        self.iniFile = f'{configDir}/editor.ini'
-        self.configuration = Configuration(SETTINGS, OPTIONS)
-        self.configuration.read(self.iniFile)
-        self.kwargs = {}
-        self.kwargs.update(self.configuration.settings)
-        self.kwargs.update(self.configuration.options)
+        self.kwargs = None
+        # Configuration; None until loaded.
+        self.style = None
+        # Font and colors shared by the editor boxes; None until loaded.
+        self._icon = None
+        self._profiler = None
 
         # Add the "Edit" command to novelyst's "Scene" menu.
         self._ui.sceneMenu.add_separator()
         self._ui.sceneMenu.add_command(label=_('Edit'), underline=0, command=self.open_node)
 
+        # Add the "Edit" command to novelyst's "Chapter" menu.
+        self._ui.chapterMenu.add_separator()
+        self._ui.chapterMenu.add_command(label=_('Edit'), underline=0, command=self.open_chapter)
+
+        # Add the "Manuscript statistics" and "Normalize markup" commands to novelyst's "Tools" menu.
+        self._ui.toolsMenu.add_command(label=_('Manuscript statistics'), command=self.export_statistics)
+        self._ui.toolsMenu.add_command(label=_('Normalize markup'), command=self.normalize_markup)
+
         # Add an entry to the Help menu.
-        self._ui.helpMenu.add_command(label=_('Editor plugin Online help'), command=lambda: webbrowser.open(self._HELP_URL))
+        self._ui.helpMenu.add_command(label=_('Editor plugin Online help'), command=self._open_help)
 
-        # Set window icon.
-        self.sceneEditors = {}
+        self.sceneEditors = weakref.WeakSet()
+        # Registry of the scene editors; hidden and destroyed windows are filtered out by their isOpen flag.
+        self.editorPool = []
+        # Closed scene editor windows kept for reuse.
+        self.chapterEditors = weakref.WeakSet()
+        # Registry of the chapter editors.
+        self.wordCountIndex = WordCountIndex(self._ui)
+        self.sceneCache = SceneCache(self._ui)
+        self.searchIndex = None
+        # Project-wide search index; None until the configuration is loaded.
+        self._searchDialog = None
+        log_phase('install')
+
+    def apply_changes(self):
+        """Apply the changes of all open scene and chapter editors at once. Ask first.
+        
+        One confirmation lists all changed scenes, 
+        and the user interface is refreshed only once.
+        """
+        changes = []
+        scIds = []
+        for editor in self.sceneEditors:
+            if editor.isOpen:
+                sceneText = editor.get_changed_text()
+                if sceneText is not None:
+                    changes.append((editor, sceneText))
+                    scIds.append(editor.scId)
+        chapterChanges = []
+        for editor in self.chapterEditors:
+            if editor.isOpen:
+                sceneTexts = editor.get_changes()
+                if sceneTexts:
+                    chapterChanges.append((editor, sceneTexts))
+                    scIds.extend(scId for scId, __ in sceneTexts)
+        if not scIds:
+            return
+
+        from tkinter import messagebox
+        sceneTitles = '\n'.join(f'- {self._ui.novel.scenes[scId].title}' for scId in scIds)
+        if not messagebox.askyesno(APPLICATION, f'{_("Apply scene changes?")}\n\n{sceneTitles}'):
+            return
+
+        if self._ui.isLocked:
+            if not messagebox.askyesno(APPLICATION, _('Cannot apply scene changes, because the project is locked.\nUnlock and apply changes?')):
+                return
+
+            self._ui.unlock()
+        for editor, sceneText in changes:
+            editor.commit(sceneText)
+        for editor, sceneTexts in chapterChanges:
+            editor.commit(sceneTexts)
+        self._ui.show_status()
+
+    def export_statistics(self, event=None):
+        """Write the manuscript statistics to a CSV file.
+        
+        Only "normal" scenes of "normal" chapters are counted, as with the project word count.
+        The statistics setting "statistics_processes" limits the number of worker processes;
+        0 means one process per CPU.
+        """
+        from tkinter import filedialog
+        from tkinter import messagebox
+        from nveditorlib.manuscript_statistics import get_statistics
+        from nveditorlib.manuscript_statistics import get_totals
+        from nveditorlib.manuscript_statistics import write_csv
+        self.apply_changes()
+        self._load_resources()
+        novel = self._ui.novel
+        titles = []
+        texts = []
+        for chId in novel.srtChapters:
+            chapter = novel.chapters[chId]
+            if chapter.chType != 0:
+                continue
+
+            for scId in chapter.srtScenes:
+                scene = novel.scenes[scId]
+                if scene.scType == 0:
+                    titles.append((chapter.title, scene.title))
+                    texts.append(scene.sceneContent or '')
+        if not texts:
+            return
+
+        filePath = filedialog.asksaveasfilename(defaultextension='.csv',
+                                                filetypes=[('CSV', '.csv')],
+                                                initialfile=f'{Path(self._ui.prjFile.filePath).stem}_statistics.csv',
+                                                )
+        if not filePath:
+            return
+
+        processes = self.kwargs['statistics_processes'] or os.cpu_count() or 1
+        statistics = get_statistics(texts, processes)
         try:
-            path = os.path.dirname(sys.argv[0])
-            if not path:
-                path = '.'
-            self._icon = tk.PhotoImage(file=f'{path}/icons/{ICON}.png')
-        except:
-            self._icon = None
+            write_csv(filePath, titles, statistics)
+        except OSError as ex:
+            messagebox.showerror(APPLICATION, f'{_("Cannot write file")}: "{os.path.normpath(filePath)}"\n{ex}')
+            return
 
-        # Configure the editor box.
-        SceneEditor.colorMode = int(self.kwargs['color_mode'])
-        SceneEditor.liveWordCount = self.kwargs['live_wordcount']
+        words, characters, sentences, paragraphs, __ = get_totals(statistics)
+        messagebox.showinfo(APPLICATION,
+                            f'{_("Scenes")}: {len(statistics)}\n{_("Words")}: {words}\n{_("Characters")}: {characters}\n'
+                            f'{_("Sentences")}: {sentences}\n{_("Paragraphs")}: {paragraphs}\n\n'
+                            f'{_("Statistics written to")} "{os.path.normpath(filePath)}".')
 
-    def open_node(self, event=None):
-        """Create a scene editor window with a menu bar, a text box, and a status bar."""
+    def get_chapter_editor(self, scId):
+        """Return the open chapter editor showing a scene, or None.
+        
+        Positional arguments:
+            scId -- str: scene ID.
+        """
+        for editor in self.chapterEditors:
+            if editor.isOpen and scId in editor.scIds:
+                return editor
+
+        return None
+
+    def normalize_markup(self, event=None):
+        """Collapse redundant markup in all scenes, and balance the tags. Ask first.
+        
+        Scenes with unapplied changes in an editor window are skipped, as are the scenes of open chapter editors.
+        All changes are applied at once, and the user interface is refreshed only once.
+        Large projects are processed by up to "statistics_processes" worker processes.
+        """
+        from tkinter import messagebox
+        from nveditorlib.scene_batch import SceneBatch
+        self.apply_changes()
+        self._load_resources()
+        blocked = set()
+        for editor in self.sceneEditors:
+            if editor.isOpen and editor.get_changed_text() is not None:
+                blocked.add(editor.scId)
+        for editor in self.chapterEditors:
+            if editor.isOpen:
+                blocked.update(self._ui.novel.chapters[editor.chId].srtScenes)
+        batch = SceneBatch(self._ui, self.searchIndex)
+        processes = self.kwargs['statistics_processes'] or os.cpu_count() or 1
+        batch.normalize_markup([scId for scId in self._ui.novel.scenes if scId not in blocked], processes)
+        message = ''
+        if blocked:
+            message = f'\n\n{_("Scenes with unapplied changes are skipped")}'
+        if not batch.changes:
+            messagebox.showinfo(APPLICATION, f'{_("The markup is already normalized.")}{message}')
+            return
+
+        if not messagebox.askyesno(APPLICATION, f'{_("Normalize markup?")} ({len(batch.changes)} {_("Scenes")}){message}'):
+            return
+
+        if self._ui.isLocked:
+            if not messagebox.askyesno(APPLICATION, _('Cannot apply scene changes, because the project is locked.\nUnlock and apply changes?')):
+                return
+
+            self._ui.unlock()
+        changed = set(batch.commit())
+        for editor in self.sceneEditors:
+            if editor.isOpen and editor.scId in changed:
+                editor.reload()
+        self._ui.show_status()
+
+    def open_chapter(self, event=None):
+        """Create a chapter editor window showing all scenes of the selected chapter."""
         try:
             nodeId = self._ui.tv.tree.selection()[0]
-            if nodeId.startswith(self._ui.tv.SCENE_PREFIX):
-                # A scene is selected
+            if nodeId.startswith(self._ui.tv.CHAPTER_PREFIX):
+                # A chapter is selected
                 if self._ui.isLocked:
+                    from tkinter import messagebox
                     messagebox.showinfo(APPLICATION, _('Cannot edit scenes, because the project is locked.'))
                     return
 
-                scId = nodeId[2:]
-                if self._ui.novel.scenes[scId].doNotExport:
+                chId = nodeId[2:]
+                for scId in self._ui.novel.chapters[chId].srtScenes:
+                    if not self._ui.novel.scenes[scId].doNotExport:
+                        break
+                else:
+                    # There is no scene to edit.
                     return
 
-                if scId in self.sceneEditors and self.sceneEditors[scId].isOpen:
-                    self.sceneEditors[scId].lift()
+                for editor in self.chapterEditors:
+                    if editor.isOpen and editor.chId == chId:
+                        editor.lift()
+                        return
+
+                # A scene must not be edited in two windows at once.
+                for editor in self.sceneEditors:
+                    if editor.isOpen and editor.scId in self._ui.novel.chapters[chId].srtScenes:
+                        from tkinter import messagebox
+                        messagebox.showinfo(APPLICATION, _('Cannot edit the chapter, because one of its scenes is open in an editor window.'))
+                        editor.lift()
+                        return
+
+                self._load_resources()
+                from nveditorlib.chapter_editor import ChapterEditor
+                editor = ChapterEditor(self, self._ui, chId, self.kwargs['window_geometry'], icon=self._icon)
+                self.chapterEditors.add(editor)
+
+        except IndexError:
+            # Nothing selected
+            pass
+
+    def open_node(self, event=None):
+        """Create a scene editor window with a menu bar, a text box, and a status bar."""
+        try:
+            nodeId = self._ui.tv.tree.selection()[0]
+            if nodeId.startswith(self._ui.tv.SCENE_PREFIX):
+                # A scene is selected
+                if self._ui.isLocked:
+                    from tkinter import messagebox
+                    messagebox.showinfo(APPLICATION, _('Cannot edit scenes, because the project is locked.'))
                     return
 
-                self.sceneEditors[scId] = SceneEditor(self, self._ui, scId, self.kwargs['window_geometry'], icon=self._icon)
+                self.open_scene(nodeId[2:])
 
         except IndexError:
             # Nothing selected
             pass
 
+    def open_scene(self, scId):
+        """Bring up an editor window showing a scene.
+        
+        Positional arguments:
+            scId -- str: scene ID.
+            
+        Return the editor window, or None if the scene is not editable.
+        If the scene is open in a chapter editor, bring up the chapter editor, and return None.
+        """
+        if self._ui.novel.scenes[scId].doNotExport:
+            return None
+
+        for editor in self.sceneEditors:
+            if editor.isOpen and editor.scId == scId:
+                editor.lift()
+                return editor
+
+        chapterEditor = self.get_chapter_editor(scId)
+        if chapterEditor is not None:
+            chapterEditor.lift()
+            return None
+
+        self._load_resources()
+        start_phase()
+        if self.editorPool:
+            editor = self.editorPool.pop()
+            editor.reopen(scId, self.kwargs['window_geometry'])
+        else:
+            from nveditorlib.scene_editor import SceneEditor
+            editor = SceneEditor(self, self._ui, scId, self.kwargs['window_geometry'], icon=self._icon)
+        self.sceneEditors.add(editor)
+        log_phase('editor window')
+        return editor
+
+    def open_search(self, event=None):
+        """Bring up the project-wide find and replace window."""
+        if self._searchDialog is not None and self._searchDialog.isOpen:
+            self._searchDialog.lift()
+            return
+
+        self._load_resources()
+        from nveditorlib.search_dialog import SearchDialog
+        self._searchDialog = SearchDialog(self, self._ui, icon=self._icon)
+
     def on_close(self, event=None):
         """Actions to be performed when a project is closed.
         
-        Close all open scene editor windows. 
+        Apply the changes of all open scene and chapter editors after asking, and close the windows. 
+        Delete the journal files of scenes that no longer exist.
         """
-        for scId in self.sceneEditors:
-            if self.sceneEditors[scId].isOpen:
-                self.sceneEditors[scId].on_quit()
+        self.apply_changes()
+        for editor in list(self.sceneEditors):
+            if editor.isOpen:
+                editor.close()
+        for editor in list(self.chapterEditors):
+            if editor.isOpen:
+                editor.close()
+        if self._searchDialog is not None and self._searchDialog.isOpen:
+            self._searchDialog.close()
+        self._searchDialog = None
+        if self.kwargs is not None and self._ui.novel is not None:
+            from nveditorlib.scene_journal import discard_orphaned
+            discard_orphaned(self.journalDir, self._ui.prjFile.filePath, self._ui.novel.scenes)
+        self.wordCountIndex.reset()
+        self.sceneCache.clear()
+        if self.searchIndex is not None:
+            self.searchIndex.reset()
 
     def on_quit(self, event=None):
         """Actions to be performed when novelyst is closed."""
         self.on_close()
+        for editor in self.editorPool:
+            editor.destroy()
+        self.editorPool.clear()
+        if self.kwargs is None:
+            # The configuration has not been loaded, so it is unchanged.
+            return
+
+        if self._profiler is not None:
+            self._profiler.dump(self._profilerFile)
 
         #--- Save project specific configuration
-        self.kwargs['color_mode'] = SceneEditor.colorMode
-        self.kwargs['live_wordcount'] = SceneEditor.liveWordCount
+        self.kwargs['color_mode'] = self.style.colorMode
         for keyword in self.kwargs:
             if keyword in self.configuration.options:
                 self.configuration.options[keyword] = self.kwargs[keyword]
@@ -149,3 +418,71 @@ class Plugin:
                 self.configuration.settings[keyword] = self.kwargs[keyword]
         self.configuration.write(self.iniFile)
 
+    def _load_resources(self):
+        """Read the configuration and load the window icon, if not done yet."""
+        if self.kwargs is not None:
+            return
+
+        #--- Load configuration.
+        start_phase()
+        from nveditorlib.configuration import Configuration
+        from nveditorlib.settings_schema import migrate_settings
+        from nveditorlib.settings_schema import validate_settings
+        from nveditorlib.editor_style import EditorStyle
+        from nveditorlib.search_index import SearchIndex
+        try:
+            homeDir = str(Path.home()).replace('\\', '/')
+            configDir = f'{homeDir}/.pywriter/novelyst/config'
+            self.journalDir = f'{homeDir}/.pywriter/novelyst/journal'
+            self._profilerFile = f'{homeDir}/.pywriter/novelyst/editor_instrumentation.json'
+        except:
+            configDir = '.'
+            self.journalDir = '.'
+            self._profilerFile = './editor_instrumentation.json'
+        self.iniFile = f'{configDir}/editor.ini'
+        self.configuration = Configuration(SETTINGS, OPTIONS)
+        self.configuration.read(self.iniFile)
+        self.kwargs = {}
+        self.kwargs.update(self.configuration.settings)
+        self.kwargs.update(self.configuration.options)
+        defaults = dict(SETTINGS, **OPTIONS)
+        self.kwargs = validate_settings(migrate_settings(self.kwargs), defaults)
+
+        # Configure the editor boxes.
+        self.style = EditorStyle(self.kwargs, defaults)
+        self.searchIndex = SearchIndex(self._ui)
+        log_phase('configuration')
+
+        if self.kwargs['instrumentation']:
+            self._instrument()
+
+        # Set window icon.
+        try:
+            path = os.path.dirname(sys.argv[0])
+            if not path:
+                path = '.'
+            self._icon = tk.PhotoImage(file=f'{path}/icons/{ICON}.png')
+        except:
+            self._icon = None
+        log_phase('icon')
+
+    def _instrument(self):
+        """Record the latencies of the editor's hot paths."""
+        from nveditorlib.instrumentation import Profiler
+        from nveditorlib.text_box import TextBox
+        from nveditorlib.scene_editor import SceneEditor
+        self._profiler = Profiler()
+        self._profiler.wrap(TextBox, 'count_words')
+        self._profiler.wrap(TextBox, 'set_text', lambda args, result: len(args[1]))
+        self._profiler.wrap(TextBox, 'get_text', lambda args, result: len(result))
+        self._profiler.wrap(SceneEditor, '_load_scene', lambda args, result: len(args[0]._scene.sceneContent or ''))
+        self._profiler.wrap(SceneEditor, '_apply_changes')
+        self._profiler.wrap(SceneEditor, '_transfer_text', lambda args, result: len(args[1]))
+        self._profiler.wrap(SceneEditor, '_split_scene')
+
+    def _open_help(self):
+        import webbrowser
+        webbrowser.open(self._HELP_URL)
+
+
+log_phase('import')
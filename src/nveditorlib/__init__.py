@@ -1,9 +1,28 @@
 """Package for the novelyst editor plugin.
 
 Modules:
+chapter_box -- Provide a text editor widget showing several scenes for the novelyst editor plugin.
+chapter_document -- Provide a line map of a chapter shown in a single editor box.
+chapter_editor -- Provide a chapter editor class for the novelyst plugin.
+editor_style -- Provide a class for the font and colors shared by the novelyst editor windows.
+instrumentation -- Provide optional instrumentation for the novelyst editor plugin.
+manuscript_statistics -- Provide manuscript statistics for the novelyst editor plugin.
+markup_highlighter -- Provide a syntax highlighter for yWriter markup in the novelyst editor plugin.
 nv_editor_globals -- Provide global variables and functions.
+process_pool -- Provide parallel processing of scene texts for the novelyst editor plugin.
+scene_batch -- Provide a class for editing scenes without editor windows.
+scene_cache -- Provide a cache of scenes prepared for loading into the editor.
 scene_editor -- Provide a scene editor class for the novelyst plugin.
+scene_journal -- Provide a crash recovery journal for the novelyst editor plugin.
+search_dialog -- Provide a project-wide find and replace dialog for the novelyst editor plugin.
+search_index -- Provide a project-wide search index for the novelyst editor plugin.
+settings_schema -- Provide a function for validating the novelyst editor plugin settings.
 text_box -- Provide a text editor widget for the novelyst editor plugin.
+text_editing -- Provide editing operations on yWriter raw markup, independent of Tk.
+undo_history -- Provide an undo history for the novelyst editor plugin.
+update_scheduler -- Provide a class for coalescing updates on the tkinter main loop.
+word_counter -- Provide a word counter for the novelyst editor plugin.
+wordcount_index -- Provide a project-wide word count index for the novelyst editor plugin.
 
 Copyright (c) 2023 Peter Triesberger
 For further information see https://github.com/peter88213/novelyst_editor
@@ -0,0 +1,85 @@
+"""Provide a text editor widget showing several scenes for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import tkinter as tk
+from nveditorlib.text_box import TextBox
+
+
+class ChapterBox(TextBox):
+    """A text editor widget showing consecutive scenes, separated by boundary lines.
+
+    Public methods:
+    set_document(document) -- Load a chapter document into the editor box.
+    get_scene_text(i) -- Return the content of the scene at position i.
+    set_markup_colors(markupColor, commentColor) -- Set the colors of highlighted markup, comments, and boundary lines.
+
+    Public instance variables:
+    document -- ChapterDocument instance mapping the lines to the scenes, or None.
+
+    Public class constants:
+    BOUNDARY_TAG -- str: name of the text tag for boundary lines.
+
+    Modifications including a boundary line are refused.
+    """
+    BOUNDARY_TAG = 'boundary'
+
+    def __init__(self, master=None, **kw):
+        """Extends the superclass constructor."""
+        self.document = None
+        super().__init__(master, **kw)
+        self.tag_configure(self.BOUNDARY_TAG, justify='center')
+
+    def set_document(self, document):
+        """Load a chapter document into the editor box.
+
+        Positional arguments:
+            document -- ChapterDocument instance.
+        """
+        self.document = None
+        self.set_text(document.get_text())
+        self._load_rest()
+        for i in range(len(document.scIds)):
+            boundary = document.get_lines(i)[0] - 1
+            self.tag_add(self.BOUNDARY_TAG, f'{boundary}.0', f'{boundary}.end')
+        self.document = document
+
+    def get_scene_text(self, i):
+        """Return the content of the scene at position i."""
+        first, last = self.document.get_lines(i)
+        return self.get(f'{first}.0', f'{last}.end').strip(' \n')
+
+    def set_markup_colors(self, markupColor, commentColor):
+        """Set the colors of highlighted markup, comments, and boundary lines.
+
+        Extends the superclass method.
+        """
+        super().set_markup_colors(markupColor, commentColor)
+        self.tag_configure(self.BOUNDARY_TAG, foreground=markupColor)
+
+    def _dispatch(self, operation, *args):
+        """Execute a widget command; keep the line map up to date, if the text is modified.
+
+        Extends the superclass method.
+        """
+        if self.document is None or self._loading or operation not in ('insert', 'delete', 'replace'):
+            return super()._dispatch(operation, *args)
+
+        if operation == 'delete' and len(args) > 2:
+            # Multiple ranges are not supported.
+            return ''
+
+        try:
+            lineCount = self._get_line_number('end-1c')
+            first, last = self._get_line_range(operation, args, lineCount)
+        except tk.TclError:
+            return ''
+
+        if self.document.includes_boundary(first, last):
+            return ''
+
+        result = super()._dispatch(operation, *args)
+        self.document.update(first, self._get_line_number('end-1c') - lineCount)
+        return result
@@ -0,0 +1,116 @@
+"""Provide a line map of a chapter shown in a single editor box.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+
+
+class ChapterDocument:
+    """Line map of consecutive scenes in a single text buffer.
+
+    Each scene occupies a boundary line with its title, followed by its content lines.
+    The scenes' line counts are kept in a Fenwick tree (binary indexed tree),
+    so mapping a buffer line to its scene, mapping a scene to its lines,
+    and updating the map after a modification take O(log n) time,
+    without rescanning the buffer.
+
+    Public methods:
+        get_text() -- Return the buffer text.
+        get_lines(i) -- Return the first and the last content line of the scene at position i.
+        locate(line) -- Return the position of the scene containing a buffer line.
+        includes_boundary(first, last) -- Return True if a line range includes a boundary line.
+        update(line, delta) -- Register a modification.
+
+    Public instance variables:
+        scIds -- list of the scene IDs in buffer order.
+        touched -- set of the positions of modified scenes.
+
+    Line numbers are counted from 1, as with the tkinter Text widget.
+    """
+
+    def __init__(self, scIds, titles, texts):
+        """Set up the line map.
+
+        Positional arguments:
+            scIds -- list of scene IDs.
+            titles -- list of the boundary line texts.
+            texts -- list of the scene contents.
+        """
+        self.scIds = list(scIds)
+        self.touched = set()
+        self._pieces = []
+        self._tree = [0] * (len(self.scIds) + 1)
+        for i, (title, text) in enumerate(zip(titles, texts)):
+            self._pieces.append(f'{title}\n{text}')
+            self._add(i, text.count('\n') + 2)
+
+    def get_text(self):
+        """Return the buffer text."""
+        return '\n'.join(self._pieces)
+
+    def get_lines(self, i):
+        """Return the first and the last content line of the scene at position i."""
+        boundary = self._prefix_sum(i) + 1
+        return boundary + 1, self._prefix_sum(i + 1)
+
+    def locate(self, line):
+        """Return the position of the scene containing a buffer line.
+
+        Positional arguments:
+            line -- int: buffer line number.
+
+        This is a binary search on the Fenwick tree.
+        Lines behind the last scene belong to the last scene.
+        """
+        i = 0
+        remaining = line - 1
+        step = 1 << len(self._tree).bit_length()
+        while step:
+            if i + step < len(self._tree) and self._tree[i + step] <= remaining:
+                i += step
+                remaining -= self._tree[i]
+            step >>= 1
+        return min(i, len(self.scIds) - 1)
+
+    def includes_boundary(self, first, last):
+        """Return True if a line range includes a boundary line.
+
+        Positional arguments:
+            first -- int: number of the first line.
+            last -- int: number of the last line.
+        """
+        i = self.locate(first)
+        firstLine, lastLine = self.get_lines(i)
+        if first < firstLine:
+            return True
+
+        return last > lastLine and i + 1 < len(self.scIds)
+
+    def update(self, line, delta):
+        """Register a modification.
+
+        Positional arguments:
+            line -- int: number of the first modified line.
+            delta -- int: change of the number of lines.
+
+        The modification must not include a boundary line.
+        """
+        i = self.locate(line)
+        if delta:
+            self._add(i, delta)
+        self.touched.add(i)
+
+    def _add(self, i, delta):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix_sum(self, i):
+        """Return the number of lines of the first i scenes."""
+        total = 0
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
@@ -0,0 +1,211 @@
+"""Provide a chapter editor class for the novelyst plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import tkinter as tk
+from tkinter import ttk
+from nveditorlib.nv_editor_globals import *
+from nveditorlib.chapter_box import ChapterBox
+from nveditorlib.chapter_document import ChapterDocument
+from nveditorlib.scene_batch import SceneBatch
+from nveditorlib.scene_editor import KEY_APPLY_CHANGES
+from nveditorlib.scene_editor import KEY_QUIT_PROGRAM
+from nveditorlib.scene_editor import KEY_UPDATE_WORDCOUNT
+from nveditorlib.scene_editor import KEY_ITALIC
+from nveditorlib.scene_editor import KEY_BOLD
+from nveditorlib.scene_editor import KEY_PLAIN
+from nveditorlib.word_counter import count_words
+
+
+class ChapterEditor(tk.Toplevel):
+    """A separate editor window showing the scenes of a chapter in a single text box.
+
+    Public instance methods:
+        close() -- Close the editor window without applying changes.
+        commit(changes) -- Put the changed texts into the scenes; do not refresh the user interface.
+        get_changes() -- Return a list of (scene ID, text) tuples for the scenes that differ from the editor content.
+        lift() -- Bring window to the foreground and set the focus to the editor box.
+        on_quit() -- Exit the editor. Apply changes, if possible.
+        show_status(event=None) -- Display the current scene and the word count on the status bar.
+
+    Public instance variables:
+        chId -- str: ID of the chapter being edited.
+        isOpen -- bool: True, if the editor window is open.
+        scIds -- list of the IDs of the scenes being edited.
+
+    Only the scenes modified in the editor box are written back.
+    """
+
+    def __init__(self, plugin, ui, chId, size, icon=None):
+        self._ui = ui
+        self._plugin = plugin
+        self.chId = chId
+
+        # Create an independent editor window.
+        super().__init__()
+        self.geometry(size)
+        if icon:
+            self.iconphoto(False, icon)
+        chapter = self._ui.novel.chapters[chId]
+        self.title(f'{chapter.title} - {self._ui.novel.title}, {_("Chapter")} ID {chId}')
+
+        # Add a main menu bar to the editor window.
+        self._mainMenu = tk.Menu(self)
+        self.config(menu=self._mainMenu)
+
+        # Add a text editor with scrollbar to the editor window.
+        self._chapterEditor = ChapterBox(self,
+                                         wrap='word',
+                                         undo=True,
+                                         undoBudget=self._plugin.kwargs['undo_budget'],
+                                         undoGrouping=self._plugin.kwargs['undo_grouping'],
+                                         )
+        self._plugin.style.add(self._chapterEditor)
+        self._chapterEditor.pack(expand=True, fill='both')
+        self._chapterEditor.pack_propagate(0)
+
+        # Load the scene contents into the text editor.
+        scIds = []
+        titles = []
+        texts = []
+        for scId in chapter.srtScenes:
+            scene = self._ui.novel.scenes[scId]
+            if not scene.doNotExport:
+                scIds.append(scId)
+                titles.append(f'--- {scene.title} ---')
+                texts.append(scene.sceneContent or '')
+        self.scIds = scIds
+        self._boundaryWords = count_words('\n'.join(titles))
+        self._chapterEditor.set_document(ChapterDocument(scIds, titles, texts))
+        self._chapterEditor.mark_set('insert', '2.0')
+
+        # Add a status bar to the editor window.
+        self._statusBar = tk.Label(self, text='', anchor='w', padx=5, pady=2)
+        self._statusBar.pack(expand=False, side='left')
+
+        # Add buttons to the bottom line.
+        ttk.Button(self, text=_('Exit'), command=self.on_quit).pack(side='right')
+        ttk.Button(self, text=_('Apply changes'), command=self._apply_changes).pack(side='right')
+
+        # Add a "Chapter" Submenu to the editor window.
+        self._fileMenu = tk.Menu(self._mainMenu, tearoff=0)
+        self._mainMenu.add_cascade(label=_('Chapter'), menu=self._fileMenu)
+        self._fileMenu.add_command(label=_('Apply changes'), accelerator=KEY_APPLY_CHANGES[1], command=self._apply_changes)
+        self._fileMenu.add_command(label=_('Exit'), accelerator=KEY_QUIT_PROGRAM[1], command=self.on_quit)
+
+        # Add a "Format" Submenu to the editor window.
+        self._formatMenu = tk.Menu(self._mainMenu, tearoff=0)
+        self._mainMenu.add_cascade(label=_('Format'), menu=self._formatMenu)
+        self._formatMenu.add_command(label=_('Italic'), accelerator=KEY_ITALIC[1], command=self._chapterEditor.italic)
+        self._formatMenu.add_command(label=_('Bold'), accelerator=KEY_BOLD[1], command=self._chapterEditor.bold)
+        self._formatMenu.add_command(label=_('Plain'), accelerator=KEY_PLAIN[1], command=self._chapterEditor.plain)
+
+        # Event bindings.
+        # The Text class bindings are routed to scene editors only, so the keys are bound to the editor box.
+        # Returning "break" prevents the Text class bindings from being executed.
+        keyHandlers = [
+            (KEY_APPLY_CHANGES[0], self._apply_changes),
+            (KEY_QUIT_PROGRAM[0], self.on_quit),
+            (KEY_UPDATE_WORDCOUNT[0], self.show_status),
+            (KEY_ITALIC[0], self._chapterEditor.italic),
+            (KEY_BOLD[0], self._chapterEditor.bold),
+            (KEY_PLAIN[0], self._chapterEditor.plain),
+            ]
+        for key, handler in keyHandlers:
+            self._chapterEditor.bind(key, lambda event, handler=handler: handler() or 'break')
+        self._chapterEditor.bind('<KeyRelease>', self.show_status)
+        self._chapterEditor.bind('<ButtonRelease-1>', self.show_status)
+        self._chapterEditor.bind('<<WordCountReady>>', self.show_status)
+        self.protocol("WM_DELETE_WINDOW", self.on_quit)
+
+        self.show_status()
+        self.lift()
+        self.isOpen = True
+
+    def close(self):
+        """Close the editor window without applying changes."""
+        self._plugin.kwargs['window_geometry'] = self.winfo_geometry()
+        self.destroy()
+        self.isOpen = False
+
+    def commit(self, changes):
+        """Put the changed texts into the scenes; do not refresh the user interface.
+
+        Positional arguments:
+            changes -- list of (scene ID, text) tuples, as returned by get_changes().
+
+        Set the project's change flag.
+        """
+        batch = SceneBatch(self._ui, self._plugin.searchIndex)
+        for scId, sceneText in changes:
+            batch.set_text(scId, sceneText)
+        batch.commit()
+        self._chapterEditor.document.touched.clear()
+
+    def get_changes(self):
+        """Return a list of (scene ID, text) tuples for the scenes that differ from the editor content.
+
+        Only the scenes modified in the editor box are read.
+        """
+        document = self._chapterEditor.document
+        changes = []
+        for i in sorted(document.touched):
+            scId = document.scIds[i]
+            scene = self._ui.novel.scenes[scId]
+            sceneText = self._chapterEditor.get_scene_text(i)
+            if sceneText or scene.sceneContent:
+                if scene.sceneContent != sceneText:
+                    changes.append((scId, sceneText))
+        return changes
+
+    def lift(self):
+        """Bring window to the foreground and set the focus to the editor box.
+
+        Extends the superclass method.
+        """
+        super().lift()
+        self._chapterEditor.focus()
+
+    def on_quit(self, event=None):
+        """Exit the editor. Apply changes, if possible."""
+        changes = self.get_changes()
+        if changes:
+            from tkinter import messagebox
+            if messagebox.askyesno(APPLICATION, _('Apply scene changes?'), parent=self):
+                self._transfer_texts(changes)
+        self.close()
+
+    def show_status(self, event=None):
+        """Display the current scene and the word count on the status bar."""
+        document = self._chapterEditor.document
+        line = int(self._chapterEditor.index('insert').split('.')[0])
+        sceneTitle = self._ui.novel.scenes[document.scIds[document.locate(line)]].title
+        wc = self._chapterEditor.count_words()
+        if wc is None:
+            self._statusBar.config(text=f'{sceneTitle} | {_("Counting words ...")}')
+        else:
+            self._statusBar.config(text=f'{sceneTitle} | {_("Chapter")}: {wc - self._boundaryWords} {_("words")}')
+
+    def _apply_changes(self, event=None):
+        """Transfer the modified scenes to the project."""
+        changes = self.get_changes()
+        if changes:
+            self._transfer_texts(changes)
+
+    def _transfer_texts(self, changes):
+        """Transfer the changed scene contents to the project, if possible.
+
+        On success, set the user interface's change flag, and refresh the user interface once.
+        """
+        if self._ui.isLocked:
+            from tkinter import messagebox
+            if not messagebox.askyesno(APPLICATION, _('Cannot apply scene changes, because the project is locked.\nUnlock and apply changes?'), parent=self):
+                self.lift()
+                return
+
+            self._ui.unlock()
+            self.lift()
+        self.commit(changes)
+        self._ui.show_status()
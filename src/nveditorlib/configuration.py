@@ -4,6 +4,7 @@ Copyright (c) 2023 Peter Triesberger
 For further information see https://github.com/peter88213/PyWriter
 Published under the MIT License (https://opensource.org/licenses/mit-license.php)
 """
+import os
 from configparser import ConfigParser
 
 
@@ -17,12 +18,17 @@ class Configuration:
     Public methods:
         set(settings={}, options={}) -- set the entire configuration without writing the INI file.
         read(iniFile) -- read a configuration file.
-        write(iniFile) -- save the configuration to iniFile.
+        write(iniFile) -- save the configuration to iniFile, if changed.
 
-    Public instance variables:    
+    Public instance variables:
         settings - dictionary of strings
         options - dictionary of boolean values
+
+    The parsed INI files are cached by path, modification time, and size,
+    so reading an unchanged file again does not parse it.
     """
+    _cache = {}
+    # key: absolute INI file path, value: (file status, dictionary of sections)
 
     def __init__(self, settings={}, options={}):
         """Initalize attribute variables.
@@ -51,42 +57,89 @@ class Configuration:
 
     def read(self, iniFile):
         """Read a configuration file.
-        
+
         Positional arguments:
             iniFile: str -- path configuration file path.
-            
+
         Settings and options that can not be read in, remain unchanged.
         """
-        config = ConfigParser()
-        config.read(iniFile, encoding='utf-8')
-        if config.has_section(self._sLabel):
-            section = config[self._sLabel]
+        sections = self._get_sections(iniFile)
+        section = sections.get(self._sLabel, None)
+        if section is not None:
             for setting in self.settings:
                 fallback = self.settings[setting]
-                self.settings[setting] = section.get(setting, fallback)
-        if config.has_section(self._oLabel):
-            section = config[self._oLabel]
+                self.settings[setting] = section.get(setting.lower(), fallback)
+        section = sections.get(self._oLabel, None)
+        if section is not None:
             for option in self.options:
                 fallback = self.options[option]
-                self.options[option] = section.getboolean(option, fallback)
+                value = section.get(option.lower(), None)
+                if value is not None:
+                    self.options[option] = ConfigParser.BOOLEAN_STATES.get(value.lower(), fallback)
 
     def write(self, iniFile):
-        """Save the configuration to iniFile.
+        """Save the configuration to iniFile, if changed.
 
         Positional arguments:
             iniFile: str -- path configuration file path.
+
+        The file is not written, if its content would not change.
+        Otherwise, a temporary file is written and renamed,
+        so the INI file is replaced in one step and never left incomplete.
         """
-        config = ConfigParser()
+        sections = {}
         if self.settings:
-            config.add_section(self._sLabel)
-            for settingId in self.settings:
-                config.set(self._sLabel, settingId, str(self.settings[settingId]))
+            sections[self._sLabel] = {settingId.lower(): str(self.settings[settingId]) for settingId in self.settings}
         if self.options:
-            config.add_section(self._oLabel)
+            sections[self._oLabel] = {}
             for settingId in self.options:
                 if self.options[settingId]:
-                    config.set(self._oLabel, settingId, 'Yes')
+                    sections[self._oLabel][settingId.lower()] = 'Yes'
                 else:
-                    config.set(self._oLabel, settingId, 'No')
-        with open(iniFile, 'w', encoding='utf-8') as f:
-            config.write(f)
+                    sections[self._oLabel][settingId.lower()] = 'No'
+        if sections == self._get_sections(iniFile):
+            return
+
+        config = ConfigParser()
+        config.read_dict(sections)
+        tempFile = f'{iniFile}.{os.getpid()}.tmp'
+        try:
+            with open(tempFile, 'w', encoding='utf-8') as f:
+                config.write(f)
+                f.flush()
+                status = os.fstat(f.fileno())
+            os.replace(tempFile, iniFile)
+        except:
+            try:
+                os.remove(tempFile)
+            except OSError:
+                pass
+            raise
+
+        # Renaming keeps the file status, so the written content can be cached.
+        self._cache[os.path.abspath(iniFile)] = (self._get_stamp(status), sections)
+
+    def _get_sections(self, iniFile):
+        """Return a dictionary of the INI file's sections; each section is a dictionary of strings.
+
+        Return an empty dictionary, if the file does not exist.
+        """
+        try:
+            stamp = self._get_stamp(os.stat(iniFile))
+        except OSError:
+            return {}
+
+        key = os.path.abspath(iniFile)
+        entry = self._cache.get(key, None)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        config = ConfigParser()
+        config.read(iniFile, encoding='utf-8')
+        sections = {section: dict(config[section]) for section in config.sections()}
+        self._cache[key] = (stamp, sections)
+        return sections
+
+    def _get_stamp(self, status):
+        """Return a tuple identifying a version of a file."""
+        return status.st_ino, status.st_mtime_ns, status.st_size
@@ -0,0 +1,100 @@
+"""Provide a class for the font and colors shared by the novelyst editor windows.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from collections import namedtuple
+import weakref
+import tkinter as tk
+from tkinter import font as tkfont
+from nveditorlib.nv_editor_globals import *
+
+ColorMode = namedtuple('ColorMode', ['name', 'foreground', 'background', 'markup', 'comments'])
+
+
+class EditorStyle:
+    """Font and colors shared by all editor boxes.
+
+    Public methods:
+        add(textBox) -- Apply the style to an editor box, and keep the box up to date.
+        set_color_mode(mode) -- Switch all editor boxes to another color mode at once.
+
+    Public instance variables:
+        colorMode -- int: index of the current color mode.
+        colorModes -- list of ColorMode tuples.
+        font -- tkinter.font.Font instance used by all editor boxes.
+
+    The style is created once from the validated settings.
+    All editor boxes refer to the same named font, so Tk keeps a single font.
+    """
+    _SUFFIXES = ('bright', 'light', 'dark')
+    # Suffixes of the color settings for each color mode.
+
+    def __init__(self, kwargs, defaults):
+        """Create the font and the color modes.
+
+        Positional arguments:
+            kwargs -- dictionary of the validated settings.
+            defaults -- dictionary of the default settings, replacing unknown colors.
+
+        A Tk root window must exist.
+        """
+        self.font = tkfont.Font(family=kwargs['font_family'], size=kwargs['font_size'])
+        self.colorModes = [
+            ColorMode(_('Bright mode'), kwargs['color_fg_bright'], kwargs['color_bg_bright'], 'gray50', 'forest green'),
+            ColorMode(_('Light mode'), kwargs['color_fg_light'], kwargs['color_bg_light'], 'gray50', 'forest green'),
+            ColorMode(_('Dark mode'), kwargs['color_fg_dark'], kwargs['color_bg_dark'], 'gray60', 'dark sea green'),
+            ]
+        self.colorMode = kwargs['color_mode']
+        self._defaults = defaults
+        self._options = dict(
+            font=self.font,
+            spacing1=kwargs['paragraph_spacing'],
+            spacing2=kwargs['line_spacing'],
+            padx=kwargs['margin_x'],
+            pady=kwargs['margin_y'],
+            )
+        self._textBoxes = weakref.WeakSet()
+
+    def add(self, textBox):
+        """Apply the style to an editor box, and keep the box up to date.
+
+        Positional arguments:
+            textBox -- TextBox instance.
+        """
+        if self._defaults is not None:
+            self._check_colors(textBox)
+        textBox.configure(**self._options)
+        self._set_colors(textBox, self.colorModes[self.colorMode])
+        self._textBoxes.add(textBox)
+
+    def set_color_mode(self, mode):
+        """Switch all editor boxes to another color mode at once.
+
+        Positional arguments:
+            mode -- int: index of the color mode.
+
+        Hidden editor windows are updated as well, so they are ready for reuse.
+        """
+        self.colorMode = mode
+        colors = self.colorModes[mode]
+        for textBox in list(self._textBoxes):
+            if textBox.winfo_exists():
+                self._set_colors(textBox, colors)
+
+    def _check_colors(self, widget):
+        """Replace the colors unknown to Tk with their defaults."""
+        for i, colors in enumerate(self.colorModes):
+            suffix = self._SUFFIXES[i]
+            for field, key in (('foreground', f'color_fg_{suffix}'), ('background', f'color_bg_{suffix}')):
+                try:
+                    widget.winfo_rgb(getattr(colors, field))
+                except tk.TclError:
+                    colors = colors._replace(**{field: self._defaults[key]})
+            self.colorModes[i] = colors
+        self._defaults = None
+
+    def _set_colors(self, textBox, colors):
+        textBox.configure(fg=colors.foreground, bg=colors.background, insertbackground=colors.foreground)
+        textBox.set_markup_colors(colors.markup, colors.comments)
@@ -0,0 +1,135 @@
+"""Provide optional instrumentation for the novelyst editor plugin.
+
+Startup profiling is enabled by setting the NOVELYST_EDITOR_PROFILE
+environment variable to the path of a log file.
+
+Timing the editor operations is enabled by the "instrumentation" option.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import json
+from collections import deque
+from functools import wraps
+from time import perf_counter
+from time import time
+
+PROFILE_FILE = os.environ.get('NOVELYST_EDITOR_PROFILE', '')
+# Path of the startup profile log; empty if profiling is disabled.
+
+_phaseStart = perf_counter()
+# The first phase begins when the plugin's modules are imported.
+
+
+def start_phase():
+    """Begin timing a phase."""
+    global _phaseStart
+    if PROFILE_FILE:
+        _phaseStart = perf_counter()
+
+
+def log_phase(name):
+    """Log the time elapsed since the phase began, and begin the next phase.
+
+    Positional arguments:
+        name -- str: name of the finished phase.
+
+    Without profiling, return at once.
+    The time spent writing the log is not counted for the next phase.
+    """
+    global _phaseStart
+    if not PROFILE_FILE:
+        return
+
+    elapsed = perf_counter() - _phaseStart
+    try:
+        with open(PROFILE_FILE, 'a', encoding='utf-8') as f:
+            f.write(f'novelyst_editor {name}: {elapsed * 1000:.3f} ms\n')
+    except OSError:
+        pass
+    _phaseStart = perf_counter()
+
+
+class Profiler:
+    """Recorder of the latencies and buffer sizes of instrumented methods.
+
+    Public methods:
+        wrap(cls, methodName, getSize=None) -- Replace a method with a timing wrapper.
+        record(name, duration, size=None) -- Record a single call.
+        dump(filePath) -- Write the histograms and the recent calls to a JSON file.
+
+    Latencies are counted in histograms with power-of-two microsecond buckets.
+    The most recent calls are kept in a ring buffer of fixed size.
+    Methods are only wrapped when the profiler is enabled,
+    so there is no overhead otherwise.
+    """
+
+    def __init__(self, capacity=1000):
+        """Create an empty ring buffer.
+
+        Optional arguments:
+            capacity -- int: number of recent calls kept.
+        """
+        self._histograms = {}
+        self._recentCalls = deque(maxlen=capacity)
+
+    def wrap(self, cls, methodName, getSize=None):
+        """Replace a method with a timing wrapper.
+
+        Positional arguments:
+            cls -- class defining the method.
+            methodName -- str: name of the method.
+
+        Optional arguments:
+            getSize -- function returning the buffer size, given the call arguments and the result.
+        """
+        method = getattr(cls, methodName)
+        name = f'{cls.__name__}.{methodName}'
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            duration = perf_counter() - start
+            if getSize is None:
+                self.record(name, duration)
+            else:
+                self.record(name, duration, getSize(args, result))
+            return result
+
+        setattr(cls, methodName, wrapper)
+
+    def record(self, name, duration, size=None):
+        """Record a single call.
+
+        Positional arguments:
+            name -- str: name of the operation.
+            duration -- float: latency in seconds.
+
+        Optional arguments:
+            size -- int: buffer size, if applicable.
+        """
+        bucket = int(duration * 1000000).bit_length()
+        # Bucket n counts the latencies below 2**n microseconds.
+        histogram = self._histograms.setdefault(name, {})
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        self._recentCalls.append((time(), name, duration, size))
+
+    def dump(self, filePath):
+        """Write the histograms and the recent calls to a JSON file.
+
+        Positional arguments:
+            filePath -- str: path of the file to write.
+        """
+        report = dict(
+            histograms={name: {f'<{2 ** bucket} us': self._histograms[name][bucket] for bucket in sorted(self._histograms[name])}
+                        for name in self._histograms},
+            recentCalls=[dict(time=t, name=name, duration=duration, size=size) for t, name, duration, size in self._recentCalls],
+            )
+        try:
+            with open(filePath, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        except OSError:
+            pass
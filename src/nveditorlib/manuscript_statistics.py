@@ -0,0 +1,145 @@
+"""Provide manuscript statistics for the novelyst editor plugin.
+
+NumPy is used for the histograms, if installed.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+import csv
+from collections import Counter
+from nveditorlib.word_counter import MARKUP_PATTERN
+from nveditorlib.word_counter import COMMENT_PATTERN
+from nveditorlib.word_counter import QUOTE_PATTERN
+from nveditorlib.process_pool import map_texts
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAX_WORD_LENGTH = 20
+# Longer words are counted in the last histogram bucket.
+
+NO_WORDS = re.compile(f'{QUOTE_PATTERN}|{MARKUP_PATTERN}|{COMMENT_PATTERN}', re.MULTILINE)
+# this matches what is not part of a word: markup, comments, and leading quote marks
+
+PLACEHOLDER = '\x00'
+# this replaces what is not part of a word, so that hyphens separated by markup do not become double hyphens
+
+WORDS = re.compile(r'(?:-(?!-)|\x00)*[^\s—–\-\x00][^\s—–-]*(?:-(?!-)[^\s—–-]*)*')
+# this matches the words between word limits, i.e. white space, dashes, and double hyphens (see word_counter.WORDS)
+
+NO_LETTERS = re.compile(r'[^\w\n]+')
+# this matches what is not counted for the word length, e.g. punctuation
+
+SENTENCE_ENDS = re.compile(r'[.!?…]+(?!\w)')
+# this matches sentence-ending punctuation
+
+OPEN_SENTENCE = re.compile(r'\w[^.!?…]*$')
+# this matches a paragraph's last sentence without sentence-ending punctuation
+
+WORD_CHARACTER = re.compile(r'[^\s—–-]')
+# this matches a character making a word
+
+
+def get_scene_statistics(text):
+    """Return a tuple of counts for a scene.
+
+    Positional arguments:
+        text -- str: scene content.
+
+    Return words, characters, sentences, paragraphs, and the word length histogram.
+    The histogram is a list with the number of words for each length of letters and digits.
+    Words and characters are counted like with count_words() and count_characters().
+    Sentences are counted by their ending punctuation; paragraphs are lines with words.
+    The words are found and measured by regular expressions and built-in functions,
+    so there is no Python code executed per word.
+    """
+    if not text:
+        return 0, 0, 0, 0, [0] * (MAX_WORD_LENGTH + 1)
+
+    plainText = NO_WORDS.sub(PLACEHOLDER, text)
+    words = WORDS.findall(plainText)
+    letters = NO_LETTERS.sub('', '\n'.join(words)).split('\n')
+    if numpy is not None:
+        lengths = numpy.fromiter(map(len, letters), dtype=numpy.int64, count=len(letters))
+        histogram = numpy.bincount(numpy.minimum(lengths, MAX_WORD_LENGTH), minlength=MAX_WORD_LENGTH + 1)
+        histogram = histogram.tolist()
+    else:
+        histogram = [0] * (MAX_WORD_LENGTH + 1)
+        for length, count in Counter(map(len, letters)).items():
+            histogram[min(length, MAX_WORD_LENGTH)] += count
+    if not words:
+        histogram[0] = 0
+
+    sentences = 0
+    paragraphs = 0
+    for line in plainText.split('\n'):
+        if WORD_CHARACTER.search(line) is None:
+            continue
+
+        paragraphs += 1
+        sentences += len(SENTENCE_ENDS.findall(line))
+        if OPEN_SENTENCE.search(line) is not None:
+            sentences += 1
+    characters = len(plainText) - plainText.count(PLACEHOLDER) - plainText.count('\n')
+    return len(words), characters, sentences, paragraphs, histogram
+
+
+def get_statistics(texts, processes=1):
+    """Return a list of the scene statistics.
+
+    Positional arguments:
+        texts -- list of the scene contents.
+
+    Optional arguments:
+        processes -- int: maximum number of worker processes.
+
+    Large projects are processed in parallel, if more than one process is allowed.
+    """
+    return map_texts(get_scene_statistics, texts, processes)
+
+
+def get_totals(statistics):
+    """Return the sums of the scene statistics, in the same format.
+
+    Positional arguments:
+        statistics -- list of scene statistics tuples.
+    """
+    if not statistics:
+        return get_scene_statistics('')
+
+    if numpy is not None:
+        counts = numpy.array([row[:4] for row in statistics], dtype=numpy.int64).sum(axis=0).tolist()
+        histogram = numpy.array([row[4] for row in statistics], dtype=numpy.int64).sum(axis=0).tolist()
+    else:
+        counts = [sum(column) for column in zip(*(row[:4] for row in statistics))]
+        histogram = [sum(column) for column in zip(*(row[4] for row in statistics))]
+    return (*counts, histogram)
+
+
+def write_csv(filePath, titles, statistics):
+    """Write the statistics to a CSV file with a total row.
+
+    Positional arguments:
+        filePath -- str: path of the CSV file.
+        titles -- list of (chapter title, scene title) tuples.
+        statistics -- list of scene statistics tuples.
+
+    Raise OSError, if the file cannot be written.
+    """
+    header = ['Chapter', 'Scene', 'Words', 'Characters', 'Sentences', 'Paragraphs', 'Words per sentence']
+    header.extend(str(length) for length in range(1, MAX_WORD_LENGTH))
+    header.append(f'{MAX_WORD_LENGTH}+')
+    with open(filePath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        rows = list(zip(titles, statistics))
+        rows.append((('', 'Total'), get_totals(statistics)))
+        for (chapterTitle, sceneTitle), (words, characters, sentences, paragraphs, histogram) in rows:
+            if sentences:
+                wordsPerSentence = round(words / sentences, 1)
+            else:
+                wordsPerSentence = 0
+            writer.writerow([chapterTitle, sceneTitle, words, characters, sentences, paragraphs, wordsPerSentence] + histogram[1:])
@@ -0,0 +1,113 @@
+"""Provide a syntax highlighter for yWriter markup in the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+from nveditorlib.word_counter import MARKUP_PATTERN
+from nveditorlib.word_counter import COMMENT_PATTERN
+from nveditorlib.word_counter import QUOTE_PATTERN
+
+
+class MarkupHighlighter:
+    """Incremental syntax highlighter for a tkinter Text widget.
+
+    Modified lines are marked with an invisible tag that moves along with the text,
+    so line shifts caused by later modifications need no bookkeeping.
+    Highlighting is done in idle time, and only for the marked lines
+    within the visible region. Lines scrolled into view are highlighted on demand.
+
+    Public methods:
+        mark_dirty(first=None, last=None) -- Mark a range of lines for highlighting.
+        update() -- Schedule highlighting the visible region.
+        cancel() -- Cancel scheduled highlighting, if any.
+
+    Public class constants:
+        MARKUP_TAG -- str: name of the text tag for formatting tags and quote marks.
+        COMMENT_TAG -- str: name of the text tag for comments.
+    """
+    MARKUP_TAG = 'markup'
+    COMMENT_TAG = 'comment'
+
+    _DIRTY_TAG = 'dirty'
+    # Invisible tag marking lines to be highlighted.
+
+    _MARGIN = 50
+    # Number of lines above and below the visible region that are highlighted in advance.
+
+    _HIGHLIGHT = re.compile(f'({MARKUP_PATTERN}|{QUOTE_PATTERN})|({COMMENT_PATTERN})', re.MULTILINE)
+    # Group 1 is markup, group 2 is a comment.
+
+    def __init__(self, textBox):
+        """Set up the text tags.
+
+        Positional arguments:
+            textBox -- tkinter Text widget to highlight.
+        """
+        self._textBox = textBox
+        self._tags = (None, self.MARKUP_TAG, self.COMMENT_TAG)
+        self._job = None
+        for tag in self._tags[1:]:
+            self._textBox.tag_configure(tag)
+            self._textBox.tag_lower(tag)
+            # The selection's colors take precedence.
+
+    def mark_dirty(self, first=None, last=None):
+        """Mark a range of lines for highlighting.
+
+        Optional arguments:
+            first -- int: number of the first line. If None, mark the whole text.
+            last -- int: number of the last line.
+        """
+        if first is None:
+            self._textBox.tag_add(self._DIRTY_TAG, '1.0', 'end')
+        else:
+            self._textBox.tag_add(self._DIRTY_TAG, f'{first}.0', f'{last}.end')
+        self.update()
+
+    def update(self, *args):
+        """Schedule highlighting the visible region."""
+        if self._job is None:
+            self._job = self._textBox.after_idle(self._highlight)
+
+    def cancel(self):
+        """Cancel scheduled highlighting, if any."""
+        if self._job is not None:
+            self._textBox.after_cancel(self._job)
+            self._job = None
+
+    def _get_line_number(self, index):
+        return int(self._textBox.index(index).split('.')[0])
+
+    def _highlight(self):
+        """Highlight the marked lines within the visible region."""
+        self._job = None
+        first = max(1, self._get_line_number('@0,0') - self._MARGIN)
+        last = self._get_line_number(f'@0,{self._textBox.winfo_height()}') + self._MARGIN
+        line = first
+        while line <= last:
+            start = f'{line}.0'
+            if self._DIRTY_TAG in self._textBox.tag_names(start):
+                # A marked range begins above the region.
+                dirtyRange = (start, self._textBox.tag_prevrange(self._DIRTY_TAG, f'{start}+1c')[1])
+            else:
+                dirtyRange = self._textBox.tag_nextrange(self._DIRTY_TAG, start, f'{last}.end')
+            if not dirtyRange:
+                break
+
+            rangeFirst = self._get_line_number(dirtyRange[0])
+            rangeLast = min(self._get_line_number(dirtyRange[1]), last)
+            for line in range(rangeFirst, rangeLast + 1):
+                self._highlight_line(line)
+            self._textBox.tag_remove(self._DIRTY_TAG, f'{rangeFirst}.0', f'{rangeLast}.end')
+            line = rangeLast + 1
+
+    def _highlight_line(self, line):
+        """Replace the highlighting of a single line."""
+        lineStart = f'{line}.0'
+        lineEnd = f'{line}.end'
+        for tag in self._tags[1:]:
+            self._textBox.tag_remove(tag, lineStart, lineEnd)
+        for match in self._HIGHLIGHT.finditer(self._textBox.get(lineStart, lineEnd)):
+            self._textBox.tag_add(self._tags[match.lastindex], f'{line}.{match.start()}', f'{line}.{match.end()}')
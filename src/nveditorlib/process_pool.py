@@ -0,0 +1,36 @@
+"""Provide parallel processing of scene texts for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+
+POOL_THRESHOLD = 1000000
+# Number of characters from which the texts are processed in parallel.
+
+
+def map_texts(function, texts, processes=1):
+    """Return a list of the function's results for each text.
+
+    Positional arguments:
+        function -- module level function taking a text as its only argument.
+        texts -- list of str.
+
+    Optional arguments:
+        processes -- int: maximum number of worker processes.
+
+    Large amounts of text are processed in parallel, if more than one process is allowed.
+    If the worker processes cannot be started, the texts are processed one by one.
+    """
+    if processes > 1 and sum(len(text) for text in texts if text) > POOL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(min(processes, len(texts))) as executor:
+                chunkSize = len(texts) // (processes * 4) + 1
+                return list(executor.map(function, texts, chunksize=chunkSize))
+
+        except Exception:
+            # The plugin may not be importable by the worker processes.
+            pass
+
+    return [function(text) for text in texts]
@@ -0,0 +1,182 @@
+"""Provide a class for editing scenes without editor windows.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nveditorlib.text_editing import normalize_markup
+from nveditorlib.text_editing import split_text
+from nveditorlib.text_editing import toggle_format
+from nveditorlib.word_counter import count_words
+from nveditorlib.process_pool import map_texts
+
+
+class SceneBatch:
+    """Headless editing of the project's scene contents.
+
+    Public methods:
+        commit() -- Write the changed texts to the scenes.
+        count_words(scIds=None) -- Return a dictionary of word counts.
+        get_text(scId) -- Return a scene's text, including uncommitted changes.
+        insert_parts(scId, parts) -- Keep the first part in the scene, and move the others into new scenes.
+        normalize_markup(scIds=None, processes=1) -- Collapse redundant markup, and balance the tags.
+        set_format(scIds=None, tag='') -- Format the whole text of scenes like a selection in the editor.
+        set_text(scId, text) -- Change a scene's text.
+        split_scene(scId, offsets) -- Split a scene at character offsets.
+
+    Public instance variables:
+        changes -- dict: key: scene ID, value: changed text not yet committed.
+
+    The operations read and change the texts in memory; no widget is created.
+    The scene contents are not changed until commit() is called,
+    but new scenes are added to the project immediately.
+    Scene IDs default to all scenes of the project.
+    The caller is responsible for the project not being locked.
+    """
+
+    def __init__(self, ui, searchIndex=None):
+        """Initialize an empty batch.
+
+        Positional arguments:
+            ui -- reference to the NovelystTk instance of the application.
+
+        Optional arguments:
+            searchIndex -- SearchIndex instance to be updated on commit.
+        """
+        self._ui = ui
+        self._searchIndex = searchIndex
+        self.changes = {}
+
+    def commit(self):
+        """Write the changed texts to the scenes; set the project's change flag.
+
+        Return a list of the changed scene IDs.
+        The user interface is not refreshed.
+        """
+        scIds = list(self.changes)
+        for scId in scIds:
+            self._ui.novel.scenes[scId].sceneContent = self.changes[scId]
+            if self._searchIndex is not None:
+                self._searchIndex.update(scId)
+        if scIds:
+            self._ui.isModified = True
+        self.changes.clear()
+        return scIds
+
+    def count_words(self, scIds=None):
+        """Return a dictionary of word counts.
+
+        Optional arguments:
+            scIds -- iterable of scene IDs.
+        """
+        if scIds is None:
+            scIds = self._ui.novel.scenes
+        return {scId: count_words(self.get_text(scId)) for scId in scIds}
+
+    def get_text(self, scId):
+        """Return a scene's text, including uncommitted changes.
+
+        Positional arguments:
+            scId -- str: scene ID.
+        """
+        text = self.changes.get(scId, None)
+        if text is None:
+            text = self._ui.novel.scenes[scId].sceneContent or ''
+        return text
+
+    def insert_parts(self, scId, parts):
+        """Keep the first part in the scene, and move the others into new scenes.
+
+        Positional arguments:
+            scId -- str: scene ID.
+            parts -- list of str: the scene's text, split into parts.
+
+        The new scenes are inserted after the scene; they get its type, status, and viewpoint character.
+        If not all scenes can be added, the last one takes the rest.
+        The parts are stripped of leading and trailing spaces and line breaks.
+        Return a list of the new scene IDs.
+        """
+        thisScene = self._ui.novel.scenes[scId]
+        newIds = []
+        node = f'{self._ui.tv.SCENE_PREFIX}{scId}'
+        for __ in parts[1:]:
+            newId = self._ui.tv.add_scene(selection=node,
+                                          appendToPrev=True,
+                                          scType=thisScene.scType,
+                                          status=thisScene.status
+                                          )
+            if not newId:
+                break
+
+            newIds.append(newId)
+            node = f'{self._ui.tv.SCENE_PREFIX}{newId}'
+        if not newIds:
+            return newIds
+
+        parts = parts[:len(newIds)] + [''.join(parts[len(newIds):])]
+        self.set_text(scId, parts[0].strip(' \n'))
+        for newId, sceneText in zip(newIds, parts[1:]):
+            self.set_text(newId, sceneText.strip(' \n'))
+            if thisScene.characters:
+                self._ui.novel.scenes[newId].characters = [thisScene.characters[0]]
+        return newIds
+
+    def normalize_markup(self, scIds=None, processes=1):
+        """Collapse redundant markup, and balance the tags; keep the formatting.
+
+        Optional arguments:
+            scIds -- iterable of scene IDs.
+            processes -- int: maximum number of worker processes.
+
+        See text_editing.normalize_markup() for details.
+        Large projects are processed in parallel, if more than one process is allowed.
+        """
+        if scIds is None:
+            scIds = self._ui.novel.scenes
+        scIds = list(scIds)
+        texts = map_texts(normalize_markup, [self.get_text(scId) for scId in scIds], processes)
+        for scId, text in zip(scIds, texts):
+            self.set_text(scId, text)
+
+    def set_format(self, scIds=None, tag=''):
+        """Format the whole text of scenes like a selection in the editor.
+
+        Optional arguments:
+            scIds -- iterable of scene IDs.
+            tag -- str: tag to toggle; if empty, all markup is removed.
+        """
+        if scIds is None:
+            scIds = self._ui.novel.scenes
+        for scId in scIds:
+            text = self.get_text(scId)
+            if text:
+                self.set_text(scId, toggle_format(text, tag))
+
+    def set_text(self, scId, text):
+        """Change a scene's text.
+
+        Positional arguments:
+            scId -- str: scene ID.
+            text -- str: new text.
+
+        Setting the text the scene already has discards the change.
+        """
+        if text == (self._ui.novel.scenes[scId].sceneContent or ''):
+            self.changes.pop(scId, None)
+        else:
+            self.changes[scId] = text
+
+    def split_scene(self, scId, offsets):
+        """Split a scene at character offsets.
+
+        Positional arguments:
+            scId -- str: scene ID.
+            offsets -- iterable of int: character offsets in the scene's text.
+
+        Return a list of the new scene IDs.
+        """
+        parts = split_text(self.get_text(scId), offsets)
+        if len(parts) < 2:
+            return []
+
+        return self.insert_parts(scId, parts)
@@ -0,0 +1,102 @@
+"""Provide a cache of scenes prepared for loading into the editor.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from collections import OrderedDict
+from threading import Lock
+from threading import Thread
+from nveditorlib.word_counter import WordCounter
+
+
+class SceneCache:
+    """Least recently used cache of scene word count tables.
+    
+    Scenes are prepared in a worker thread, so that paging to a 
+    neighbouring scene does not require counting its words.
+    The cache is limited by the total size of the cached scenes.
+    
+    Public methods:
+        get(scId) -- Return a copy of the scene's word counter, if cached.
+        prefetch(scIds) -- Prepare scenes in a worker thread.
+        clear() -- Remove all entries.
+    """
+
+    def __init__(self, ui, maxSize=2000000):
+        """Initialize an empty cache.
+        
+        Positional arguments:
+            ui -- reference to the NovelystTk instance of the application.
+            
+        Optional arguments:
+            maxSize: int -- maximum total number of characters of the cached scenes.
+        """
+        self._ui = ui
+        self._maxSize = maxSize
+        self._entries = OrderedDict()
+        # key: scene ID, value: (content hash, size, word counter)
+        self._size = 0
+        self._pending = set()
+        self._lock = Lock()
+
+    def get(self, scId):
+        """Return a copy of the scene's word counter, if cached; otherwise return None.
+        
+        Positional arguments:
+            scId -- str: scene ID.
+        """
+        contentHash = hash(self._ui.novel.scenes[scId].sceneContent)
+        with self._lock:
+            entry = self._entries.get(scId, None)
+            if entry is None or entry[0] != contentHash:
+                return None
+
+            self._entries.move_to_end(scId)
+            return entry[2].copy()
+
+    def prefetch(self, scIds):
+        """Prepare scenes in a worker thread.
+        
+        Positional arguments:
+            scIds -- list of scene IDs.
+            
+        Scenes already cached or being prepared are skipped.
+        """
+        jobs = []
+        with self._lock:
+            for scId in scIds:
+                text = self._ui.novel.scenes[scId].sceneContent
+                if not text or len(text) > self._maxSize or scId in self._pending:
+                    continue
+
+                contentHash = hash(text)
+                entry = self._entries.get(scId, None)
+                if entry is not None and entry[0] == contentHash:
+                    continue
+
+                self._pending.add(scId)
+                jobs.append((scId, contentHash, text))
+        if jobs:
+            Thread(target=self._prepare, args=(jobs,), daemon=True).start()
+
+    def clear(self):
+        """Remove all entries, e.g. when the project is closed."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _prepare(self, jobs):
+        """Count the words of the scenes; store the results, evicting the least recently used entries."""
+        for scId, contentHash, text in jobs:
+            wordCounter = WordCounter(text)
+            with self._lock:
+                self._pending.discard(scId)
+                entry = self._entries.pop(scId, None)
+                if entry is not None:
+                    self._size -= entry[1]
+                self._entries[scId] = (contentHash, len(text), wordCounter)
+                self._size += len(text)
+                while self._size > self._maxSize:
+                    __, entry = self._entries.popitem(last=False)
+                    self._size -= entry[1]
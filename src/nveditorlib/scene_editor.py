@@ -4,48 +4,59 @@ Copyright (c) 2023 Peter Triesberger
 For further information see https://github.com/peter88213/novelyst_editor
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
-import webbrowser
+from collections import OrderedDict
 import tkinter as tk
 from tkinter import ttk
-from tkinter import messagebox
 from nveditorlib.nv_editor_globals import *
 from nveditorlib.text_box import TextBox
+from nveditorlib.scene_batch import SceneBatch
+from nveditorlib.update_scheduler import UpdateScheduler
+from nveditorlib.scene_journal import SceneJournal
+from nveditorlib.scene_journal import get_journal_path
+from nveditorlib.scene_journal import recover
 
 HELP_URL = 'https://peter88213.github.io/novelyst_editor/usage'
 KEY_QUIT_PROGRAM = ('<Control-q>', 'Ctrl-Q')
 KEY_APPLY_CHANGES = ('<Control-s>', 'Ctrl-S')
 KEY_UPDATE_WORDCOUNT = ('<F5>', 'F5')
 KEY_SPLIT_SCENE = ('<Control-Alt-s>', 'Ctrl-Alt-S')
+KEY_SPLIT_MARK = ('<Control-Alt-m>', 'Ctrl-Alt-M')
 KEY_CREATE_SCENE = ('<Control-Alt-n>', 'Ctrl-Alt-N')
 KEY_ITALIC = ('<Control-i>', 'Ctrl-I')
 KEY_BOLD = ('<Control-b>', 'Ctrl-B')
 KEY_PLAIN = ('<Control-m>', 'Ctrl-M')
-
-COLOR_MODES = [
-        (_('Bright mode'), 'black', 'white'),
-        (_('Light mode'), 'black', 'antique white'),
-        (_('Dark mode'), 'light grey', 'gray20'),
-        ]
-# (name, foreground, background) tuples for color modes.
+KEY_FIND = ('<Control-f>', 'Ctrl-F')
 
 
 class SceneEditor(tk.Toplevel):
     """A separate scene editor window with a menu bar, a text box, and a status bar.
     
     Public instance methods:
+        close() -- Exit the editor without applying changes; keep the window for reuse, if possible.
+        commit(sceneText) -- Put the text into the scene; do not refresh the user interface.
+        get_changed_text() -- Return the editor content, if it differs from the scene content.
         lift() -- Bring window to the foreground and set the focus to the editor box.
         on_quit() -- Exit the editor. Apply changes, if possible.
+        reload() -- Discard the editor content and load the scene again.
+        reopen(scId, size) -- Show a reused editor window with another scene.
+        select_text(start, end) -- Select a range of characters and scroll it into view.
         show_status(message=None) -- Display a message on the status bar.
         show_wordcount()-- Display the word count on the status bar.
+
+    Public instance variables:
+        isOpen -- bool: True, if the editor window is open.
+        scId -- str: ID of the scene being edited.
     """
-    liveWordCount = False
-    colorMode = 0
+    _keyRoot = None
+    # Root window the key bindings are registered with.
+    skippedChangeChecks = 0
+    # Debug counter: number of times reading the editor box was skipped, because it was not modified.
 
     def __init__(self, plugin, ui, scId, size, icon=None):
         self._ui = ui
         self._plugin = plugin
         self._scene = self._ui.novel.scenes[scId]
-        self._scId = scId
+        self.scId = scId
 
         # Create an independent editor window.
         super().__init__()
@@ -67,28 +78,33 @@ class SceneEditor(tk.Toplevel):
         self._sceneEditor = TextBox(self,
                                     wrap='word',
                                     undo=True,
-                                    autoseparators=True,
-                                    spacing1=self._plugin.kwargs['paragraph_spacing'],
-                                    spacing2=self._plugin.kwargs['line_spacing'],
-                                    maxundo=-1,
-                                    padx=self._plugin.kwargs['margin_x'],
-                                    pady=self._plugin.kwargs['margin_y'],
-                                    font=(self._plugin.kwargs['font_family'], self._plugin.kwargs['font_size']),
+                                    undoBudget=self._plugin.kwargs['undo_budget'],
+                                    undoGrouping=self._plugin.kwargs['undo_grouping'],
                                     )
+        self._plugin.style.add(self._sceneEditor)
         self._sceneEditor.pack(expand=True, fill='both')
         self._sceneEditor.pack_propagate(0)
-        self._set_editor_colors()
 
         # Add a status bar to the editor window.
         self._statusBar = tk.Label(self, text='', anchor='w', padx=5, pady=2)
         self._statusBar.pack(expand=False, side='left')
 
+        # Coalesce the live word count updates.
+        self._wcScheduler = UpdateScheduler(self,
+                                            self.show_wordcount,
+                                            self._plugin.kwargs['live_wordcount_delay'],
+                                            self._plugin.kwargs['live_wordcount_max_delay'],
+                                            )
+
         # Add buttons to the bottom line.
         ttk.Button(self, text=_('Next'), command=self._load_next).pack(side='right')
         ttk.Button(self, text=_('Exit'), command=self.on_quit).pack(side='right')
         ttk.Button(self, text=_('Previous'), command=self._load_prev).pack(side='right')
 
         # Load the scene content into the text editor.
+        self._prefetchJob = None
+        self._histories = OrderedDict()
+        # key: scene ID, value: (content hash, UndoHistory instance) of the scenes edited before
         self._load_scene()
 
         #--- Configure the user interface.
@@ -112,9 +128,9 @@ class SceneEditor(tk.Toplevel):
         # Add a "View" Submenu to the editor window.
         self._viewMenu = tk.Menu(self._mainMenu, tearoff=0)
         self._mainMenu.add_cascade(label=_('View'), menu=self._viewMenu)
-        self._viewMenu.add_command(label=COLOR_MODES[0][0], command=lambda: self._set_view_mode(mode=0))
-        self._viewMenu.add_command(label=COLOR_MODES[1][0], command=lambda: self._set_view_mode(mode=1))
-        self._viewMenu.add_command(label=COLOR_MODES[2][0], command=lambda: self._set_view_mode(mode=2))
+        self._viewMenu.add_command(label=self._plugin.style.colorModes[0].name, command=lambda: self._set_view_mode(mode=0))
+        self._viewMenu.add_command(label=self._plugin.style.colorModes[1].name, command=lambda: self._set_view_mode(mode=1))
+        self._viewMenu.add_command(label=self._plugin.style.colorModes[2].name, command=lambda: self._set_view_mode(mode=2))
         # note: this can't be done with a loop because of the "lambda" evaluation at runtime
 
         # Add an "Edit" Submenu to the editor window.
@@ -125,7 +141,11 @@ class SceneEditor(tk.Toplevel):
         self._editMenu.add_command(label=_('Paste'), accelerator='Ctrl-V', command=lambda: self._sceneEditor.event_generate("<<Paste>>"))
         self._editMenu.add_separator()
         self._editMenu.add_command(label=_('Split at cursor position'), accelerator=KEY_SPLIT_SCENE[1], command=self._split_scene)
+        self._editMenu.add_command(label=_('Set/remove split mark'), accelerator=KEY_SPLIT_MARK[1], command=self._sceneEditor.toggle_split_mark)
+        self._editMenu.add_command(label=_('Remove all split marks'), command=self._sceneEditor.clear_split_marks)
         self._editMenu.add_command(label=_('Create scene'), accelerator=KEY_CREATE_SCENE[1], command=self._create_scene)
+        self._editMenu.add_separator()
+        self._editMenu.add_command(label=_('Find and replace'), accelerator=KEY_FIND[1], command=self._plugin.open_search)
 
         # Add a "Format" Submenu to the editor window.
         self._formatMenu = tk.Menu(self._mainMenu, tearoff=0)
@@ -137,27 +157,23 @@ class SceneEditor(tk.Toplevel):
         # Add a "Word count" Submenu to the editor window.
         self._wcMenu = tk.Menu(self._mainMenu, tearoff=0)
         self._mainMenu.add_cascade(label=_('Word count'), menu=self._wcMenu)
-        self._wcMenu.add_command(label=_('Update'), accelerator=KEY_UPDATE_WORDCOUNT[1], command=self.show_wordcount)
+        self._wcMenu.add_command(label=_('Update'), accelerator=KEY_UPDATE_WORDCOUNT[1], command=self._update_wordcount)
         self._wcMenu.add_command(label=_('Enable live update'), command=self._live_wc_on)
         self._wcMenu.add_command(label=_('Disable live update'), command=self._live_wc_off)
 
         # Help
         self.helpMenu = tk.Menu(self._mainMenu, tearoff=0)
         self._mainMenu.add_cascade(label=_('Help'), menu=self.helpMenu)
-        self.helpMenu.add_command(label=_('Online help'), command=lambda: webbrowser.open(HELP_URL))
+        self.helpMenu.add_command(label=_('Online help'), command=self._open_help)
 
         # Event bindings.
-        self.bind_class('Text', KEY_APPLY_CHANGES[0], self._apply_changes)
-        self.bind_class('Text', KEY_QUIT_PROGRAM[0], self.on_quit)
-        self.bind_class('Text', KEY_UPDATE_WORDCOUNT[0], self.show_wordcount)
-        self.bind_class('Text', KEY_SPLIT_SCENE[0], self._split_scene)
-        self.bind_class('Text', KEY_CREATE_SCENE[0], self._create_scene)
-        self.bind_class('Text', KEY_ITALIC[0], self._sceneEditor.italic)
-        self.bind_class('Text', KEY_BOLD[0], self._sceneEditor.bold)
-        self.bind_class('Text', KEY_PLAIN[0], self._sceneEditor.plain)
+        self._bind_keys()
+        self._sceneEditor.bind('<<WordCountReady>>', self.show_wordcount)
+        # The project may have been changed while another window had the focus.
+        self.bind('<FocusIn>', lambda event: self._plugin.wordCountIndex.refresh())
         self.protocol("WM_DELETE_WINDOW", self.on_quit)
 
-        if SceneEditor.liveWordCount:
+        if self._plugin.kwargs['live_wordcount']:
             self._live_wc_on()
         else:
             self._wcMenu.entryconfig(_('Disable live update'), state='disabled')
@@ -173,12 +189,100 @@ class SceneEditor(tk.Toplevel):
         super().lift()
         self._sceneEditor.focus()
 
+    def close(self):
+        """Exit the editor without applying changes; keep the window for reuse, if possible.
+        
+        If the plugin's editor pool is not full, the window is hidden and put into the pool.
+        Otherwise, it is destroyed.
+        """
+        self._close_journal()
+        self._wcScheduler.cancel()
+        if self._prefetchJob is not None:
+            self.after_cancel(self._prefetchJob)
+            self._prefetchJob = None
+        self._plugin.kwargs['window_geometry'] = self.winfo_geometry()
+        self.isOpen = False
+        self._histories.clear()
+        if len(self._plugin.editorPool) < self._plugin.kwargs['editor_pool_size']:
+            self.withdraw()
+            self._sceneEditor.clear()
+            self._sceneEditor.edit_reset()
+            self._scene = None
+            self._plugin.editorPool.append(self)
+        else:
+            self.destroy()
+
+    def commit(self, sceneText):
+        """Put the text into the scene; do not refresh the user interface.
+        
+        Positional arguments:
+            sceneText -- str: changed editor content.
+        
+        Set the project's change flag, reset the editor box's modified flag, and compact the journal.
+        """
+        batch = SceneBatch(self._ui, self._plugin.searchIndex)
+        batch.set_text(self.scId, sceneText)
+        batch.commit()
+        self._sceneEditor.edit_modified(False)
+        self._compact_journal()
+
+    def get_changed_text(self):
+        """Return the editor content, if it differs from the scene content; otherwise return None.
+        
+        The editor box is not read unless its modified flag is set.
+        If the flag is set, but the content equals the scene content, the flag is reset.
+        """
+        if not self._sceneEditor.edit_modified():
+            SceneEditor.skippedChangeChecks += 1
+            return None
+
+        sceneText = self._sceneEditor.get_text()
+        if sceneText or self._scene.sceneContent:
+            if self._scene.sceneContent != sceneText:
+                return sceneText
+
+        self._sceneEditor.edit_modified(False)
+        return None
+
     def on_quit(self, event=None):
         """Exit the editor. Apply changes, if possible."""
         self._apply_changes_after_asking()
-        self._plugin.kwargs['window_geometry'] = self.winfo_geometry()
-        self.destroy()
-        self.isOpen = False
+        self.close()
+
+    def reload(self):
+        """Discard the editor content and load the scene again, e.g. after the scene has been changed elsewhere."""
+        self._close_journal()
+        self._sceneEditor.clear()
+        self._sceneEditor.edit_reset()
+        self._load_scene()
+
+    def reopen(self, scId, size):
+        """Show a reused editor window with another scene.
+        
+        Positional arguments:
+            scId -- str: ID of the scene to edit.
+            size -- str: window geometry.
+        """
+        self._scene = self._ui.novel.scenes[scId]
+        self.scId = scId
+        self.geometry(size)
+        self._load_scene()
+        if self._plugin.kwargs['live_wordcount']:
+            self._live_wc_on()
+        else:
+            self._live_wc_off()
+        self.deiconify()
+        self.lift()
+        self.isOpen = True
+
+    def select_text(self, start, end):
+        """Select a range of characters and scroll it into view.
+        
+        Positional arguments:
+            start -- int: offset of the first character in the scene content.
+            end -- int: offset behind the last character.
+        """
+        self._sceneEditor.select_text(start, end)
 
     def show_status(self, message=None):
         """Display a message on the status bar."""
@@ -187,11 +291,58 @@ class SceneEditor(tk.Toplevel):
     def show_wordcount(self, event=None):
         """Display the word count on the status bar."""
         wc = self._sceneEditor.count_words()
+        if wc is None:
+            self._statusBar.config(text=_('Counting words ...'))
+            return
+
         diff = wc - self._initialWc
-        self._statusBar.config(text=f'{wc} {_("words")} ({diff} {_("new")})')
+        chapterWc, projectWc, sessionWc = self._plugin.wordCountIndex.get_totals(self.scId, wc)
+        self._statusBar.config(text=f'{wc} {_("words")} ({diff} {_("new")}) | {_("Chapter")}: {chapterWc} | {_("Project")}: {projectWc} | {_("Session")}: {sessionWc}')
+
+    def _bind_keys(self):
+        """Bind the editor keys to the Text widget class.
+        
+        The key events are routed to the editor window the focused widget belongs to.
+        The bindings are registered with the root window, so they are not lost
+        when the window that created them is destroyed.
+        """
+        root = self._root()
+        if SceneEditor._keyRoot is root:
+            return
+
+        SceneEditor._keyRoot = root
+        keyHandlers = [
+            (KEY_APPLY_CHANGES[0], lambda editor, event: editor._apply_changes(event)),
+            (KEY_QUIT_PROGRAM[0], lambda editor, event: editor.on_quit(event)),
+            (KEY_UPDATE_WORDCOUNT[0], lambda editor, event: editor._update_wordcount(event)),
+            (KEY_SPLIT_SCENE[0], lambda editor, event: editor._split_scene(event)),
+            (KEY_SPLIT_MARK[0], lambda editor, event: editor._sceneEditor.toggle_split_mark(event)),
+            (KEY_CREATE_SCENE[0], lambda editor, event: editor._create_scene(event)),
+            (KEY_ITALIC[0], lambda editor, event: editor._sceneEditor.italic(event)),
+            (KEY_BOLD[0], lambda editor, event: editor._sceneEditor.bold(event)),
+            (KEY_PLAIN[0], lambda editor, event: editor._sceneEditor.plain(event)),
+            (KEY_FIND[0], lambda editor, event: editor._plugin.open_search()),
+            ]
+        for key, handler in keyHandlers:
+            root.bind_class('Text', key, lambda event, handler=handler: SceneEditor._route_key(event, handler))
+
+    def _close_journal(self):
+        """Stop logging the modifications; delete the journal file."""
+        if self._sceneEditor.journal is not None:
+            self._sceneEditor.journal.discard()
+            self._sceneEditor.journal = None
+
+    def _compact_journal(self):
+        """Replace the logged modifications with the applied text.
+        
+        The applied text is kept until the editor is closed, because the project may not be saved yet.
+        """
+        if self._sceneEditor.journal is not None:
+            self._sceneEditor.journal.compact(self._sceneEditor.get('1.0', 'end-1c'))
 
     def _create_scene(self, event=None):
         """Create a new scene after the currently edited scene."""
+        from tkinter import messagebox
         if self._ui.isLocked:
             messagebox.showinfo(APPLICATION, _('Cannot create scenes, because the project is locked.'), parent=self)
             self.lift()
@@ -199,50 +350,74 @@ class SceneEditor(tk.Toplevel):
 
         self.lift()
         # Add a scene after the currently edited scene.
-        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self._scId}'
+        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self.scId}'
         newId = self._ui.tv.add_scene(selection=thisNode,
-                                      scType=self._ui.novel.scenes[self._scId].scType,
+                                      scType=self._ui.novel.scenes[self.scId].scType,
                                       )
         # Go to the new scene.
         self._load_next()
 
     def _apply_changes(self, event=None):
         """Transfer the editor content to the project, if modified."""
-        sceneText = self._sceneEditor.get_text()
-        if sceneText or self._scene.sceneContent:
-            if self._scene.sceneContent != sceneText:
-                self._transfer_text(sceneText)
+        sceneText = self.get_changed_text()
+        if sceneText is not None:
+            self._transfer_text(sceneText)
 
     def _apply_changes_after_asking(self, event=None):
         """Transfer the editor content to the project, if modified. Ask first."""
-        sceneText = self._sceneEditor.get_text()
-        if sceneText or self._scene.sceneContent:
-            if self._scene.sceneContent != sceneText:
-                if messagebox.askyesno(APPLICATION, _('Apply scene changes?'), parent=self):
-                    self._transfer_text(sceneText)
+        from tkinter import messagebox
+        sceneText = self.get_changed_text()
+        if sceneText is not None:
+            if messagebox.askyesno(APPLICATION, _('Apply scene changes?'), parent=self):
+                self._transfer_text(sceneText)
+
+    def _keep_history(self):
+        """Keep the undo history of the scene being left, if the editor content equals the scene content.
+        
+        The kept histories share the undo budget; the least recently kept ones are dropped first.
+        """
+        history = self._sceneEditor.get_history()
+        if history is None or not (history.can_undo() or history.can_redo()):
+            return
+
+        text = self._sceneEditor.get('1.0', 'end-1c')
+        if text != (self._scene.sceneContent or ''):
+            # The changes have not been applied, so the history does not match the scene.
+            return
+
+        self._histories[self.scId] = (hash(text), history)
+        size = sum(history.size for __, history in self._histories.values())
+        while size > self._plugin.kwargs['undo_budget']:
+            __, (__, history) = self._histories.popitem(last=False)
+            size -= history.size
 
     def _live_wc_off(self, event=None):
         self.unbind('<KeyRelease>')
+        self._wcScheduler.cancel()
         self._wcMenu.entryconfig(_('Enable live update'), state='normal')
         self._wcMenu.entryconfig(_('Disable live update'), state='disabled')
-        SceneEditor.liveWordCount = False
+        self._plugin.kwargs['live_wordcount'] = False
 
     def _live_wc_on(self, event=None):
-        self.bind('<KeyRelease>', self.show_wordcount)
+        self.bind('<KeyRelease>', self._wcScheduler.request)
         self._wcMenu.entryconfig(_('Enable live update'), state='disabled')
         self._wcMenu.entryconfig(_('Disable live update'), state='normal')
         self.show_wordcount()
-        SceneEditor.liveWordCount = True
+        self._plugin.kwargs['live_wordcount'] = True
 
     def _load_next(self, event=None):
         """Load the next scene in the tree."""
         self._apply_changes_after_asking()
-        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self._scId}'
+        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self.scId}'
         nextNode = self._ui.tv.next_node(thisNode, '')
-        if nextNode:
+        if nextNode and self._plugin.get_chapter_editor(nextNode[2:]) is not None:
+            self.show_status(_('The scene is open in a chapter editor.'))
+        elif nextNode:
             self._ui.tv.go_to_node(nextNode)
+            self._keep_history()
+            self._close_journal()
             scId = nextNode[2:]
-            self._scId = scId
+            self.scId = scId
             self._scene = self._ui.novel.scenes[scId]
             self._sceneEditor.clear()
             self._load_scene()
@@ -251,12 +426,16 @@ class SceneEditor(tk.Toplevel):
     def _load_prev(self, event=None):
         """Load the previous scene in the tree."""
         self._apply_changes_after_asking()
-        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self._scId}'
+        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self.scId}'
         prevNode = self._ui.tv.prev_node(thisNode, '')
-        if prevNode:
+        if prevNode and self._plugin.get_chapter_editor(prevNode[2:]) is not None:
+            self.show_status(_('The scene is open in a chapter editor.'))
+        elif prevNode:
             self._ui.tv.go_to_node(prevNode)
+            self._keep_history()
+            self._close_journal()
             scId = prevNode[2:]
-            self._scId = scId
+            self.scId = scId
             self._scene = self._ui.novel.scenes[scId]
             self._sceneEditor.clear()
             self._load_scene()
@@ -264,70 +443,159 @@ class SceneEditor(tk.Toplevel):
 
     def _load_scene(self):
         """Load the scene content into the text editor."""
-        self.title(f'{self._scene.title} - {self._ui.novel.title}, {_("Scene")} ID {self._scId}')
-        if self._scene.sceneContent:
-            self._sceneEditor.set_text(self._scene.sceneContent)
-        self._initialWc = self._sceneEditor.count_words()
+        from tkinter import messagebox
+        self.title(f'{self._scene.title} - {self._ui.novel.title}, {_("Scene")} ID {self.scId}')
+        wordCounter = self._plugin.sceneCache.get(self.scId)
+        if wordCounter is None:
+            self._initialWc = self._plugin.wordCountIndex.get_counts(self.scId)[0]
+        else:
+            self._initialWc = wordCounter.total
+
+        # Recover the changes logged before a crash.
+        journalPath = get_journal_path(self._plugin.journalDir, self._ui.prjFile.filePath, self.scId)
+        recoveredText = recover(journalPath)
+        if recoveredText is not None:
+            recoveredText = recoveredText.strip(' \n')
+            if recoveredText != (self._scene.sceneContent or '').strip(' \n'):
+                if messagebox.askyesno(APPLICATION, f'{_("Recover unsaved changes of scene")} "{self._scene.title}"?', parent=self):
+                    self._transfer_text(recoveredText)
+                    wordCounter = None
+        history = None
+        entry = self._histories.pop(self.scId, None)
+        if entry is not None and entry[0] == hash(self._scene.sceneContent or ''):
+            history = entry[1]
+        self._sceneEditor.set_text(self._scene.sceneContent or '', wordCounter, history)
+        self._open_journal()
+        self._plugin.wordCountIndex.refresh()
         self.show_wordcount()
+        if self._prefetchJob is None:
+            self._prefetchJob = self.after_idle(self._prefetch_neighbours)
+
+    def _open_journal(self):
+        """Start logging the modifications of the scene content."""
+        self._sceneEditor.journal = SceneJournal(self,
+                                                 get_journal_path(self._plugin.journalDir, self._ui.prjFile.filePath, self.scId),
+                                                 self._scene.sceneContent or '',
+                                                 self._plugin.kwargs['journal_interval'],
+                                                 )
+
+    def _open_help(self):
+        import webbrowser
+        webbrowser.open(HELP_URL)
+
+    def _prefetch_neighbours(self):
+        """Prepare the previous and the next scene for loading."""
+        self._prefetchJob = None
+        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self.scId}'
+        scIds = []
+        for node in (self._ui.tv.next_node(thisNode, ''), self._ui.tv.prev_node(thisNode, '')):
+            if node:
+                scIds.append(node[2:])
+        self._plugin.sceneCache.prefetch(scIds)
+
+    @staticmethod
+    def _route_key(event, handler):
+        """Call the key handler with the open editor window the event's widget belongs to, if any."""
+        if not isinstance(event.widget, tk.Misc):
+            return
 
-    def _set_editor_colors(self):
-        self._sceneEditor['fg'] = COLOR_MODES[SceneEditor.colorMode][1]
-        self._sceneEditor['bg'] = COLOR_MODES[SceneEditor.colorMode][2]
-        self._sceneEditor['insertbackground'] = COLOR_MODES[SceneEditor.colorMode][1]
+        editor = event.widget.winfo_toplevel()
+        if isinstance(editor, SceneEditor) and editor.isOpen:
+            return handler(editor, event)
 
     def _set_view_mode(self, event=None, mode=0):
-        SceneEditor.colorMode = mode
-        self._set_editor_colors()
+        """Switch all editor windows to another color mode."""
+        self._plugin.style.set_color_mode(mode)
 
     def _split_scene(self, event=None):
-        """Split a scene at the cursor position."""
+        """Split the scene at the cursor position and at the split marks.
+        
+        The first part stays in the scene, each further part is moved into a new scene.
+        Each part is read from the editor box once, and distributed by a SceneBatch. The editor box is not reloaded:
+        the text around the second part is deleted, so the first new scene remains for editing.
+        """
+        from tkinter import messagebox
         if self._ui.isLocked:
             messagebox.showinfo(APPLICATION, _('Cannot split the scene, because the project is locked.'), parent=self)
             self.lift()
             return
 
-        if not messagebox.askyesno(APPLICATION, f'{_("Move the text from the cursor position to the end into a new scene")}?', parent=self):
+        positions = self._sceneEditor.get_split_positions()
+        if not positions:
+            return
+
+        if len(positions) == 1:
+            question = f'{_("Move the text from the cursor position to the end into a new scene")}?'
+        else:
+            question = f'{_("Split the scene at the cursor position and at the split marks into")} {len(positions) + 1} {_("scenes")}?'
+        if not messagebox.askyesno(APPLICATION, question, parent=self):
             self.lift()
             return
 
         self.lift()
-        # Add a new scene.
-        thisNode = f'{self._ui.tv.SCENE_PREFIX}{self._scId}'
-        newId = self._ui.tv.add_scene(selection=thisNode,
-                                      appendToPrev=True,
-                                      scType=self._ui.novel.scenes[self._scId].scType,
-                                      status=self._ui.novel.scenes[self._scId].status
-                                      )
-        if newId:
-            # Cut the actual scene's content from the cursor position to the end.
-            newContent = self._sceneEditor.get_text('insert', 'end').strip(' \n')
-            self._sceneEditor.delete('insert', 'end')
-            self._apply_changes()
+        bounds = ['1.0'] + positions + ['end-1c']
+        parts = [self._sceneEditor.get(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
 
-            # Copy the scene content to the new scene.
-            self._ui.novel.scenes[newId].sceneContent = newContent
+        # Add the new scenes, and distribute the text.
+        batch = SceneBatch(self._ui, self._plugin.searchIndex)
+        newIds = batch.insert_parts(self.scId, parts)
+        if not newIds:
+            return
 
-            # Copy the viewpoint character.
-            if self._ui.novel.scenes[self._scId].characters:
-                viewpoint = self._ui.novel.scenes[self._scId].characters[0]
-                self._ui.novel.scenes[newId].characters = [viewpoint]
+        batch.commit()
 
-            # Go to the new scene.
-            self._load_next()
+        # Keep the first new scene's text in the editor box.
+        self._close_journal()
+        if len(newIds) > 1:
+            self._sceneEditor.delete(positions[1], 'end')
+            sceneText = parts[1]
+        else:
+            # If not all scenes could be added, the last one takes the rest.
+            sceneText = ''.join(parts[1:])
+        self._sceneEditor.delete('1.0', positions[0])
+        leading = len(sceneText) - len(sceneText.lstrip(' \n'))
+        trailing = len(sceneText) - len(sceneText.rstrip(' \n'))
+        if leading == len(sceneText):
+            self._sceneEditor.delete('1.0', 'end')
+        else:
+            if trailing:
+                self._sceneEditor.delete(f'end-{trailing + 1}c', 'end')
+            if leading:
+                self._sceneEditor.delete('1.0', f'1.0+{leading}c')
+        self._sceneEditor.clear_split_marks()
+        self._sceneEditor.edit_reset()
+        self._sceneEditor.edit_modified(False)
+        self._sceneEditor.mark_set('insert', '1.0')
+
+        # Continue with the first new scene.
+        self.scId = newIds[0]
+        self._scene = self._ui.novel.scenes[self.scId]
+        self._ui.tv.go_to_node(f'{self._ui.tv.SCENE_PREFIX}{self.scId}')
+        self.title(f'{self._scene.title} - {self._ui.novel.title}, {_("Scene")} ID {self.scId}')
+        self._initialWc = self._sceneEditor.count_words()
+        if self._initialWc is None:
+            self._initialWc = self._plugin.wordCountIndex.get_counts(self.scId)[0]
+        self._open_journal()
+        self._ui.show_status()
+        self.show_wordcount()
 
     def _transfer_text(self, sceneText):
         """Transfer the changed editor content to the scene, if possible.
         
-        On success, set the user interface's change flag. 
+        On success, refresh the user interface. 
         """
+        from tkinter import messagebox
         if self._ui.isLocked:
             if messagebox.askyesno(APPLICATION, _('Cannot apply scene changes, because the project is locked.\nUnlock and apply changes?'), parent=self):
                 self._ui.unlock()
-                self._scene.sceneContent = sceneText
-                self._ui.isModified = True
+                self.commit(sceneText)
             self.lift()
         else:
-            self._scene.sceneContent = sceneText
-            self._ui.isModified = True
+            self.commit(sceneText)
         self._ui.show_status()
 
+    def _update_wordcount(self, event=None):
+        """Calculate the totals again and display the word count on the status bar."""
+        self._plugin.wordCountIndex.refresh()
+        self.show_wordcount()
+
@@ -0,0 +1,219 @@
+"""Provide a crash recovery journal for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import json
+from hashlib import sha1
+
+
+def get_journal_path(journalDir, projectPath, scId):
+    """Return the path of a scene's journal file.
+
+    Positional arguments:
+        journalDir -- str: directory of the journal files.
+        projectPath -- str: path of the project file.
+        scId -- str: scene ID.
+
+    Scene IDs are unique only within a project, so the file name is qualified by the project path.
+    """
+    return f'{journalDir}/{_get_project_key(projectPath)}_{scId}.jsonl'
+
+
+def discard_orphaned(journalDir, projectPath, scIds):
+    """Delete the journal files of a project's scenes that no longer exist.
+
+    Positional arguments:
+        journalDir -- str: directory of the journal files.
+        projectPath -- str: path of the project file.
+        scIds -- collection of the project's scene IDs.
+
+    Otherwise, a new scene with the ID of a deleted one would be offered the deleted scene's changes.
+    """
+    prefix = f'{_get_project_key(projectPath)}_'
+    try:
+        fileNames = os.listdir(journalDir)
+    except OSError:
+        return
+
+    for fileName in fileNames:
+        if fileName.startswith(prefix) and fileName.endswith('.jsonl'):
+            if fileName[len(prefix):-len('.jsonl')] not in scIds:
+                try:
+                    os.remove(f'{journalDir}/{fileName}')
+                except OSError:
+                    pass
+
+
+def recover(filePath):
+    """Return the text reconstructed from a journal file, or None if there is no journal.
+
+    Positional arguments:
+        filePath -- str: path of the journal file.
+
+    The records are replayed on the snapshot they begin with.
+    A record torn by a crash ends the replay.
+    Indices are resolved like in the tkinter Text widget,
+    where the text always ends with a line break.
+    """
+    try:
+        with open(filePath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    text = None
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+
+        if record[0] == 's':
+            text = f'{record[1]}\n'
+        elif text is None:
+            break
+
+        elif record[0] == 'i':
+            pos = _get_offset(text, record[1])
+            text = f'{text[:pos]}{record[2]}{text[pos:]}'
+        elif record[0] == 'd':
+            first = _get_offset(text, record[1])
+            last = _get_offset(text, record[2])
+            if last > first:
+                text = f'{text[:first]}{text[last:]}'
+    if text is None:
+        return None
+
+    return text[:-1]
+
+
+def _get_project_key(projectPath):
+    """Return a file name prefix identifying the project."""
+    return sha1(projectPath.encode('utf-8')).hexdigest()[:16]
+
+
+def _get_offset(text, index):
+    """Return the string offset of a "line.column" index; never point behind the final line break."""
+    line, column = index.split('.')
+    lineStart = 0
+    for __ in range(int(line) - 1):
+        lineStart = text.find('\n', lineStart) + 1
+        if lineStart == 0:
+            return len(text) - 1
+
+    lineEnd = text.find('\n', lineStart)
+    if lineEnd < 0:
+        return len(text) - 1
+
+    return min(lineStart + int(column), lineEnd)
+
+
+class SceneJournal:
+    """Append-only log of a scene's text modifications for crash recovery.
+
+    Public methods:
+        insert(index, text) -- Log an insertion.
+        delete(first, last) -- Log a deletion.
+        compact(text) -- Replace the log with a snapshot of the text.
+        flush() -- Write the pending records to disk.
+        discard() -- Delete the journal file.
+
+    The log begins with a snapshot of the base text, followed by the modifications
+    with resolved "line.column" indices, one JSON array per line.
+    Nothing is written until the first modification.
+    Records are collected and written with a single fsync at most every
+    interval milliseconds, so the cost depends on the typing, not on the scene size.
+    """
+
+    def __init__(self, widget, filePath, baseText, interval):
+        """Prepare the journal; do not create the file yet.
+
+        Positional arguments:
+            widget -- tkinter widget providing the after() methods.
+            filePath -- str: path of the journal file.
+            baseText -- str: text the modifications refer to.
+            interval -- int: milliseconds between writing to disk.
+        """
+        self._widget = widget
+        self._filePath = filePath
+        self._interval = interval
+        self._records = [['s', baseText]]
+        self._file = None
+        self._flushJob = None
+
+    def insert(self, index, text):
+        """Log an insertion.
+
+        Positional arguments:
+            index -- str: resolved "line.column" index.
+            text -- str: inserted text.
+        """
+        self._append(['i', index, text])
+
+    def delete(self, first, last):
+        """Log a deletion.
+
+        Positional arguments:
+            first -- str: resolved "line.column" index of the first character deleted.
+            last -- str: resolved "line.column" index after the last character deleted.
+        """
+        self._append(['d', first, last])
+
+    def compact(self, text):
+        """Replace the log with a snapshot of the text.
+
+        Positional arguments:
+            text -- str: current content of the editor box, without the final line break.
+        """
+        self._close()
+        self._records = [['s', text]]
+        self.flush()
+
+    def flush(self):
+        """Write the pending records to disk."""
+        if self._flushJob is not None:
+            self._widget.after_cancel(self._flushJob)
+            self._flushJob = None
+        if not self._records:
+            return
+
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self._filePath), exist_ok=True)
+                self._file = open(self._filePath, 'w', encoding='utf-8')
+            self._file.write(''.join(f'{json.dumps(record)}\n' for record in self._records))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            # Crash recovery is not available, but editing must go on.
+            pass
+        self._records = []
+
+    def discard(self):
+        """Delete the journal file."""
+        self._close()
+        self._records = []
+        try:
+            os.remove(self._filePath)
+        except OSError:
+            pass
+
+    def _append(self, record):
+        self._records.append(record)
+        if self._flushJob is None:
+            self._flushJob = self._widget.after(self._interval, self._run)
+
+    def _close(self):
+        if self._flushJob is not None:
+            self._widget.after_cancel(self._flushJob)
+            self._flushJob = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        self._flushJob = None
+        self.flush()
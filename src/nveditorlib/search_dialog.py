@@ -0,0 +1,255 @@
+"""Provide a project-wide find and replace dialog for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+from time import perf_counter
+import tkinter as tk
+from tkinter import ttk
+from nveditorlib.nv_editor_globals import *
+from nveditorlib.scene_batch import SceneBatch
+from nveditorlib.search_index import get_unpaired_tags
+
+
+class SearchDialog(tk.Toplevel):
+    """A window for finding and replacing text in all scenes of the project.
+
+    Public instance methods:
+        close() -- Stop searching and close the window.
+
+    Public instance variables:
+        isOpen -- bool: True, if the window is open.
+
+    The matches are listed as they are found, without blocking the user interface.
+    Double-clicking a match opens the scene in an editor window and selects the match.
+    """
+    _TIME_SLICE = 0.02
+    # Seconds spent searching before the user interface is updated.
+    _CONTEXT = 30
+    # Number of characters displayed before and after a match.
+
+    def __init__(self, plugin, ui, icon=None):
+        self._ui = ui
+        self._plugin = plugin
+        super().__init__()
+        self.title(f'{_("Find and replace")} - {self._ui.novel.title}')
+        if icon:
+            self.iconphoto(False, icon)
+
+        # Add the input fields and options.
+        frame = ttk.Frame(self, padding=5)
+        frame.pack(fill='x')
+        frame.columnconfigure(1, weight=1)
+        ttk.Label(frame, text=_('Find')).grid(row=0, column=0, sticky='w')
+        self._pattern = tk.StringVar()
+        self._patternEntry = ttk.Entry(frame, textvariable=self._pattern)
+        self._patternEntry.grid(row=0, column=1, sticky='ew')
+        ttk.Button(frame, text=_('Find'), command=self._start_search).grid(row=0, column=2, sticky='ew')
+        ttk.Label(frame, text=_('Replace')).grid(row=1, column=0, sticky='w')
+        self._replacement = tk.StringVar()
+        ttk.Entry(frame, textvariable=self._replacement).grid(row=1, column=1, sticky='ew')
+        ttk.Button(frame, text=_('Replace all'), command=self._replace_all).grid(row=1, column=2, sticky='ew')
+        options = ttk.Frame(frame)
+        options.grid(row=2, column=1, sticky='w')
+        self._regex = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options, text=_('Regular expression'), variable=self._regex).pack(side='left')
+        self._ignoreMarkup = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options, text=_('Ignore markup'), variable=self._ignoreMarkup).pack(side='left')
+        self._matchCase = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options, text=_('Match case'), variable=self._matchCase).pack(side='left')
+
+        # Add the list of matches.
+        self._resultList = tk.Listbox(self, width=80, height=20)
+        self._resultList.pack(expand=True, fill='both')
+
+        # Add a status bar and a button.
+        self._statusBar = tk.Label(self, text='', anchor='w', padx=5, pady=2)
+        self._statusBar.pack(expand=False, side='left')
+        ttk.Button(self, text=_('Close'), command=self.close).pack(side='right')
+
+        # Event bindings.
+        self._patternEntry.bind('<Return>', self._start_search)
+        self._resultList.bind('<Double-1>', self._show_match)
+        self._resultList.bind('<Return>', self._show_match)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self._matches = []
+        # (scene ID, start, end, searched scene content) tuples of the listed matches
+        self._search = None
+        self._searchJob = None
+        self._patternEntry.focus()
+        self.isOpen = True
+
+    def close(self):
+        """Stop searching and close the window."""
+        self._stop_search()
+        self.destroy()
+        self.isOpen = False
+
+    def _find(self):
+        """Return a generator of the matches, or None if the regular expression is invalid."""
+        from tkinter import messagebox
+        search = self._plugin.searchIndex.find(self._pattern.get(),
+                                               regex=self._regex.get(),
+                                               ignoreMarkup=self._ignoreMarkup.get(),
+                                               matchCase=self._matchCase.get(),
+                                               )
+        try:
+            # Compile the pattern by starting the generator.
+            first = next(search)
+        except StopIteration:
+            return iter(())
+
+        except re.error as ex:
+            messagebox.showerror(APPLICATION, f'{_("Invalid regular expression")}: {ex}', parent=self)
+            return None
+
+        def matches():
+            yield first
+            yield from search
+
+        return matches()
+
+    def _replace_all(self, event=None):
+        """Replace all matches in the project. Ask first."""
+        from tkinter import messagebox
+        self._stop_search()
+
+        # The editor windows must not keep changes the replacements would conflict with.
+        self._plugin.apply_changes()
+        blocked = set()
+        for editor in self._plugin.sceneEditors:
+            if editor.isOpen and editor.get_changed_text() is not None:
+                blocked.add(editor.scId)
+        for editor in self._plugin.chapterEditors:
+            if editor.isOpen:
+                blocked.update(editor.scIds)
+
+        search = self._find()
+        if search is None:
+            return
+
+        regex = self._regex.get()
+        ignoreMarkup = self._ignoreMarkup.get()
+        replacement = self._replacement.get()
+        changes = {}
+        # key: scene ID, value: list of (start, end, replacement) tuples
+        texts = {}
+        # key: scene ID, value: searched scene content
+        for scId, start, end, match, text in search:
+            if scId in blocked:
+                continue
+
+            if regex:
+                try:
+                    newText = match.expand(replacement)
+                except (re.error, IndexError) as ex:
+                    messagebox.showerror(APPLICATION, f'{_("Invalid regular expression")}: {ex}', parent=self)
+                    return
+
+            else:
+                newText = replacement
+            changes.setdefault(scId, []).append((start, end, newText))
+            texts[scId] = text
+        if not changes:
+            self._statusBar.config(text=f'0 {_("matches")}')
+            return
+
+        count = sum(len(replacements) for replacements in changes.values())
+        if not messagebox.askyesno(APPLICATION, f'{_("Replace all matches?")} ({count})', parent=self):
+            self.lift()
+            return
+
+        if self._ui.isLocked:
+            if not messagebox.askyesno(APPLICATION, _('Cannot apply scene changes, because the project is locked.\nUnlock and apply changes?'), parent=self):
+                self.lift()
+                return
+
+            self._ui.unlock()
+        batch = SceneBatch(self._ui, self._plugin.searchIndex)
+        for scId, replacements in changes.items():
+            text = batch.get_text(scId)
+            if text != texts[scId]:
+                # The scene has changed while asking, so the offsets are invalid.
+                count -= len(replacements)
+                blocked.add(scId)
+                continue
+
+            parts = []
+            pos = 0
+            for start, end, newText in replacements:
+                parts.append(text[pos:start])
+                if ignoreMarkup:
+                    # Keep the tags whose partners are outside the match.
+                    openings, closings = get_unpaired_tags(text[start:end])
+                    newText = f'{openings}{newText}{closings}'
+                parts.append(newText)
+                pos = end
+            parts.append(text[pos:])
+            batch.set_text(scId, ''.join(parts))
+        changed = set(batch.commit())
+        for editor in self._plugin.sceneEditors:
+            if editor.isOpen and editor.scId in changed:
+                editor.reload()
+        self._ui.show_status()
+        self._resultList.delete(0, 'end')
+        self._matches = []
+        message = f'{count} {_("replacements")}'
+        if blocked:
+            message = f'{message} | {_("Scenes with unapplied changes are skipped")}'
+        self._statusBar.config(text=message)
+        self.lift()
+
+    def _search_step(self):
+        """List the matches found within a time slice; schedule the next step."""
+        self._searchJob = None
+        stopTime = perf_counter() + self._TIME_SLICE
+        for scId, start, end, __, text in self._search:
+            before = text[max(0, start - self._CONTEXT):start].replace('\n', ' ')
+            after = text[end:end + self._CONTEXT].replace('\n', ' ')
+            self._resultList.insert('end', f'{self._ui.novel.scenes[scId].title}: ...{before}{text[start:end]}{after}...')
+            self._matches.append((scId, start, end, text))
+            if perf_counter() > stopTime:
+                self._statusBar.config(text=f'{_("Searching ...")} {len(self._matches)} {_("matches")}')
+                self._searchJob = self.after(1, self._search_step)
+                return
+
+        self._search = None
+        self._statusBar.config(text=f'{len(self._matches)} {_("matches")}')
+
+    def _show_match(self, event=None):
+        """Open the scene of the selected match in an editor window, and select the match."""
+        selection = self._resultList.curselection()
+        if not selection:
+            return
+
+        scId, start, end, text = self._matches[selection[0]]
+        if self._ui.novel.scenes[scId].sceneContent != text:
+            # The scene has changed since it was searched, so its matches are invalid.
+            for i in range(len(self._matches) - 1, -1, -1):
+                if self._matches[i][0] == scId:
+                    del self._matches[i]
+                    self._resultList.delete(i)
+            self._statusBar.config(text=_('The scene has changed. Please search again.'))
+            return
+
+        editor = self._plugin.open_scene(scId)
+        if editor is not None:
+            editor.select_text(start, end)
+
+    def _start_search(self, event=None):
+        """Clear the list of matches and start searching."""
+        self._stop_search()
+        self._resultList.delete(0, 'end')
+        self._matches = []
+        self._search = self._find()
+        if self._search is not None:
+            self._search_step()
+
+    def _stop_search(self):
+        if self._searchJob is not None:
+            self.after_cancel(self._searchJob)
+            self._searchJob = None
+        self._search = None
@@ -0,0 +1,200 @@
+"""Provide a project-wide search index for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+from bisect import bisect_left
+from bisect import bisect_right
+
+FORMAT_TAGS = re.compile(r'\[\/?[ib]\]')
+# Italic and bold markup, ignored by markup-aware searching.
+
+
+def strip_format_tags(text):
+    """Return the text without italic and bold markup, and a map of the removed tags.
+
+    Positional arguments:
+        text -- str: text with markup.
+
+    The map is a tuple of two lists: the tags' positions in the stripped text,
+    and the number of characters removed up to and including each tag.
+    """
+    parts = []
+    positions = []
+    offsets = []
+    removed = 0
+    pos = 0
+    for match in FORMAT_TAGS.finditer(text):
+        parts.append(text[pos:match.start()])
+        removed += match.end() - match.start()
+        positions.append(match.end() - removed)
+        offsets.append(removed)
+        pos = match.end()
+    if not positions:
+        return text, None
+
+    parts.append(text[pos:])
+    return ''.join(parts), (positions, offsets)
+
+
+def get_unpaired_tags(text):
+    """Return the opening tags and the closing tags of a passage that have no partner within it.
+
+    Positional arguments:
+        text -- str: passage with markup.
+
+    The tags are returned as two strings in order of appearance.
+    Replacing the passage by opening tags, new text, and closing tags keeps the surrounding markup balanced.
+    """
+    openings = []
+    closings = []
+    for match in FORMAT_TAGS.finditer(text):
+        tag = match.group()
+        if not tag.startswith('[/'):
+            openings.append(tag)
+            continue
+
+        opening = tag.replace('/', '')
+        for i in range(len(openings) - 1, -1, -1):
+            if openings[i] == opening:
+                del openings[i]
+                break
+        else:
+            closings.append(tag)
+    return ''.join(openings), ''.join(closings)
+
+
+class SearchIndex:
+    """Trigram index of the scene contents, shared by all editor windows.
+
+    Public methods:
+        find(pattern, regex=False, ignoreMarkup=False, matchCase=False) -- Generate the matches in project order.
+        update(scId) -- Re-index a scene whose content has changed.
+        reset() -- Clear the index.
+
+    For each scene, the case folded trigrams of the content without markup
+    are hashed into a fixed size bit array. Scenes lacking any trigram of a
+    search string are skipped without being scanned.
+    The index is built lazily on first search. Scenes are re-indexed
+    when written by the editor, or when their content's hash value has changed.
+    """
+    _SIGNATURE_BITS = 1 << 15
+    # Size of a scene's trigram bit array.
+
+    def __init__(self, ui):
+        """Initialize an empty index.
+
+        Positional arguments:
+            ui -- reference to the NovelystTk instance of the application.
+        """
+        self._ui = ui
+        self._signatures = {}
+        # key: scene ID, value: (content hash, trigram bit array)
+
+    def find(self, pattern, regex=False, ignoreMarkup=False, matchCase=False):
+        """Generate the matches in project order.
+
+        Positional arguments:
+            pattern -- str: search string or regular expression.
+
+        Optional arguments:
+            regex -- bool: if True, pattern is a regular expression.
+            ignoreMarkup -- bool: if True, italic and bold markup in the scenes is skipped.
+            matchCase -- bool: if False, the search is case insensitive.
+
+        Generate (scene ID, start, end, match, text) tuples. Text is the scene content searched;
+        start and end are offsets in it. The match object refers to the scene content, or to the content without markup.
+        The scenes may change while the generator is suspended, so the matches must be resolved against text.
+        Unused scenes are not searched.
+        Raise re.error, if the regular expression is invalid.
+        """
+        if matchCase:
+            flags = 0
+        else:
+            flags = re.IGNORECASE
+        trigrams = None
+        if regex:
+            expression = re.compile(pattern, flags | re.MULTILINE)
+        else:
+            if ignoreMarkup:
+                pattern = FORMAT_TAGS.sub('', pattern)
+            expression = re.compile(re.escape(pattern), flags)
+            if ignoreMarkup or not ('[' in pattern or ']' in pattern):
+                # A search string with markup may match partial tags, which are not indexed.
+                trigrams = self._get_hashes(pattern)
+        if not pattern:
+            return
+
+        novel = self._ui.novel
+        for chId in novel.srtChapters:
+            for scId in novel.chapters[chId].srtScenes:
+                scene = novel.scenes[scId]
+                text = scene.sceneContent
+                if not text or scene.doNotExport:
+                    continue
+
+                if trigrams and not self._may_contain(scId, text, trigrams):
+                    continue
+
+                if not ignoreMarkup:
+                    for match in expression.finditer(text):
+                        yield scId, match.start(), match.end(), match, text
+                    continue
+
+                strippedText, tagMap = strip_format_tags(text)
+                for match in expression.finditer(strippedText):
+                    start, end = match.span()
+                    if tagMap is not None:
+                        positions, offsets = tagMap
+                        i = bisect_right(positions, start)
+                        if i:
+                            start += offsets[i - 1]
+                        i = bisect_left(positions, end)
+                        if i:
+                            end += offsets[i - 1]
+                    yield scId, start, end, match, text
+
+    def update(self, scId):
+        """Re-index a scene whose content has changed.
+
+        Positional arguments:
+            scId -- str: scene ID.
+
+        Before the first search, there is nothing to update.
+        """
+        if scId in self._signatures:
+            text = self._ui.novel.scenes[scId].sceneContent or ''
+            self._signatures[scId] = (hash(text), self._get_signature(text))
+
+    def reset(self):
+        """Clear the index, e.g. when the project is closed."""
+        self._signatures.clear()
+
+    def _get_hashes(self, text):
+        """Return the set of the bit positions of the case folded trigrams in a text without markup."""
+        text = FORMAT_TAGS.sub('', text).casefold()
+        return {hash(text[i:i + 3]) % self._SIGNATURE_BITS for i in range(len(text) - 2)}
+
+    def _get_signature(self, text):
+        """Return a bit array with the bits of the text's trigrams set."""
+        signature = bytearray(self._SIGNATURE_BITS >> 3)
+        for bit in self._get_hashes(text):
+            signature[bit >> 3] |= 1 << (bit & 7)
+        return signature
+
+    def _may_contain(self, scId, text, trigrams):
+        """Return False if the scene lacks any of the trigrams; (re-)index the scene, if necessary."""
+        contentHash = hash(text)
+        # str objects cache their hash value, so this is cheap for unchanged scenes
+        entry = self._signatures.get(scId, None)
+        if entry is None or entry[0] != contentHash:
+            entry = (contentHash, self._get_signature(text))
+            self._signatures[scId] = entry
+        signature = entry[1]
+        for bit in trigrams:
+            if not signature[bit >> 3] & (1 << (bit & 7)):
+                return False
+
+        return True
@@ -0,0 +1,103 @@
+"""Provide functions for migrating and validating the novelyst editor plugin settings.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+
+RANGES = dict(
+        color_mode=(0, 2),
+        font_size=(1, 200),
+        line_spacing=(0, 200),
+        paragraph_spacing=(0, 200),
+        margin_x=(0, 1000),
+        margin_y=(0, 1000),
+        live_wordcount_delay=(0, 60000),
+        live_wordcount_max_delay=(0, 60000),
+        journal_interval=(100, 3600000),
+        editor_pool_size=(0, 100),
+        statistics_processes=(0, 1024),
+        undo_budget=(0, None),
+        settings_version=(0, None),
+        )
+# Minimum and maximum values of the integer settings; None means no limit.
+
+CHOICES = dict(
+        undo_grouping=('word', 'sentence'),
+        )
+# Allowed values of the string settings.
+
+PATTERNS = dict(
+        window_geometry=re.compile(r'\d+x\d+(?:[+-]-?\d+[+-]-?\d+)?'),
+        )
+# Regular expressions the values of the string settings must match.
+
+SETTINGS_VERSION = 1
+# Version of the settings; it is saved with the settings, so each migration is done only once.
+
+OBSOLETE_DEFAULTS = dict(
+        color_fg_bright='white',
+        color_bg_bright='black',
+        color_fg_light='antique white',
+        color_bg_light='black',
+        )
+# Default colors of the unversioned settings, which did not take effect; they are replaced with the current defaults.
+
+
+def migrate_settings(values):
+    """Return a dictionary of the settings, updated to the current version.
+
+    Positional arguments:
+        values -- dictionary of the settings read from the configuration file.
+
+    Settings without version number keep the former default colors; these are removed,
+    so the current defaults apply. Colors chosen after the migration are kept.
+    """
+    settings = dict(values)
+    try:
+        version = int(settings.get('settings_version', 0))
+    except (TypeError, ValueError):
+        version = 0
+    if version < 1:
+        for key, value in OBSOLETE_DEFAULTS.items():
+            if str(settings.get(key, '')).strip() == value:
+                del settings[key]
+    settings['settings_version'] = SETTINGS_VERSION
+    return settings
+
+
+def validate_settings(values, defaults):
+    """Return a dictionary of the settings, converted to the types of their defaults.
+
+    Positional arguments:
+        values -- dictionary of the settings read from the configuration file.
+        defaults -- dictionary of the default settings.
+
+    Missing and invalid settings, e.g. numbers out of range, are replaced with their defaults.
+    """
+    settings = {}
+    for key, default in defaults.items():
+        value = values.get(key, default)
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, int):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                valid = False
+            else:
+                minimum, maximum = RANGES.get(key, (None, None))
+                valid = (minimum is None or value >= minimum) and (maximum is None or value <= maximum)
+        else:
+            value = str(value).strip()
+            valid = bool(value)
+            if valid and key in CHOICES:
+                valid = value in CHOICES[key]
+            if valid and key in PATTERNS:
+                valid = PATTERNS[key].fullmatch(value) is not None
+        if valid:
+            settings[key] = value
+        else:
+            settings[key] = default
+    return settings
@@ -4,19 +4,15 @@ Copyright (c) 2023 Peter Triesberger
 For further information see https://github.com/peter88213/novelyst_editor
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
-import re
+import queue
+from threading import Thread
 import tkinter as tk
 from tkinter import ttk
-
-#--- Regular expressions for counting words and characters like in LibreOffice.
-# See: https://help.libreoffice.org/latest/en-GB/text/swriter/guide/words_count.html
-
-ADDITIONAL_WORD_LIMITS = re.compile('--|—|–')
-# this is to be replaced by spaces, thus making dashes and dash replacements word limits
-
-NO_WORD_LIMITS = re.compile('\[.+?\]|\/\*.+?\*\/|-|^\>', re.MULTILINE)
-# this is to be replaced by empty strings, thus excluding markup and comments from
-# word counting, and making hyphens join words
+from nveditorlib.word_counter import WordCounter
+from nveditorlib.markup_highlighter import MarkupHighlighter
+from nveditorlib.undo_history import UndoHistory
+from nveditorlib.undo_history import get_end_index
+from nveditorlib.text_editing import toggle_format
 
 
 class TextBox(tk.Text):
@@ -24,25 +20,53 @@ class TextBox(tk.Text):
     
     Public methods:
     get_text -- Return the whole text from the editor box.
-    set_text(text) -- Put text into the editor box and clear the undo/redo stack.
+    set_text(text) -- Put text into the editor box; replace the undo history, and clear the modified flag.
+    get_history -- Return the undo history, or None.
+    select_text(start, end) -- Select a range of characters and scroll it into view.
     count_words -- Return the word count.
+    set_markup_colors(markupColor, commentColor) -- Set the colors of highlighted markup and comments.
     italic -- Make the selection italic, or begin with italic input.
     bold -- Make the selection bold, or begin with bold input.
     plain -- Remove formatting from the selection.
+    toggle_split_mark -- Mark the cursor position for splitting, or remove the mark.
+    get_split_positions -- Return the sorted indices of the cursor and the split marks.
+    clear_split_marks -- Remove all split marks.
+    
+    Public instance variables:
+    journal -- SceneJournal instance logging the modifications, or None.
+    
+    Undo and redo are managed by an UndoHistory instance instead of the Tk undo stack.
+    It is enabled by the "undo" option; the "undoBudget" and "undoGrouping" options
+    are passed to the UndoHistory constructor.
     """
-    _YW_TAGS = ('i', 'b')
-    # Supported tags.
+    _BACKGROUND_COUNT_MIN = 100000
+    # Modifications with at least this number of characters are counted in a worker thread.
+
+    _POLL_INTERVAL = 50
+    # Milliseconds between checking for the worker thread's result.
+
+    _LOAD_CHUNK_SIZE = 20000
+    # Number of characters inserted at a time when loading a text.
+
+    _SPLIT_TAG = 'split'
+    # Text tag highlighting the character at a split mark.
 
     def __init__(self, master=None, **kw):
         """Copied from tkinter.scrolledtext and modified (use ttk widgets).
         
         Extends the supeclass constructor.
         """
+        self._undoBudget = kw.pop('undoBudget', 1000000)
+        self._undoGrouping = kw.pop('undoGrouping', 'word')
+        self._undoEnabled = kw.pop('undo', False)
+        kw.pop('autoseparators', None)
+        kw.pop('maxundo', None)
+        kw['undo'] = False
         self.frame = ttk.Frame(master)
         self.vbar = ttk.Scrollbar(self.frame)
         self.vbar.pack(side='right', fill='y')
 
-        kw.update({'yscrollcommand': self.vbar.set})
+        kw.update({'yscrollcommand': self._on_scroll})
         tk.Text.__init__(self, self.frame, **kw)
         self.pack(side='left', fill='both', expand=True)
         self.vbar['command'] = self.yview
@@ -57,23 +81,122 @@ class TextBox(tk.Text):
             if m[0] != '_' and m != 'config' and m != 'configure':
                 setattr(self, m, getattr(self.frame, m))
 
+        self._wordCounter = WordCounter()
+        self._wcQueue = queue.Queue()
+        self._wcGeneration = 0
+        self._wcPending = False
+        self._wcPollJob = None
+
+        self._loadText = None
+        self._loadCounter = None
+        self._loadPos = 0
+        self._loadJob = None
+        self._loading = False
+        self.journal = None
+        self._history = None
+        self._applyingHistory = False
+        if self._undoEnabled:
+            self._history = UndoHistory(self._undoBudget, self._undoGrouping)
+        self._splitMarks = []
+        self._splitMarkCount = 0
+
+        # Route the widget's Tcl command through Python in order to track text modifications.
+        # This catches the Tk class bindings and the undo/redo mechanism as well.
+        self._origCommand = f'{self._w}_orig'
+        self.tk.call('rename', self._w, self._origCommand)
+        self.tk.createcommand(self._w, self._dispatch)
+
+        self._highlighter = MarkupHighlighter(self)
+        self.tag_configure(self._SPLIT_TAG, relief='raised', borderwidth=2)
+
+    def destroy(self):
+        """Remove the Tcl command proxy.
+        
+        Extends the superclass method.
+        """
+        if self._wcPollJob is not None:
+            self.after_cancel(self._wcPollJob)
+            self._wcPollJob = None
+        self._stop_loading()
+        self._highlighter.cancel()
+        super().destroy()
+        try:
+            self.tk.deletecommand(self._w)
+        except tk.TclError:
+            pass
+
     def get_text(self, start='1.0', end='end'):
         """Return the whole text from the editor box."""
+        self._load_rest()
         text = self.get(start, end).strip(' \n')
         return text
 
-    def set_text(self, text):
-        """Put text into the editor box and clear the undo/redo stack."""
-        self.insert('end', text)
-        self.edit_reset()
-        # this is to prevent the user from clearing the box with Ctrl-Z
+    def set_text(self, text, wordCounter=None, history=None):
+        """Put text into the editor box; replace the undo history, and clear the modified flag.
+        
+        Positional arguments:
+            text -- str: text to insert.
+            
+        Optional arguments:
+            wordCounter -- WordCounter instance of text, if already counted.
+            history -- UndoHistory instance ending with text, if kept from a previous session.
+            
+        The first chunk of the text is displayed at once, the rest is 
+        inserted chunk by chunk when the main loop is idle. 
+        Modifying the text loads the rest immediately.
+        """
+        self._stop_loading()
+        if self._undoEnabled:
+            if history is None:
+                history = UndoHistory(self._undoBudget, self._undoGrouping)
+            self._history = history
+        if wordCounter is not None and not self._wcPending and str(self.tk.call(self._origCommand, 'index', 'end-1c')) == '1.0':
+            # The editor box is empty and not being counted, so the word counter can be taken over.
+            self._loadCounter = wordCounter
+        self._loadText = text
+        self._loadPos = 0
+        self._load_chunk()
         self.mark_set('insert', '1.0')
 
+    def get_history(self):
+        """Return the undo history, or None if undo is disabled."""
+        return self._history
+
+    def select_text(self, start, end):
+        """Select a range of characters and scroll it into view.
+        
+        Positional arguments:
+            start -- int: offset of the first character in the text.
+            end -- int: offset behind the last character.
+            
+        The text is loaded completely first, so the offsets can be resolved.
+        """
+        self._load_rest()
+        self.tag_remove('sel', '1.0', 'end')
+        self.tag_add('sel', f'1.0+{start}c', f'1.0+{end}c')
+        self.mark_set('insert', f'1.0+{start}c')
+        self.see('insert')
+
     def count_words(self):
-        """Return the word count."""
-        text = ADDITIONAL_WORD_LIMITS.sub(' ', self.get('1.0', 'end'))
-        text = NO_WORD_LIMITS.sub('', text)
-        return len(text.split())
+        """Return the word count, or None if counting is still in progress.
+        
+        The count is kept up to date with each text modification.
+        When a background count is finished, a <<WordCountReady>> event is generated.
+        """
+        if self._wcPending or self._loadText is not None:
+            return None
+
+        return self._wordCounter.total
+
+    def set_markup_colors(self, markupColor, commentColor):
+        """Set the colors of highlighted markup and comments.
+        
+        Positional arguments:
+            markupColor -- str: foreground color of formatting tags and quote marks.
+            commentColor -- str: foreground color of comments.
+        """
+        self.tag_configure(MarkupHighlighter.MARKUP_TAG, foreground=markupColor)
+        self.tag_configure(MarkupHighlighter.COMMENT_TAG, foreground=commentColor)
 
     def italic(self, event=None):
         """Make the selection italic, or begin with italic input."""
@@ -87,35 +210,57 @@ class TextBox(tk.Text):
         """Remove formatting from the selection."""
         self._set_format()
 
+    def toggle_split_mark(self, event=None):
+        """Mark the cursor position for splitting, or remove the mark at the cursor position.
+        
+        The marks move with the text when it is modified.
+        """
+        cursor = self.index('insert')
+        for mark in self._splitMarks:
+            if self.index(mark) == cursor:
+                self.tag_remove(self._SPLIT_TAG, mark, f'{mark}+1c')
+                self.mark_unset(mark)
+                self._splitMarks.remove(mark)
+                return
+
+        self._splitMarkCount += 1
+        mark = f'split{self._splitMarkCount}'
+        self.mark_set(mark, cursor)
+        self.mark_gravity(mark, 'left')
+        self.tag_add(self._SPLIT_TAG, mark, f'{mark}+1c')
+        self._splitMarks.append(mark)
+
+    def get_split_positions(self):
+        """Return the sorted, resolved indices of the cursor and the split marks, without duplicates.
+        
+        Positions at the beginning or at the end of the text are not included.
+        """
+        self._load_rest()
+        end = self.index('end-1c')
+        positions = set()
+        for mark in self._splitMarks + ['insert']:
+            index = self.index(mark)
+            if index != '1.0' and index != end:
+                positions.add(index)
+        return sorted(positions, key=lambda index: tuple(int(number) for number in index.split('.')))
+
+    def clear_split_marks(self):
+        """Remove all split marks."""
+        self.tag_remove(self._SPLIT_TAG, '1.0', 'end')
+        for mark in self._splitMarks:
+            self.mark_unset(mark)
+        self._splitMarks = []
+
     def _set_format(self, event=None, tag=''):
-        """Insert an opening/closing pair of yWriter markup tags."""
-        if tag:
-            # Toggle format as specified by tag.
-            if self.tag_ranges('sel'):
-                text = self.get(tk.SEL_FIRST, tk.SEL_LAST)
-                if text.startswith(f'[{tag}]'):
-                    if text.endswith(f'[/{tag}]'):
-                        # The selection is already formatted: Remove markup.
-                        text = self._remove_format(text, tag)
-                        self._replace_selected(text)
-                        return
-
-                # Format the selection: Add markup.
-                text = self._remove_format(text, tag)
-                # to make sure that there is no nested markup of the same type
-                self._replace_selected(f'[{tag}]{text}[/{tag}]')
-            else:
-                # Add markup to the cursor position.
-                self.insert('insert', f'[{tag}]')
-                endTag = f'[/{tag}]'
-                self.insert('insert', endTag)
-                self.mark_set('insert', f'insert-{len(endTag)}c')
-        elif self.tag_ranges('sel'):
-            # Remove all markup from the selection.
-            text = self.get(tk.SEL_FIRST, tk.SEL_LAST)
-            for tag in self._YW_TAGS:
-                text = self._remove_format(text, tag)
-            self._replace_selected(text)
+        """Toggle yWriter markup of the selection, or insert an opening/closing pair at the cursor position."""
+        if self.tag_ranges('sel'):
+            self._replace_selected(toggle_format(self.get(tk.SEL_FIRST, tk.SEL_LAST), tag))
+        elif tag:
+            # Add markup to the cursor position.
+            self.insert('insert', f'[{tag}]')
+            endTag = f'[/{tag}]'
+            self.insert('insert', endTag)
+            self.mark_set('insert', f'insert-{len(endTag)}c')
 
     def _replace_selected(self, text):
         """Replace the selected passage by text; keep the selection."""
@@ -126,21 +271,285 @@ class TextBox(tk.Text):
         selLast = self.index('insert')
         self.tag_add('sel', selFirst, selLast)
 
-    def _remove_format(self, text, tag):
-        """Return text without opening/closing markup, if any."""
-        if tag in self._YW_TAGS:
-            finished = False
-            while not finished:
-                start = text.find(f'[{tag}]')
-                if start >= 0:
-                    end = text.find(f'[/{tag}]')
-                    if  start < end:
-                        text = f'{text[:start]}{text[start + 3:end]}{text[end + 4:]}'
-                    else:
-                        finished = True
-                else:
-                    finished = True
-            return text
-
     def clear(self):
+        """Delete the whole text; detach the undo history, so it can be kept for the text."""
+        self._stop_loading()
+        self.clear_split_marks()
+        self._history = None
         self.delete('1.0', 'end')
+        if self._undoEnabled:
+            self._history = UndoHistory(self._undoBudget, self._undoGrouping)
+
+    def _dispatch(self, operation, *args):
+        """Execute a widget command; update the word count, if the text is modified.
+        
+        Positional arguments:
+            operation -- str: widget command, e.g. "insert".
+            args -- command arguments.
+            
+        Only the lines affected by the modification are recounted and highlighted.
+        Modifications by the user are logged in the journal, if any.
+        """
+        try:
+            if operation == 'edit' and args and args[0] in ('undo', 'redo', 'reset', 'separator', 'canundo', 'canredo'):
+                return self._edit(args[0])
+
+            if operation not in ('insert', 'delete', 'replace'):
+                return self.tk.call((self._origCommand, operation) + args)
+
+            if not self._loading:
+                # Do not modify the text before it is completely loaded.
+                self._load_rest()
+            elif self._loadCounter is not None:
+                # The word count of the text being loaded is known.
+                result = self.tk.call((self._origCommand, operation) + args)
+                self._highlighter.mark_dirty()
+                return result
+
+            if operation == 'delete' and len(args) > 2:
+                # Multiple ranges are deleted: recount and highlight the whole text.
+                result = self.tk.call((self._origCommand, operation) + args)
+                self._count_in_background()
+                self._highlighter.mark_dirty()
+                if self.journal is not None and not self._loading:
+                    self.journal.compact(self.tk.call(self._origCommand, 'get', '1.0', 'end-1c'))
+                if self._history is not None and not self._applyingHistory:
+                    self._history.clear()
+                return result
+
+            if not self._loading and (self.journal is not None or self._history is not None):
+                self._log_modification(operation, args)
+
+            lineCount = self._get_line_number('end-1c')
+            first, last = self._get_line_range(operation, args, lineCount)
+            result = self.tk.call((self._origCommand, operation) + args)
+            newLast = last + self._get_line_number('end-1c') - lineCount
+            self._highlighter.mark_dirty(first, newLast)
+            if self._wcPending:
+                # Counting is in progress: recount the whole text.
+                self._count_in_background()
+                return result
+
+            text = self.tk.call(self._origCommand, 'get', f'{first}.0', f'{newLast}.end')
+            if len(text) < self._BACKGROUND_COUNT_MIN:
+                self._wordCounter.update(first, last, text)
+            else:
+                self._count_in_background()
+            return result
+
+        except tk.TclError:
+            # The Tk class bindings rely on failing commands, e.g. when deleting an empty selection.
+            # Passing the exception on would break the main loop.
+            return ''
+
+    def _log_modification(self, operation, args):
+        """Log a modification in the journal and in the undo history before it is executed.
+        
+        The indices are resolved, so they refer to the unmodified text.
+        Indices behind the final line break are moved before it, as with the Tk text widget. 
+        """
+
+        def resolve(index):
+            index = str(self.tk.call(self._origCommand, 'index', index))
+            if self._compare(index, end) > 0:
+                return end
+
+            return index
+
+        end = str(self.tk.call(self._origCommand, 'index', 'end-1c'))
+        first = resolve(args[0])
+        if operation == 'insert':
+            last = first
+            newText = ''.join(args[1::2])
+        else:
+            if len(args) == 1:
+                last = resolve(f'{args[0]}+1c')
+            else:
+                last = resolve(args[1])
+            if operation == 'replace':
+                newText = ''.join(args[2::2])
+            else:
+                newText = ''
+        if self.journal is not None:
+            if last != first:
+                self.journal.delete(first, last)
+            if newText:
+                self.journal.insert(first, newText)
+        if self._history is not None and not self._applyingHistory:
+            if self._compare(last, first) > 0:
+                oldText = self.tk.call(self._origCommand, 'get', first, last)
+            else:
+                oldText = ''
+            if operation == 'insert':
+                self._history.insert(first, newText)
+            elif operation == 'delete':
+                self._history.delete(first, oldText)
+            else:
+                self._history.replace(first, oldText, newText)
+
+    def _edit(self, command):
+        """Execute an undo related "edit" widget command with the undo history.
+        
+        Positional arguments:
+            command -- str: "undo", "redo", "reset", "separator", "canundo", or "canredo".
+        """
+        if self._history is None:
+            if command in ('canundo', 'canredo'):
+                return 0
+
+            return ''
+
+        if command == 'reset':
+            self._history.clear()
+            return ''
+
+        if command == 'separator':
+            self._history.separate()
+            return ''
+
+        if command == 'canundo':
+            return int(self._history.can_undo())
+
+        if command == 'canredo':
+            return int(self._history.can_redo())
+
+        if command == 'undo':
+            steps = self._history.undo()
+        else:
+            steps = self._history.redo()
+        if steps is None:
+            return ''
+
+        self._applyingHistory = True
+        try:
+            for operation, index, text in steps:
+                if operation == 'i':
+                    self.insert(index, text)
+                    cursor = get_end_index(index, text)
+                else:
+                    self.delete(index, get_end_index(index, text))
+                    cursor = index
+        finally:
+            self._applyingHistory = False
+        self.mark_set('insert', cursor)
+        self.see('insert')
+        return ''
+
+    def _load_chunk(self, size=None):
+        """Insert the next chunk of the text being loaded; schedule the following one.
+        
+        Optional arguments:
+            size -- int: minimum number of characters to insert.
+            
+        Chunks end at line breaks, if possible.
+        When the text is completely loaded, clear the modified flag
+        and generate a <<WordCountReady>> event.
+        """
+        self._loadJob = None
+        if size is None:
+            size = self._LOAD_CHUNK_SIZE
+        end = self._loadText.find('\n', self._loadPos + size) + 1
+        if end == 0:
+            end = len(self._loadText)
+        self._loading = True
+        self.insert('end', self._loadText[self._loadPos:end])
+        self._loading = False
+        self._loadPos = end
+        if end < len(self._loadText):
+            self._loadJob = self.after_idle(self._load_chunk)
+            return
+
+        if self._loadCounter is not None:
+            self._wordCounter = self._loadCounter
+            self._loadCounter = None
+        self._stop_loading()
+        self.edit_modified(False)
+        if not self._wcPending:
+            self.event_generate('<<WordCountReady>>')
+
+    def _load_rest(self):
+        """Insert the rest of the text being loaded at once."""
+        if self._loadText is not None:
+            if self._loadJob is not None:
+                self.after_cancel(self._loadJob)
+            self._load_chunk(len(self._loadText))
+
+    def _stop_loading(self):
+        """Cancel loading the text, if any; count the words of a partly loaded text."""
+        if self._loadJob is not None:
+            self.after_cancel(self._loadJob)
+            self._loadJob = None
+        if self._loadText is not None:
+            self._loadText = None
+        if self._loadCounter is not None:
+            # The text is partly loaded without counting.
+            self._loadCounter = None
+            self._wordCounter.reset(self.tk.call(self._origCommand, 'get', '1.0', 'end-1c'))
+
+    def _count_in_background(self):
+        """Count the words of a text snapshot in a worker thread.
+        
+        If counting is already in progress, supersede the snapshot being counted.
+        """
+        self._wcGeneration += 1
+        if self._wcPending:
+            return
+
+        self._wcPending = True
+        generation = self._wcGeneration
+        text = self.tk.call(self._origCommand, 'get', '1.0', 'end-1c')
+        Thread(target=lambda: self._wcQueue.put((generation, WordCounter(text))), daemon=True).start()
+        if self._wcPollJob is None:
+            self._wcPollJob = self.after(self._POLL_INTERVAL, self._poll_word_count)
+
+    def _on_scroll(self, first, last):
+        """Update the scrollbar; highlight the lines scrolled into view."""
+        self.vbar.set(first, last)
+        self._highlighter.update()
+
+    def _poll_word_count(self):
+        """Take over the worker thread's result, if any; discard it, if out of date."""
+        try:
+            generation, wordCounter = self._wcQueue.get_nowait()
+        except queue.Empty:
+            self._wcPollJob = self.after(self._POLL_INTERVAL, self._poll_word_count)
+            return
+
+        self._wcPollJob = None
+        self._wcPending = False
+        if generation != self._wcGeneration:
+            # The text has been modified while counting.
+            self._count_in_background()
+            return
+
+        self._wordCounter = wordCounter
+        self.event_generate('<<WordCountReady>>')
+
+    def _get_line_range(self, operation, args, lineCount):
+        """Return the first and the last line affected by an insert, delete, or replace command.
+
+        Positional arguments:
+            operation -- str: widget command.
+            args -- command arguments.
+            lineCount -- int: number of lines of the text.
+        """
+        first = min(self._get_line_number(args[0]), lineCount)
+        if operation == 'insert':
+            last = first
+        elif operation == 'delete' and len(args) == 1:
+            last = min(self._get_line_number(f'{args[0]}+1c'), lineCount)
+        else:
+            last = min(self._get_line_number(args[1]), lineCount)
+        return first, max(first, last)
+
+    def _compare(self, index1, index2):
+        """Return -1, 0, or 1, if index1 is before, at, or behind index2; both are resolved "line.column" indices."""
+        line1, column1 = index1.split('.')
+        line2, column2 = index2.split('.')
+        position1 = (int(line1), int(column1))
+        position2 = (int(line2), int(column2))
+        return (position1 > position2) - (position1 < position2)
+
+    def _get_line_number(self, index):
+        """Return the line number of index."""
+        return int(str(self.tk.call(self._origCommand, 'index', index)).split('.')[0])
@@ -0,0 +1,216 @@
+"""Provide editing operations on yWriter raw markup, independent of Tk.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+from nveditorlib.word_counter import COMMENT_PATTERN
+
+YW_TAGS = ('i', 'b')
+# Supported tags.
+
+YW_MARKUP = re.compile(f'\\[(/?)({"|".join(YW_TAGS)})\\]')
+# Opening and closing tags; group 1 is "/" for closing tags, group 2 is the tag.
+
+MARKUP_TOKENS = re.compile(f'{COMMENT_PATTERN}|{YW_MARKUP.pattern}')
+# Comments and tags; comments are matched first, so tags within comments are left alone.
+
+QUOTE_PREFIX = re.compile('>[ \t]*')
+# Leading quote mark; it stays outside the markup.
+
+TRAILING_SPACE = re.compile('[ \t]+$', re.MULTILINE)
+# White space at the end of a line.
+
+
+def remove_format(text, *tags):
+    """Return text without opening/closing markup of the given tags, if any.
+
+    All tags are removed in a single pass.
+    For each tag, the n-th opening tag is paired with the n-th closing tag.
+    Pairs are removed up to the first closing tag preceding its opening tag.
+    """
+    markup = []
+    openings = {}
+    closings = {}
+    for tag in tags:
+        if tag in YW_TAGS:
+            openings[tag] = []
+            closings[tag] = []
+    if not openings:
+        return text
+
+    for match in YW_MARKUP.finditer(text):
+        tag = match.group(2)
+        if tag in openings:
+            markup.append(match.span())
+            if match.group(1):
+                closings[tag].append(match.start())
+            else:
+                openings[tag].append(match.start())
+
+    toRemove = set()
+    for tag in openings:
+        for start, end in zip(openings[tag], closings[tag]):
+            if start > end:
+                break
+
+            toRemove.add(start)
+            toRemove.add(end)
+
+    chunks = []
+    pos = 0
+    for start, end in markup:
+        if start in toRemove:
+            chunks.append(text[pos:start])
+            pos = end
+    chunks.append(text[pos:])
+    return ''.join(chunks)
+
+
+def toggle_format(text, tag=''):
+    """Return the text formatted like a selection by the "Italic", "Bold", and "Plain" commands.
+
+    Positional arguments:
+        text -- str: text to format.
+
+    Optional arguments:
+        tag -- str: tag to toggle; if empty, all markup is removed.
+
+    If the text is already enclosed in the tag, the markup is removed.
+    Otherwise, the text is enclosed in the tag, without nesting markup of the same type.
+    """
+    if not tag:
+        return remove_format(text, *YW_TAGS)
+
+    if text.startswith(f'[{tag}]') and text.endswith(f'[/{tag}]'):
+        return remove_format(text, tag)
+
+    return f'[{tag}]{remove_format(text, tag)}[/{tag}]'
+
+
+def split_text(text, offsets):
+    """Return a list of the parts of a text split at character offsets.
+
+    Positional arguments:
+        text -- str: text to split.
+        offsets -- iterable of int: positions of the first characters of the parts after the first one.
+
+    Offsets at the beginning or at the end of the text are ignored, as are duplicates.
+    """
+    bounds = [0]
+    bounds.extend(sorted({offset for offset in offsets if 0 < offset < len(text)}))
+    bounds.append(len(text))
+    return [text[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def normalize_markup(text):
+    """Return the text with minimal italic and bold markup, keeping the formatting.
+
+    Positional arguments:
+        text -- str: text with markup.
+
+    Markup reaching across line breaks is closed at the end of the line
+    and opened again on the next line, so each paragraph is balanced.
+    Nested and duplicate tags are collapsed, adjacent formatted passages are merged,
+    and empty tag pairs are removed. An opening tag without a closing tag formats
+    the rest of the text, a closing tag without an opening tag formats the line up to the tag.
+    White space at the edges of formatted passages is moved outside the markup,
+    white space at the end of the lines is removed, as are leading and trailing blank lines.
+    A line not beginning with a quote mark keeps an empty tag pair in front of a leading ">",
+    so it does not become a quote.
+    """
+    if YW_MARKUP.search(text) is None:
+        return TRAILING_SPACE.sub('', text).strip('\n')
+
+    depth = dict.fromkeys(YW_TAGS, 0)
+    # Number of open tags carried from line to line.
+    lines = []
+    for line in text.split('\n'):
+        if '[' in line or any(depth.values()):
+            line = _normalize_line(line, depth)
+        else:
+            line = line.rstrip(' \t')
+        lines.append(line)
+    return '\n'.join(lines).strip('\n')
+
+
+def _normalize_line(line, depth):
+    """Return a line with balanced, minimal markup; update the numbers of open tags."""
+    prefix = QUOTE_PREFIX.match(line)
+    if prefix is None:
+        start = 0
+    else:
+        start = prefix.end()
+
+    # Split the line into pieces of text, and the set of tags applying to each piece.
+    pieces = []
+    pos = start
+    for match in MARKUP_TOKENS.finditer(line, start):
+        if match.start() > pos:
+            pieces.append((line[pos:match.start()], {tag for tag in YW_TAGS if depth[tag]}))
+        pos = match.end()
+        tag = match.group(2)
+        if tag is None:
+            # A comment is text.
+            pieces.append((match.group(), {tag for tag in YW_TAGS if depth[tag]}))
+        elif not match.group(1):
+            depth[tag] += 1
+        elif depth[tag]:
+            depth[tag] -= 1
+        else:
+            # An unmatched closing tag formats the line up to here.
+            for __, tags in pieces:
+                tags.add(tag)
+    if pos < len(line):
+        pieces.append((line[pos:], {tag for tag in YW_TAGS if depth[tag]}))
+
+    # White space gets the tags it shares with its neighbours; trailing white space is dropped.
+    runs = []
+    for piece, tags in pieces:
+        core = piece.strip()
+        if not core:
+            runs.append([piece, None])
+            continue
+
+        leading = piece[:len(piece) - len(piece.lstrip())]
+        trailing = piece[len(piece.rstrip()):]
+        if leading:
+            runs.append([leading, None])
+        runs.append([core, frozenset(tags)])
+        if trailing:
+            runs.append([trailing, None])
+    while runs and runs[-1][1] is None:
+        del runs[-1]
+    previous = frozenset()
+    for i, run in enumerate(runs):
+        if run[1] is None:
+            following = next(tags for __, tags in runs[i + 1:] if tags is not None)
+            run[1] = previous & following
+        else:
+            previous = run[1]
+    if not runs:
+        return line[:start].rstrip(' \t')
+
+    # Write the runs, changing the markup only where the formatting changes.
+    chunks = [line[:start]]
+    openTags = []
+    for run, tags in runs:
+        keep = 0
+        while keep < len(openTags) and openTags[keep] in tags:
+            keep += 1
+        for tag in reversed(openTags[keep:]):
+            chunks.append(f'[/{tag}]')
+        del openTags[keep:]
+        for tag in YW_TAGS:
+            if tag in tags and tag not in openTags:
+                chunks.append(f'[{tag}]')
+                openTags.append(tag)
+        chunks.append(run)
+    for tag in reversed(openTags):
+        chunks.append(f'[/{tag}]')
+    if prefix is None and chunks[1].startswith('>'):
+        # The markup in front of the ">" is removed; keep the first tag, so the line does not become a quote.
+        tag = YW_MARKUP.match(line).group(2)
+        chunks.insert(1, f'[{tag}][/{tag}]')
+    return ''.join(chunks)
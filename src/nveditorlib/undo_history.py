@@ -0,0 +1,224 @@
+"""Provide an undo history for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+import sys
+from collections import deque
+
+SENTENCE_END = re.compile(r'[.!?…]["\'»«“”‘’)]*\s+$')
+# this matches sentence-ending punctuation, followed by white space, at the end of a text
+
+
+def get_end_index(index, text):
+    """Return the "line.column" index behind text inserted at index.
+
+    Positional arguments:
+        index -- str: resolved "line.column" index.
+        text -- str: inserted text.
+    """
+    line, column = index.split('.')
+    lineBreaks = text.count('\n')
+    if lineBreaks:
+        return f'{int(line) + lineBreaks}.{len(text) - text.rfind(chr(10)) - 1}'
+
+    return f'{line}.{int(column) + len(text)}'
+
+
+class UndoHistory:
+    """Memory-capped undo/redo history of a text.
+
+    Public methods:
+        insert(index, text) -- Record an insertion.
+        delete(index, text) -- Record a deletion.
+        replace(index, oldText, newText) -- Record a replacement as a single group.
+        separate() -- Begin a new undo group with the next modification.
+        undo() -- Return the steps reverting the last group, or None.
+        redo() -- Return the steps repeating the last reverted group, or None.
+        can_undo() -- Return True if there is a group to undo.
+        can_redo() -- Return True if there is a group to redo.
+        clear() -- Remove all groups.
+
+    Public instance variables:
+        size -- int: approximate memory used by the recorded text, in bytes.
+
+    A step is a list of the operation ("i" for insertion, "d" for deletion),
+    the resolved "line.column" index, and the text inserted or deleted.
+    Only the differences are recorded, never the whole text.
+    Single characters typed or deleted in a row are merged into one step,
+    so a group takes little more memory than the text it comprises.
+    A group ends at word or sentence boundaries, depending on the grouping.
+    When the budget is exceeded, the oldest groups are dropped.
+    """
+    _STEP_SIZE = 120
+    # Approximate memory used by a step, not counting the text.
+
+    def __init__(self, budget, grouping='word'):
+        """Create an empty history.
+
+        Positional arguments:
+            budget -- int: maximum memory in bytes.
+
+        Optional arguments:
+            grouping -- str: "word" or "sentence".
+        """
+        self.size = 0
+        self._budget = budget
+        self._grouping = grouping
+        self._undoStack = deque()
+        self._redoStack = []
+        self._mergeable = False
+
+    def insert(self, index, text):
+        """Record an insertion.
+
+        Positional arguments:
+            index -- str: resolved "line.column" index.
+            text -- str: inserted text.
+        """
+        if not text:
+            return
+
+        if len(text) == 1 and self._mergeable:
+            step = self._undoStack[-1][-1]
+            if step[0] == 'i' and get_end_index(step[1], step[2]) == index and not self._is_boundary(step[2], text):
+                self._resize(step, step[2] + text)
+                return
+
+        self._add([['i', index, text]], len(text) == 1)
+
+    def delete(self, index, text):
+        """Record a deletion.
+
+        Positional arguments:
+            index -- str: resolved "line.column" index of the first character deleted.
+            text -- str: deleted text.
+        """
+        if not text:
+            return
+
+        if len(text) == 1 and self._mergeable:
+            step = self._undoStack[-1][-1]
+            if step[0] == 'd':
+                if get_end_index(index, text) == step[1] and not self._is_boundary(text, step[2]):
+                    # Backspace
+                    step[1] = index
+                    self._resize(step, text + step[2])
+                    return
+
+                if index == step[1] and not self._is_boundary(step[2], text):
+                    # Delete
+                    self._resize(step, step[2] + text)
+                    return
+
+        self._add([['d', index, text]], len(text) == 1)
+
+    def replace(self, index, oldText, newText):
+        """Record a replacement as a single group.
+
+        Positional arguments:
+            index -- str: resolved "line.column" index of the first character replaced.
+            oldText -- str: deleted text.
+            newText -- str: inserted text.
+        """
+        group = []
+        if oldText:
+            group.append(['d', index, oldText])
+        if newText:
+            group.append(['i', index, newText])
+        if group:
+            self._add(group, False)
+
+    def separate(self):
+        """Begin a new undo group with the next modification."""
+        self._mergeable = False
+
+    def undo(self):
+        """Return the steps reverting the last group, or None if there is nothing to undo.
+
+        The steps are to be executed in the order given.
+        """
+        self._mergeable = False
+        if not self._undoStack:
+            return None
+
+        group = self._undoStack.pop()
+        self._redoStack.append(group)
+        return [['d' if step[0] == 'i' else 'i', step[1], step[2]] for step in reversed(group)]
+
+    def redo(self):
+        """Return the steps repeating the last reverted group, or None if there is nothing to redo."""
+        self._mergeable = False
+        if not self._redoStack:
+            return None
+
+        group = self._redoStack.pop()
+        self._undoStack.append(group)
+        return [step.copy() for step in group]
+
+    def can_undo(self):
+        """Return True if there is a group to undo."""
+        return bool(self._undoStack)
+
+    def can_redo(self):
+        """Return True if there is a group to redo."""
+        return bool(self._redoStack)
+
+    def clear(self):
+        """Remove all groups."""
+        self._undoStack.clear()
+        self._redoStack.clear()
+        self._mergeable = False
+        self.size = 0
+
+    def _add(self, group, mergeable):
+        """Add a new group of steps; drop the oldest groups, if the budget is exceeded."""
+        self._clear_redo()
+        self._undoStack.append(group)
+        for step in group:
+            self.size += self._get_size(step[2])
+        self._mergeable = mergeable
+        self._trim()
+
+    def _clear_redo(self):
+        for group in self._redoStack:
+            for step in group:
+                self.size -= self._get_size(step[2])
+        self._redoStack.clear()
+
+    def _get_size(self, text):
+        return sys.getsizeof(text) + self._STEP_SIZE
+
+    def _is_boundary(self, before, after):
+        """Return True if a group boundary lies between two adjacent texts."""
+        if after[0].isspace() or not before[-1].isspace():
+            return False
+
+        if self._grouping == 'sentence':
+            return before[-1] == '\n' or SENTENCE_END.search(before[-20:]) is not None
+
+        return True
+
+    def _resize(self, step, text):
+        """Replace a merged step's text."""
+        self.size += self._get_size(text) - self._get_size(step[2])
+        step[2] = text
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest groups, while the budget is exceeded.
+
+        The size includes the groups to redo, so they are dropped
+        when there is nothing left to undo, the last one to be redone first.
+        """
+        while self.size > self._budget and (self._undoStack or self._redoStack):
+            if self._undoStack:
+                group = self._undoStack.popleft()
+            else:
+                group = self._redoStack.pop(0)
+            for step in group:
+                self.size -= self._get_size(step[2])
+        if not self._undoStack:
+            self._mergeable = False
@@ -0,0 +1,58 @@
+"""Provide a class for coalescing updates on the tkinter main loop.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from time import monotonic
+
+
+class UpdateScheduler:
+    """Debouncer for updates triggered by bursts of events.
+    
+    An update is delayed until no new request has come in for a given interval, 
+    but not longer than a maximum delay after the first pending request. 
+
+    Public methods:
+        request() -- Schedule the update, postponing a pending one.
+        cancel() -- Cancel the pending update, if any.
+    """
+
+    def __init__(self, widget, command, delay, maxDelay):
+        """Set the scheduling parameters.
+        
+        Positional arguments:
+            widget -- tkinter widget providing the after() methods.
+            command -- callable performing the update.
+            delay: int -- debounce interval in milliseconds.
+            maxDelay: int -- maximum staleness in milliseconds.
+        """
+        self._widget = widget
+        self._command = command
+        self._delay = delay
+        self._maxDelay = maxDelay
+        self._job = None
+        self._deadline = None
+
+    def request(self, event=None):
+        """Schedule the update, postponing a pending one."""
+        now = monotonic()
+        if self._job is None:
+            self._deadline = now + self._maxDelay / 1000
+        else:
+            self._widget.after_cancel(self._job)
+        delay = min(self._delay, int((self._deadline - now) * 1000))
+        if delay > 0:
+            self._job = self._widget.after(delay, self._run)
+        else:
+            self._job = self._widget.after_idle(self._run)
+
+    def cancel(self):
+        """Cancel the pending update, if any."""
+        if self._job is not None:
+            self._widget.after_cancel(self._job)
+            self._job = None
+
+    def _run(self):
+        self._job = None
+        self._command()
@@ -0,0 +1,119 @@
+"""Provide a word counter for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+
+#--- Patterns of the yWriter markup, shared by word counting and syntax highlighting.
+
+MARKUP_PATTERN = r'\[.+?\]'
+# this matches formatting tags such as [i] and [/b]
+
+COMMENT_PATTERN = r'\/\*.+?\*\/'
+# this matches inline comments
+
+QUOTE_PATTERN = r'^\>'
+# this matches leading quote marks
+
+#--- Regular expressions for counting words and characters like in LibreOffice.
+# See: https://help.libreoffice.org/latest/en-GB/text/swriter/guide/words_count.html
+
+WORDS = re.compile(rf'(?:{QUOTE_PATTERN}|{MARKUP_PATTERN}|{COMMENT_PATTERN}|-(?!-)|([^\s—–-][^\s—–\-\[/>]*))+', re.MULTILINE)
+# this matches the sequences between word limits, i.e. white space, dashes, and double hyphens.
+# Markup, comments, hyphens, and leading quote marks are part of a sequence, but do not make a word;
+# only sequences with other characters (captured by group 1) are words.
+
+NO_CHARACTERS = re.compile(rf'{MARKUP_PATTERN}|{COMMENT_PATTERN}|{QUOTE_PATTERN}|\n', re.MULTILINE)
+# this matches what is not counted as characters: markup, comments, leading quote marks, and line breaks
+
+NO_CHARACTERS_NO_SPACES = re.compile(rf'{MARKUP_PATTERN}|{COMMENT_PATTERN}|{QUOTE_PATTERN}|\s+', re.MULTILINE)
+# this additionally matches white space
+
+
+def count_words(text):
+    """Return the word count of text.
+    
+    The text is scanned in a single pass without creating intermediate copies.
+    """
+    count = 0
+    for match in WORDS.finditer(text):
+        if match.group(1) is not None:
+            count += 1
+    return count
+
+
+def count_characters(text, spaces=True):
+    """Return the character count of text, not counting line breaks.
+    
+    Positional arguments:
+        text -- str: text to count.
+        
+    Optional arguments:
+        spaces -- bool: if False, do not count white space.
+    """
+    if spaces:
+        noCharacters = NO_CHARACTERS
+    else:
+        noCharacters = NO_CHARACTERS_NO_SPACES
+    count = len(text)
+    for match in noCharacters.finditer(text):
+        count -= match.end() - match.start()
+    return count
+
+
+class WordCounter:
+    """Word counter keeping a table of per-line word counts.
+
+    Words never span line breaks, neither does markup nor comments.
+    So the word count of a text is the sum of its lines' word counts,
+    and a modification only requires recounting the lines it affects.
+
+    Public methods:
+        copy() -- Return an independent copy of the word counter.
+        reset(text) -- Count the words of all lines of text.
+        update(first, last, text) -- Replace the word counts of a range of lines.
+
+    Public instance variables:
+        total -- int: word count of the whole text.
+
+    Line numbers are counted from 1, as with the tkinter Text widget.
+    """
+
+    def __init__(self, text=''):
+        """Count the words of the initial text.
+
+        Optional arguments:
+            text -- str: initial text.
+        """
+        self.total = 0
+        self._lineCounts = []
+        self.reset(text)
+
+    def copy(self):
+        """Return an independent copy of the word counter."""
+        wordCounter = WordCounter()
+        wordCounter.total = self.total
+        wordCounter._lineCounts = self._lineCounts.copy()
+        return wordCounter
+
+    def reset(self, text):
+        """Count the words of all lines of text."""
+        self._lineCounts = [count_words(line) for line in text.split('\n')]
+        self.total = sum(self._lineCounts)
+
+    def update(self, first, last, text):
+        """Replace the word counts of a range of lines.
+
+        Positional arguments:
+            first -- int: number of the first line to replace.
+            last -- int: number of the last line to replace.
+            text -- str: new content of the line range.
+
+        The number of lines of text may differ from the number of lines replaced.
+        """
+        newCounts = [count_words(line) for line in text.split('\n')]
+        first -= 1
+        self.total += sum(newCounts) - sum(self._lineCounts[first:last])
+        self._lineCounts[first:last] = newCounts
@@ -0,0 +1,128 @@
+"""Provide a project-wide word count index for the novelyst editor plugin.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nveditorlib.word_counter import count_words
+from nveditorlib.word_counter import count_characters
+
+
+class WordCountIndex:
+    """Cache of scene word and character counts, shared by all editor windows.
+    
+    Scenes are recounted only if their content has changed,
+    which is detected by comparing the content's hash value.
+    The chapter and project totals are kept, and changed by the difference
+    when the word count of the scene being edited changes.
+    
+    Public methods:
+        get_counts(scId) -- Return the word and character count of a scene.
+        get_totals(scId, words=None) -- Return chapter, project, and session word counts.
+        refresh() -- Have the totals calculated again with the next request.
+        reset() -- Clear the cache; keep the session word count.
+    """
+
+    def __init__(self, ui):
+        """Initialize an empty index.
+        
+        Positional arguments:
+            ui -- reference to the NovelystTk instance of the application.
+        """
+        self._ui = ui
+        self._counts = {}
+        # key: scene ID, value: (content hash, word count, character count)
+        self._sessionStart = None
+        self._sessionOffset = 0
+        self._projectWords = 0
+        self._chapterIds = None
+        # key: scene ID, value: chapter ID, or None; None if the totals are to be calculated
+        self._sceneWords = {}
+        # key: ID of a "normal" scene, value: word count included in the totals
+        self._chapterWords = {}
+        # key: chapter ID, value: word count of the chapter's "normal" scenes
+
+    def get_counts(self, scId):
+        """Return the word and character count of a scene.
+        
+        Positional arguments:
+            scId -- str: scene ID.
+        """
+        text = self._ui.novel.scenes[scId].sceneContent
+        contentHash = hash(text)
+        # str objects cache their hash value, so this is cheap for unchanged scenes
+        entry = self._counts.get(scId, None)
+        if entry is None or entry[0] != contentHash:
+            if text:
+                entry = (contentHash, count_words(text), count_characters(text))
+            else:
+                entry = (contentHash, 0, 0)
+            self._counts[scId] = entry
+        return entry[1], entry[2]
+
+    def get_totals(self, scId, words=None):
+        """Return chapter, project, and session word counts.
+        
+        Positional arguments:
+            scId -- str: ID of the scene whose chapter total is returned.
+            
+        Optional arguments:
+            words -- int: word count of the scene being edited, replacing the cached count.
+            
+        Only "normal" scenes are counted; the project total comprises "normal" chapters.
+        The session word count is the number of words added since the first call.
+        The totals are calculated after refresh(), or if the scene is not known yet;
+        otherwise, only the difference of the scene's word count is added.
+        """
+        if self._chapterIds is None or scId not in self._chapterIds:
+            self._count_totals()
+            self._chapterIds.setdefault(scId, None)
+        chId = self._chapterIds[scId]
+        if words is not None and scId in self._sceneWords:
+            difference = words - self._sceneWords[scId]
+            if difference:
+                self._sceneWords[scId] = words
+                self._chapterWords[chId] += difference
+                if self._ui.novel.chapters[chId].chType == 0:
+                    self._projectWords += difference
+        if self._sessionStart is None:
+            self._sessionStart = self._projectWords
+        sessionWords = self._sessionOffset + self._projectWords - self._sessionStart
+        return self._chapterWords.get(chId, 0), self._projectWords, sessionWords
+
+    def refresh(self):
+        """Have the totals calculated again with the next request, e.g. after the project has been changed elsewhere."""
+        self._chapterIds = None
+
+    def reset(self):
+        """Clear the cache, e.g. when the project is closed; keep the session word count."""
+        if self._sessionStart is not None:
+            self._sessionOffset += self._projectWords - self._sessionStart
+        self._sessionStart = None
+        self._projectWords = 0
+        self._chapterIds = None
+        self._sceneWords.clear()
+        self._chapterWords.clear()
+        self._counts.clear()
+
+    def _count_totals(self):
+        """Calculate the chapter and project totals from the scenes' cached word counts."""
+        novel = self._ui.novel
+        self._chapterIds = {}
+        self._sceneWords = {}
+        self._chapterWords = {}
+        self._projectWords = 0
+        for chId in novel.srtChapters:
+            chapter = novel.chapters[chId]
+            wordsInChapter = 0
+            for scId in chapter.srtScenes:
+                self._chapterIds[scId] = chId
+                if novel.scenes[scId].scType != 0:
+                    continue
+
+                words = self.get_counts(scId)[0]
+                self._sceneWords[scId] = words
+                wordsInChapter += words
+            self._chapterWords[chId] = wordsInChapter
+            if chapter.chType == 0:
+                self._projectWords += wordsInChapter
@@ -0,0 +1,150 @@
+"""Test the novelyst editor's chapter line map.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.chapter_document import ChapterDocument
+
+
+class BufferModel:
+    """Stand-in for the chapter editor box, modifying the buffer lines like the tkinter Text widget.
+    
+    Modifications are registered with the document the way the chapter box does:
+    a line range including a boundary line is rejected.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.lines = document.get_text().split('\n')
+
+    def insert(self, line, text):
+        """Insert text at the end of a line; return False if rejected."""
+        if self.document.includes_boundary(line, line):
+            return False
+
+        newLines = text.split('\n')
+        newLines[0] = self.lines[line - 1] + newLines[0]
+        self.lines[line - 1:line] = newLines
+        self.document.update(line, len(newLines) - 1)
+        return True
+
+    def delete(self, first, last):
+        """Delete the lines from the end of the first line to the end of the last line; return False if rejected."""
+        if self.document.includes_boundary(first, last):
+            return False
+
+        del self.lines[first:last]
+        self.document.update(first, first - last)
+        return True
+
+    def get_scene_lines(self, i):
+        """Return the content lines of the scene at position i."""
+        first, last = self.document.get_lines(i)
+        return self.lines[first - 1:last]
+
+
+def get_boundaries(lines, titles):
+    """Return the boundary line numbers, found by scanning the buffer."""
+    return [lineNumber for lineNumber, line in enumerate(lines, 1) if line in titles]
+
+
+class LineMapTest(unittest.TestCase):
+    """Test mapping the buffer lines and the scenes."""
+
+    def setUp(self):
+        self.document = ChapterDocument(['1', '2', '3'], ['#1', '#2', '#3'], ['one', 'two\nlines', ''])
+
+    def test_get_text(self):
+        self.assertEqual(self.document.get_text(), '#1\none\n#2\ntwo\nlines\n#3\n')
+
+    def test_get_lines(self):
+        self.assertEqual([self.document.get_lines(i) for i in range(3)], [(2, 2), (4, 5), (7, 7)])
+
+    def test_locate(self):
+        self.assertEqual([self.document.locate(line) for line in range(1, 10)], [0, 0, 1, 1, 1, 2, 2, 2, 2])
+
+    def test_includes_boundary(self):
+        self.assertFalse(self.document.includes_boundary(4, 5))
+        self.assertTrue(self.document.includes_boundary(3, 4))
+        self.assertTrue(self.document.includes_boundary(5, 6))
+        self.assertTrue(self.document.includes_boundary(2, 4))
+        self.assertFalse(self.document.includes_boundary(7, 9))
+
+    def test_no_scenes(self):
+        document = ChapterDocument([], [], [])
+        self.assertEqual(document.get_text(), '')
+
+
+class ModificationTest(unittest.TestCase):
+    """Test updating the line map after inserting and deleting."""
+
+    def setUp(self):
+        self.document = ChapterDocument(['1', '2', '3'], ['#1', '#2', '#3'], ['one', 'two\nlines', 'three'])
+        self.buffer = BufferModel(self.document)
+
+    def test_insert_lines(self):
+        self.assertTrue(self.buffer.insert(2, '\nnew\nlines'))
+        self.assertEqual(self.buffer.get_scene_lines(0), ['one', 'new', 'lines'])
+        self.assertEqual(self.document.get_lines(1), (6, 7))
+        self.assertEqual(self.document.locate(5), 1)
+        self.assertEqual(self.buffer.get_scene_lines(2), ['three'])
+
+    def test_delete_lines(self):
+        self.assertTrue(self.buffer.delete(4, 5))
+        self.assertEqual(self.buffer.get_scene_lines(1), ['two'])
+        self.assertEqual(self.document.get_lines(2), (6, 6))
+        self.assertEqual(self.document.locate(5), 2)
+
+    def test_insert_in_the_last_line_of_a_scene(self):
+        self.assertTrue(self.buffer.insert(5, '\nend'))
+        self.assertEqual(self.buffer.get_scene_lines(1), ['two', 'lines', 'end'])
+        self.assertEqual(self.buffer.get_scene_lines(2), ['three'])
+
+    def test_no_modification_across_boundaries(self):
+        self.assertFalse(self.buffer.delete(2, 4))
+        self.assertFalse(self.buffer.delete(5, 6))
+        self.assertFalse(self.buffer.insert(3, 'x'))
+        self.assertEqual(self.document.get_text().split('\n'), self.buffer.lines)
+        self.assertEqual(self.document.touched, set())
+
+    def test_touched(self):
+        self.buffer.insert(4, ' more')
+        self.buffer.delete(7, 7)
+        self.assertEqual(self.document.touched, {1, 2})
+        self.document.touched.clear()
+        self.buffer.insert(2, '\n')
+        self.assertEqual(self.document.touched, {0})
+        self.assertEqual(self.document.get_lines(1), (5, 6))
+
+    def test_random_modifications(self):
+        titles = [f'#{i}' for i in range(30)]
+        generator = random.Random(1)
+        document = ChapterDocument([str(i) for i in range(30)], titles,
+                                   ['\n'.join(['x'] * generator.randint(0, 3)) for __ in range(30)])
+        buffer = BufferModel(document)
+        rejected = 0
+        for __ in range(2000):
+            first = generator.randint(1, len(buffer.lines))
+            if generator.random() < 0.5:
+                changed = buffer.insert(first, '\nx' * generator.randint(0, 3))
+            else:
+                changed = buffer.delete(first, min(first + generator.randint(0, 3), len(buffer.lines)))
+            rejected += not changed
+            boundaries = get_boundaries(buffer.lines, titles)
+            self.assertEqual(boundaries, [document.get_lines(i)[0] - 1 for i in range(30)])
+            self.assertEqual(boundaries[1:], [document.get_lines(i)[1] + 1 for i in range(29)])
+            self.assertEqual(document.get_lines(29)[1], len(buffer.lines))
+        self.assertTrue(0 < rejected < 2000)
+        for line in range(1, len(buffer.lines) + 1):
+            self.assertEqual(titles[document.locate(line)], titles[sum(1 for b in boundaries if b <= line) - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Test reading and writing the novelyst editor configuration file.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.configuration import Configuration
+
+SETTINGS = dict(window_geometry='600x800', font_size=12)
+OPTIONS = dict(live_wordcount=False)
+
+
+class ConfigurationTest(unittest.TestCase):
+    """Test the INI file in a temporary directory."""
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.iniFile = f'{self.tempDir.name}/editor.ini'
+        self.configuration = Configuration(SETTINGS, OPTIONS)
+        self.configuration.write(self.iniFile)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def read_file(self):
+        with open(self.iniFile, encoding='utf-8') as f:
+            return f.read()
+
+    def test_read(self):
+        self.configuration.settings['font_size'] = 14
+        self.configuration.options['live_wordcount'] = True
+        self.configuration.write(self.iniFile)
+        configuration = Configuration(SETTINGS, OPTIONS)
+        configuration.read(self.iniFile)
+        self.assertEqual(configuration.settings, dict(window_geometry='600x800', font_size='14'))
+        self.assertEqual(configuration.options, dict(live_wordcount=True))
+
+    def test_read_missing_file(self):
+        configuration = Configuration(SETTINGS, OPTIONS)
+        configuration.read(f'{self.tempDir.name}/missing.ini')
+        self.assertEqual(configuration.settings, SETTINGS)
+        self.assertEqual(configuration.options, OPTIONS)
+
+    def test_unchanged_settings_are_not_written(self):
+        self.configuration.settings['font_size'] = '12'
+        with mock.patch('nveditorlib.configuration.open', mock.mock_open()) as mockedOpen:
+            self.configuration.write(self.iniFile)
+        mockedOpen.assert_not_called()
+
+    def test_changed_settings_are_written(self):
+        self.configuration.settings['font_size'] = 14
+        self.configuration.write(self.iniFile)
+        self.assertIn('font_size = 14', self.read_file())
+        self.assertEqual(os.listdir(self.tempDir.name), ['editor.ini'])
+
+    def test_file_changed_elsewhere(self):
+        with open(self.iniFile, 'a', encoding='utf-8') as f:
+            f.write('[OTHER]\nkey = value\n')
+        with mock.patch('nveditorlib.configuration.os.replace', wraps=os.replace) as mockedReplace:
+            self.configuration.write(self.iniFile)
+        mockedReplace.assert_called_once()
+        self.assertNotIn('[OTHER]', self.read_file())
+
+    def test_failed_replace_keeps_the_file(self):
+        content = self.read_file()
+        self.configuration.settings['font_size'] = 14
+        with mock.patch('nveditorlib.configuration.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.configuration.write(self.iniFile)
+        self.assertEqual(self.read_file(), content)
+        self.assertEqual(os.listdir(self.tempDir.name), ['editor.ini'])
+
+    def test_failed_write_keeps_the_file(self):
+        content = self.read_file()
+        self.configuration.settings['font_size'] = 14
+        with mock.patch('nveditorlib.configuration.ConfigParser.write', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.configuration.write(self.iniFile)
+        self.assertEqual(self.read_file(), content)
+        self.assertEqual(os.listdir(self.tempDir.name), ['editor.ini'])
+
+        # The failed write is not cached, so it is tried again.
+        self.configuration.write(self.iniFile)
+        self.assertIn('font_size = 14', self.read_file())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Test the novelyst editor's headless scene batch.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.scene_batch import SceneBatch
+
+SCENE_PREFIX = 'Sc'
+
+
+class Stub:
+    """Generic stand-in for novelyst objects."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TreeStub(Stub):
+    """Stand-in for the novelyst tree view, adding scenes to the novel."""
+
+    def __init__(self, novel, capacity=None):
+        super().__init__(SCENE_PREFIX=SCENE_PREFIX)
+        self.novel = novel
+        self.capacity = capacity
+        # Number of scenes that can be added; None means no limit.
+        self.calls = []
+
+    def add_scene(self, selection='', appendToPrev=False, scType=0, status=1):
+        self.calls.append((selection, appendToPrev))
+        if self.capacity is not None:
+            if self.capacity == 0:
+                return None
+
+            self.capacity -= 1
+        chapter = self.novel.chapters['1']
+        scId = str(max(int(scId) for scId in self.novel.scenes) + 1)
+        self.novel.scenes[scId] = Stub(title='', sceneContent=None, scType=scType, status=status, characters=[])
+        chapter.srtScenes.insert(chapter.srtScenes.index(selection[len(SCENE_PREFIX):]) + 1, scId)
+        return scId
+
+
+class SearchIndexStub:
+    """Stand-in for the search index, recording the updated scenes."""
+
+    def __init__(self):
+        self.updated = []
+
+    def update(self, scId):
+        self.updated.append(scId)
+
+
+def make_ui(texts, capacity=None):
+    """Return a stand-in for the novelyst user interface with one chapter."""
+    novel = Stub(scenes={}, chapters={'1': Stub(srtScenes=[])})
+    for i, text in enumerate(texts):
+        scId = str(i + 1)
+        novel.scenes[scId] = Stub(title=f'Scene {scId}', sceneContent=text, scType=0, status=1, characters=[])
+        novel.chapters['1'].srtScenes.append(scId)
+    return Stub(novel=novel, tv=TreeStub(novel, capacity), isModified=False)
+
+
+class TextTest(unittest.TestCase):
+    """Test changing the texts without committing."""
+
+    def setUp(self):
+        self.ui = make_ui(['one', None])
+        self.batch = SceneBatch(self.ui)
+
+    def test_get_text(self):
+        self.assertEqual(self.batch.get_text('1'), 'one')
+        self.assertEqual(self.batch.get_text('2'), '')
+
+    def test_set_text(self):
+        self.batch.set_text('1', 'changed')
+        self.assertEqual(self.batch.get_text('1'), 'changed')
+        self.assertEqual(self.batch.changes, {'1': 'changed'})
+        self.assertEqual(self.ui.novel.scenes['1'].sceneContent, 'one')
+
+    def test_set_unchanged_text(self):
+        self.batch.set_text('1', 'changed')
+        self.batch.set_text('1', 'one')
+        self.batch.set_text('2', '')
+        self.assertEqual(self.batch.changes, {})
+
+
+class CommitTest(unittest.TestCase):
+    """Test writing the changes to the scenes."""
+
+    def setUp(self):
+        self.ui = make_ui(['one', 'two', 'three'])
+        self.searchIndex = SearchIndexStub()
+        self.batch = SceneBatch(self.ui, self.searchIndex)
+
+    def test_commit(self):
+        self.batch.set_text('1', 'new one')
+        self.batch.set_text('3', 'new three')
+        self.assertEqual(sorted(self.batch.commit()), ['1', '3'])
+        scenes = self.ui.novel.scenes
+        self.assertEqual([scenes[scId].sceneContent for scId in '123'], ['new one', 'two', 'new three'])
+        self.assertEqual(sorted(self.searchIndex.updated), ['1', '3'])
+        self.assertTrue(self.ui.isModified)
+        self.assertEqual(self.batch.changes, {})
+
+    def test_commit_nothing(self):
+        self.batch.set_text('2', 'two')
+        self.assertEqual(self.batch.commit(), [])
+        self.assertFalse(self.ui.isModified)
+        self.assertEqual(self.searchIndex.updated, [])
+
+    def test_commit_without_search_index(self):
+        batch = SceneBatch(self.ui)
+        batch.set_text('2', 'new two')
+        self.assertEqual(batch.commit(), ['2'])
+        self.assertEqual(self.ui.novel.scenes['2'].sceneContent, 'new two')
+
+
+class CountWordsTest(unittest.TestCase):
+    """Test counting words, including uncommitted changes."""
+
+    def setUp(self):
+        self.ui = make_ui(['one two', '[i]three[/i] /* comment */', None])
+        self.batch = SceneBatch(self.ui)
+
+    def test_all_scenes(self):
+        self.assertEqual(self.batch.count_words(), {'1': 2, '2': 1, '3': 0})
+
+    def test_selected_scenes(self):
+        self.assertEqual(self.batch.count_words(['2']), {'2': 1})
+
+    def test_uncommitted_changes(self):
+        self.batch.set_text('3', 'four five six')
+        self.assertEqual(self.batch.count_words(), {'1': 2, '2': 1, '3': 3})
+
+
+class InsertPartsTest(unittest.TestCase):
+    """Test moving parts of a scene into new scenes."""
+
+    def setUp(self):
+        self.ui = make_ui(['one', 'two'])
+        scene = self.ui.novel.scenes['1']
+        scene.scType = 2
+        scene.status = 3
+        scene.characters = ['cr1', 'cr2']
+        self.batch = SceneBatch(self.ui)
+
+    def test_insert_parts(self):
+        newIds = self.batch.insert_parts('1', ['first \n', '\nsecond', ' third\n'])
+        self.assertEqual(newIds, ['3', '4'])
+        self.assertEqual(self.ui.novel.chapters['1'].srtScenes, ['1', '3', '4', '2'])
+        self.assertEqual(self.ui.tv.calls, [('Sc1', True), ('Sc3', True)])
+        self.assertEqual(self.batch.changes, {'1': 'first', '3': 'second', '4': 'third'})
+        for scId in newIds:
+            scene = self.ui.novel.scenes[scId]
+            self.assertEqual((scene.scType, scene.status, scene.characters), (2, 3, ['cr1']))
+            self.assertIsNone(scene.sceneContent)
+
+    def test_last_scene_takes_the_rest(self):
+        self.ui.tv.capacity = 1
+        newIds = self.batch.insert_parts('1', ['first ', 'second ', 'third'])
+        self.assertEqual(newIds, ['3'])
+        self.assertEqual(self.batch.changes, {'1': 'first', '3': 'second third'})
+
+    def test_no_scene_added(self):
+        self.ui.tv.capacity = 0
+        self.assertEqual(self.batch.insert_parts('1', ['first', 'second']), [])
+        self.assertEqual(self.batch.changes, {})
+
+    def test_without_characters(self):
+        self.ui.novel.scenes['1'].characters = []
+        newIds = self.batch.insert_parts('1', ['first', 'second'])
+        self.assertEqual(self.ui.novel.scenes[newIds[0]].characters, [])
+
+    def test_split_scene(self):
+        self.ui.novel.scenes['2'].sceneContent = 'one two three'
+        self.assertEqual(self.batch.split_scene('2', [4, 8]), ['3', '4'])
+        self.assertEqual(self.batch.changes, {'2': 'one', '3': 'two', '4': 'three'})
+
+    def test_split_scene_without_offsets(self):
+        self.assertEqual(self.batch.split_scene('2', [0, 3]), [])
+        self.assertEqual(self.ui.tv.calls, [])
+
+
+class FormatTest(unittest.TestCase):
+    """Test formatting and normalizing whole scenes."""
+
+    def setUp(self):
+        self.ui = make_ui(['one [i]two[/i]', '[b]three[/b]', None])
+        self.batch = SceneBatch(self.ui)
+
+    def test_set_format(self):
+        self.batch.set_format(tag='i')
+        self.assertEqual(self.batch.changes, {'1': '[i]one two[/i]', '2': '[i][b]three[/b][/i]'})
+
+    def test_set_format_plain(self):
+        self.batch.set_format(['2'])
+        self.assertEqual(self.batch.changes, {'2': 'three'})
+
+    def test_normalize_markup(self):
+        self.ui.novel.scenes['2'].sceneContent = '[b]three [/b][b]four[/b]'
+        self.batch.normalize_markup()
+        self.assertEqual(self.batch.changes, {'2': '[b]three four[/b]'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""Test the novelyst editor's crash recovery journal.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.scene_journal import SceneJournal
+from nveditorlib.scene_journal import discard_orphaned
+from nveditorlib.scene_journal import get_journal_path
+from nveditorlib.scene_journal import recover
+
+PROJECT = '/home/user/novel.yw7'
+
+
+class WidgetStub:
+    """Stand-in for the tkinter widget, running the scheduled jobs on request."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._nextJob = 0
+
+    def after(self, ms, func):
+        self._nextJob += 1
+        self.jobs[self._nextJob] = func
+        return self._nextJob
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+    def run_jobs(self):
+        jobs = list(self.jobs.values())
+        self.jobs.clear()
+        for func in jobs:
+            func()
+
+
+class JournalTestCase(unittest.TestCase):
+    """Provide a temporary journal directory."""
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.journalDir = f'{self.tempDir.name}/journal'
+        self.filePath = get_journal_path(self.journalDir, PROJECT, '1')
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def write_lines(self, *lines):
+        os.makedirs(self.journalDir, exist_ok=True)
+        with open(self.filePath, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+
+class JournalPathTest(unittest.TestCase):
+    """Test naming the journal files."""
+
+    def test_scenes(self):
+        self.assertNotEqual(get_journal_path('journal', PROJECT, '1'), get_journal_path('journal', PROJECT, '2'))
+
+    def test_projects(self):
+        self.assertNotEqual(get_journal_path('journal', PROJECT, '1'), get_journal_path('journal', '/other.yw7', '1'))
+        self.assertEqual(get_journal_path('journal', PROJECT, '1'), get_journal_path('journal', PROJECT, '1'))
+
+
+class WriteTest(JournalTestCase):
+    """Test logging the modifications."""
+
+    def setUp(self):
+        super().setUp()
+        self.widget = WidgetStub()
+        self.journal = SceneJournal(self.widget, self.filePath, 'one\ntwo', 2000)
+
+    def tearDown(self):
+        self.journal.discard()
+        super().tearDown()
+
+    def test_nothing_written_before_modification(self):
+        self.assertFalse(os.path.exists(self.filePath))
+        self.assertEqual(self.widget.jobs, {})
+        self.assertIsNone(recover(self.filePath))
+
+    def test_written_after_interval(self):
+        self.journal.insert('1.3', ' more')
+        self.journal.insert('1.8', '!')
+        self.assertEqual(len(self.widget.jobs), 1)
+        self.assertFalse(os.path.exists(self.filePath))
+        self.widget.run_jobs()
+        self.assertEqual(recover(self.filePath), 'one more!\ntwo')
+
+    def test_modifications(self):
+        self.journal.insert('2.3', '\nthree')
+        self.journal.delete('1.1', '2.1')
+        self.journal.insert('1.0', 'N')
+        self.journal.flush()
+        self.assertEqual(self.widget.jobs, {})
+        self.assertEqual(recover(self.filePath), 'Nowo\nthree')
+
+    def test_appending(self):
+        self.journal.insert('1.0', 'a')
+        self.journal.flush()
+        self.journal.insert('1.1', 'b')
+        self.journal.flush()
+        self.assertEqual(recover(self.filePath), 'abone\ntwo')
+
+    def test_compact(self):
+        self.journal.insert('1.0', 'a')
+        self.journal.flush()
+        self.journal.compact('applied')
+        with open(self.filePath, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '["s", "applied"]\n')
+        self.journal.delete('1.0', '1.1')
+        self.journal.flush()
+        self.assertEqual(recover(self.filePath), 'pplied')
+
+    def test_discard(self):
+        self.journal.insert('1.0', 'a')
+        self.journal.discard()
+        self.assertEqual(self.widget.jobs, {})
+        self.assertFalse(os.path.exists(self.filePath))
+        self.journal.flush()
+        self.assertFalse(os.path.exists(self.filePath))
+
+    def test_directory_not_writable(self):
+        journal = SceneJournal(self.widget, f'{self.filePath}/sub/1.jsonl', '', 2000)
+        self.journal.insert('1.0', 'a')
+        self.journal.flush()
+        journal.insert('1.0', 'a')
+        journal.flush()
+        self.assertIsNone(recover(f'{self.filePath}/sub/1.jsonl'))
+
+
+class RecoverTest(JournalTestCase):
+    """Test reconstructing the text from a journal file."""
+
+    def test_no_journal(self):
+        self.assertIsNone(recover(self.filePath))
+
+    def test_truncated_last_line(self):
+        self.write_lines('["s", "one"]\n', '["i", "1.3", " two"]\n', '["i", "1.7", " thr')
+        self.assertEqual(recover(self.filePath), 'one two')
+
+    def test_truncated_snapshot(self):
+        self.write_lines('["s", "on')
+        self.assertIsNone(recover(self.filePath))
+
+    def test_missing_snapshot(self):
+        self.write_lines('["i", "1.0", "text"]\n')
+        self.assertIsNone(recover(self.filePath))
+
+    def test_indices_behind_the_text(self):
+        self.write_lines('["s", "one\\ntwo"]\n', '["i", "1.99", "!"]\n', '["i", "9.0", "?"]\n', '["d", "2.1", "9.9"]\n')
+        self.assertEqual(recover(self.filePath), 'one!\nt')
+
+    def test_line_breaks(self):
+        self.write_lines('["s", ""]\n', '["i", "1.0", "a\\nb\\n"]\n', '["i", "3.0", "c"]\n', '["d", "1.1", "2.0"]\n')
+        self.assertEqual(recover(self.filePath), 'ab\nc')
+
+
+class OrphanedJournalTest(JournalTestCase):
+    """Test deleting the journals of scenes that no longer exist."""
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.journalDir)
+        self.paths = {}
+        for projectPath, scId in ((PROJECT, '1'), (PROJECT, '2'), (PROJECT, '12'), ('/other.yw7', '2')):
+            filePath = get_journal_path(self.journalDir, projectPath, scId)
+            with open(filePath, 'w', encoding='utf-8') as f:
+                f.write('["s", "text"]\n')
+            self.paths[projectPath, scId] = filePath
+
+    def test_deleted_scene(self):
+        discard_orphaned(self.journalDir, PROJECT, {'1': None, '12': None})
+        self.assertFalse(os.path.exists(self.paths[PROJECT, '2']))
+        self.assertEqual(recover(self.paths[PROJECT, '1']), 'text')
+        self.assertEqual(recover(self.paths[PROJECT, '12']), 'text')
+        self.assertEqual(recover(self.paths['/other.yw7', '2']), 'text')
+
+    def test_new_scene_with_the_deleted_id(self):
+        discard_orphaned(self.journalDir, PROJECT, ['1', '12'])
+        self.assertIsNone(recover(get_journal_path(self.journalDir, PROJECT, '2')))
+
+    def test_no_journal_directory(self):
+        discard_orphaned(f'{self.journalDir}/missing', PROJECT, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Test the novelyst editor's project-wide search index.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.search_index import SearchIndex
+from nveditorlib.search_index import get_unpaired_tags
+
+
+class Stub:
+    """Generic stand-in for novelyst objects."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def make_ui(texts):
+    """Return a stand-in for the novelyst user interface with one chapter."""
+    novel = Stub(scenes={}, chapters={'1': Stub(srtScenes=[])}, srtChapters=['1'])
+    for i, text in enumerate(texts):
+        scId = str(i + 1)
+        novel.scenes[scId] = Stub(sceneContent=text, doNotExport=False)
+        novel.chapters['1'].srtScenes.append(scId)
+    return Stub(novel=novel)
+
+
+class FindTest(unittest.TestCase):
+    """Test finding matches in the scene contents."""
+
+    def setUp(self):
+        self.ui = make_ui(['A dark night.', 'It was a dark [i]night[/i].', None, 'Dark NIGHT'])
+        self.searchIndex = SearchIndex(self.ui)
+
+    def find(self, pattern, **kwargs):
+        return [(scId, text[start:end]) for scId, start, end, __, text in self.searchIndex.find(pattern, **kwargs)]
+
+    def test_plain(self):
+        self.assertEqual(self.find('dark night'), [('1', 'dark night'), ('4', 'Dark NIGHT')])
+
+    def test_match_case(self):
+        self.assertEqual(self.find('dark night', matchCase=True), [('1', 'dark night')])
+
+    def test_ignore_markup(self):
+        self.assertEqual(self.find('dark night', ignoreMarkup=True),
+                         [('1', 'dark night'), ('2', 'dark [i]night'), ('4', 'Dark NIGHT')])
+
+    def test_regex(self):
+        self.assertEqual(self.find('d\\w+', regex=True, matchCase=True), [('1', 'dark'), ('2', 'dark')])
+
+    def test_unused_scenes(self):
+        self.ui.novel.scenes['4'].doNotExport = True
+        self.assertEqual(self.find('night'), [('1', 'night'), ('2', 'night')])
+
+    def test_changed_scene(self):
+        # The offsets refer to the text yielded with the match, even if the scene changes meanwhile.
+        search = self.searchIndex.find('night')
+        scId, start, end, __, text = next(search)
+        self.ui.novel.scenes[scId].sceneContent = 'Night after night.'
+        self.assertEqual(text[start:end], 'night')
+        self.assertEqual(text, 'A dark night.')
+
+    def test_update(self):
+        self.assertEqual(self.find('morning'), [])
+        self.ui.novel.scenes['3'].sceneContent = 'In the morning.'
+        self.searchIndex.update('3')
+        self.assertEqual(self.find('morning'), [('3', 'morning')])
+
+
+class UnpairedTagsTest(unittest.TestCase):
+    """Test finding the tags whose partners are outside a passage."""
+
+    def test_no_tags(self):
+        self.assertEqual(get_unpaired_tags('dark night'), ('', ''))
+
+    def test_paired_tags(self):
+        self.assertEqual(get_unpaired_tags('dark [i]night[/i]'), ('', ''))
+
+    def test_unpaired_tags(self):
+        self.assertEqual(get_unpaired_tags('dark [i]night'), ('[i]', ''))
+        self.assertEqual(get_unpaired_tags('dark[/i] night'), ('', '[/i]'))
+        self.assertEqual(get_unpaired_tags('a[/i] b [b]c'), ('[b]', '[/i]'))
+
+    def test_nested_tags(self):
+        self.assertEqual(get_unpaired_tags('[i]a [i]b[/i]'), ('[i]', ''))
+        self.assertEqual(get_unpaired_tags('[b]a [i]b[/b]'), ('[i]', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Test the novelyst editor plugin settings migration and validation.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.settings_schema import SETTINGS_VERSION
+from nveditorlib.settings_schema import migrate_settings
+from nveditorlib.settings_schema import validate_settings
+
+DEFAULTS = dict(
+    window_geometry='600x800',
+    color_bg_light='antique white',
+    font_family='Courier',
+    font_size=12,
+    margin_x=40,
+    undo_budget=1000000,
+    undo_grouping='word',
+    settings_version=0,
+    live_wordcount=False,
+    )
+
+
+class ValidateSettingsTest(unittest.TestCase):
+    """Test converting and checking the settings read from the configuration file."""
+
+    def validate(self, **values):
+        return validate_settings(values, DEFAULTS)
+
+    def test_missing_settings(self):
+        self.assertEqual(self.validate(), DEFAULTS)
+
+    def test_unknown_settings(self):
+        self.assertNotIn('unknown', self.validate(unknown='1'))
+
+    def test_type_coercion(self):
+        settings = self.validate(font_size='14', font_family='  Arial ', live_wordcount=True)
+        self.assertEqual(settings['font_size'], 14)
+        self.assertEqual(settings['font_family'], 'Arial')
+        self.assertIs(settings['live_wordcount'], True)
+
+    def test_invalid_types(self):
+        settings = self.validate(font_size='large', margin_x=None, live_wordcount='Yes')
+        self.assertEqual(settings['font_size'], 12)
+        self.assertEqual(settings['margin_x'], 40)
+        self.assertIs(settings['live_wordcount'], False)
+
+    def test_ranges(self):
+        self.assertEqual(self.validate(font_size='1')['font_size'], 1)
+        self.assertEqual(self.validate(font_size='200')['font_size'], 200)
+        self.assertEqual(self.validate(font_size='0')['font_size'], 12)
+        self.assertEqual(self.validate(font_size='201')['font_size'], 12)
+        self.assertEqual(self.validate(margin_x='-1')['margin_x'], 40)
+
+    def test_open_range(self):
+        self.assertEqual(self.validate(undo_budget='0')['undo_budget'], 0)
+        self.assertEqual(self.validate(undo_budget='99999999999')['undo_budget'], 99999999999)
+        self.assertEqual(self.validate(undo_budget='-1')['undo_budget'], 1000000)
+
+    def test_choices(self):
+        self.assertEqual(self.validate(undo_grouping='sentence')['undo_grouping'], 'sentence')
+        self.assertEqual(self.validate(undo_grouping='paragraph')['undo_grouping'], 'word')
+
+    def test_patterns(self):
+        for geometry in ('800x600', '800x600+10+20', '800x600-10-20', '800x600+-10+-20'):
+            self.assertEqual(self.validate(window_geometry=geometry)['window_geometry'], geometry)
+        for geometry in ('800', '800x', 'x600', '800x600+10', 'wide'):
+            self.assertEqual(self.validate(window_geometry=geometry)['window_geometry'], '600x800')
+
+    def test_empty_string(self):
+        self.assertEqual(self.validate(font_family='  ')['font_family'], 'Courier')
+
+    def test_former_defaults_are_valid(self):
+        self.assertEqual(self.validate(color_bg_light='black')['color_bg_light'], 'black')
+
+
+class MigrateSettingsTest(unittest.TestCase):
+    """Test updating the settings of earlier versions."""
+
+    def test_unversioned_settings(self):
+        settings = migrate_settings(dict(color_bg_light='black', color_fg_bright='white', font_size='14'))
+        self.assertEqual(settings, dict(font_size='14', settings_version=SETTINGS_VERSION))
+
+    def test_changed_colors_are_kept(self):
+        settings = migrate_settings(dict(color_bg_light='navy'))
+        self.assertEqual(settings['color_bg_light'], 'navy')
+
+    def test_migration_is_done_once(self):
+        settings = migrate_settings(dict(color_bg_light='black', settings_version=str(SETTINGS_VERSION)))
+        self.assertEqual(settings['color_bg_light'], 'black')
+
+    def test_invalid_version(self):
+        settings = migrate_settings(dict(color_bg_light='black', settings_version='new'))
+        self.assertNotIn('color_bg_light', settings)
+        self.assertEqual(settings['settings_version'], SETTINGS_VERSION)
+
+    def test_values_are_not_changed(self):
+        values = dict(color_bg_light='black')
+        migrate_settings(values)
+        self.assertEqual(values, dict(color_bg_light='black'))
+
+    def test_migrated_and_validated(self):
+        settings = validate_settings(migrate_settings(dict(color_bg_light='black', settings_version='0')), DEFAULTS)
+        self.assertEqual(settings['color_bg_light'], 'antique white')
+        self.assertEqual(settings['settings_version'], SETTINGS_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
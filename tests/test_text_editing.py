@@ -0,0 +1,151 @@
+"""Test the novelyst editor's Tk-independent editing operations.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.text_editing import normalize_markup
+from nveditorlib.text_editing import remove_format
+from nveditorlib.text_editing import split_text
+from nveditorlib.text_editing import toggle_format
+
+
+class NormalizeMarkupTest(unittest.TestCase):
+    """Test collapsing redundant markup, keeping the formatting."""
+
+    def test_no_markup(self):
+        self.assertEqual(normalize_markup('plain  \n\ntext \n'), 'plain\n\ntext')
+
+    def test_nested_and_duplicate_tags(self):
+        self.assertEqual(normalize_markup('[i][i]nested[/i][/i]'), '[i]nested[/i]')
+        self.assertEqual(normalize_markup('[b][i]x[/i][/b][i]y[/i]'), '[i][b]x[/b]y[/i]')
+
+    def test_adjacent_passages(self):
+        self.assertEqual(normalize_markup('[i]one[/i][i] two[/i]'), '[i]one two[/i]')
+        self.assertEqual(normalize_markup('[i]one [/i] [i]two[/i]'), '[i]one  two[/i]')
+
+    def test_empty_pairs(self):
+        self.assertEqual(normalize_markup('[i][/i]text[b][/b]'), 'text')
+        self.assertEqual(normalize_markup('\n\n[b] [/b]\nx\n\n'), 'x')
+
+    def test_tags_across_lines(self):
+        self.assertEqual(normalize_markup('[i]open\nnext line[/i]'), '[i]open[/i]\n[i]next line[/i]')
+
+    def test_unclosed_tag(self):
+        self.assertEqual(normalize_markup('[i]open'), '[i]open[/i]')
+
+    def test_stray_closing_tag(self):
+        self.assertEqual(normalize_markup('stray[/b] end'), '[b]stray[/b] end')
+
+    def test_comments(self):
+        self.assertEqual(normalize_markup('a [i]/* note */[/i] b'), 'a [i]/* note */[/i] b')
+        self.assertEqual(normalize_markup('/* [i] */ x'), '/* [i] */ x')
+        self.assertEqual(normalize_markup('[i]a /* c [/i] */ b[/i]'), '[i]a /* c [/i] */ b[/i]')
+
+    def test_quote_prefix(self):
+        self.assertEqual(normalize_markup('> [i]quoted[/i]'), '> [i]quoted[/i]')
+        self.assertEqual(normalize_markup('>  [b]quote [/b]'), '>  [b]quote[/b]')
+
+    def test_no_new_quotes(self):
+        self.assertEqual(normalize_markup('[i][/i]> not a quote'), '[i][/i]> not a quote')
+        self.assertEqual(normalize_markup('[/b]>   /* c */'), '[b][/b]>   /* c */')
+        self.assertEqual(normalize_markup('[i]a\n[/i]> b'), '[i]a[/i]\n[i][/i]> b')
+        self.assertEqual(normalize_markup('[i] [/i]> x'), ' > x')
+
+    def test_white_space(self):
+        self.assertEqual(normalize_markup('[i] one [/i]two'), ' [i]one[/i] two')
+        self.assertEqual(normalize_markup('[b]end [/b]  '), '[b]end[/b]')
+
+    def test_idempotent(self):
+        for text in ('[i][i]a[/i] [b]b\nc[/b][/i] d[/b]', '[/i]> x', ' [i] a [/i] '):
+            normalized = normalize_markup(text)
+            self.assertEqual(normalize_markup(normalized), normalized)
+
+
+class RemoveFormatTest(unittest.TestCase):
+    """Test removing the markup of given tags."""
+
+    def test_no_tags(self):
+        self.assertEqual(remove_format('[i]text[/i]'), '[i]text[/i]')
+
+    def test_unknown_tag(self):
+        self.assertEqual(remove_format('[i]text[/i]', 'u'), '[i]text[/i]')
+
+    def test_pairs(self):
+        self.assertEqual(remove_format('[i]one[/i] two [i]three[/i]', 'i'), 'one two three')
+
+    def test_other_tags_are_kept(self):
+        self.assertEqual(remove_format('[i][b]text[/b][/i]', 'i'), '[b]text[/b]')
+
+    def test_all_tags_in_one_pass(self):
+        self.assertEqual(remove_format('[i][b]text[/b][/i] [b]x[/b]', 'i', 'b'), 'text x')
+
+    def test_unpaired_tags_are_kept(self):
+        self.assertEqual(remove_format('[i]one[/i] two[/i]', 'i'), 'one two[/i]')
+        self.assertEqual(remove_format('[i]one[/i] [i]two', 'i'), 'one [i]two')
+
+    def test_closing_before_opening(self):
+        self.assertEqual(remove_format('one[/i] [i]two', 'i'), 'one[/i] [i]two')
+        self.assertEqual(remove_format('[i]one[/i] two[/i] [i]three', 'i'), 'one two[/i] [i]three')
+
+    def test_comments_are_kept(self):
+        self.assertEqual(remove_format('[i]one /* two */[/i]', 'i'), 'one /* two */')
+
+
+class ToggleFormatTest(unittest.TestCase):
+    """Test formatting a selection."""
+
+    def test_add_markup(self):
+        self.assertEqual(toggle_format('text', 'i'), '[i]text[/i]')
+
+    def test_remove_markup(self):
+        self.assertEqual(toggle_format('[i]text[/i]', 'i'), 'text')
+
+    def test_no_nesting(self):
+        self.assertEqual(toggle_format('[i]one[/i] two', 'i'), '[i]one two[/i]')
+        self.assertEqual(toggle_format('one [i]two[/i] three', 'i'), '[i]one two three[/i]')
+
+    def test_other_tags_are_nested(self):
+        self.assertEqual(toggle_format('[b]text[/b]', 'i'), '[i][b]text[/b][/i]')
+
+    def test_plain(self):
+        self.assertEqual(toggle_format('[i]one[/i] [b]two[/b]'), 'one two')
+        self.assertEqual(toggle_format('[i]one[/i] [b]two[/b]', ''), 'one two')
+
+    def test_empty(self):
+        self.assertEqual(toggle_format('', 'b'), '[b][/b]')
+        self.assertEqual(toggle_format(''), '')
+
+
+class SplitTextTest(unittest.TestCase):
+    """Test splitting a text at character offsets."""
+
+    def test_no_offsets(self):
+        self.assertEqual(split_text('text', []), ['text'])
+
+    def test_offsets(self):
+        self.assertEqual(split_text('one two three', [4, 8]), ['one ', 'two ', 'three'])
+
+    def test_unsorted_and_duplicate_offsets(self):
+        self.assertEqual(split_text('abcdef', (3, 1, 3)), ['a', 'bc', 'def'])
+
+    def test_offsets_at_the_edges(self):
+        self.assertEqual(split_text('abcdef', [0, 6, 10, -1]), ['abcdef'])
+        self.assertEqual(split_text('abcdef', [0, 2, 6]), ['ab', 'cdef'])
+
+    def test_empty_text(self):
+        self.assertEqual(split_text('', [0, 1]), [''])
+
+    def test_parts_join_to_the_text(self):
+        text = 'line one\n[i]line two[/i]\nline three'
+        self.assertEqual(''.join(split_text(text, range(len(text)))), text)
+        self.assertEqual(len(split_text(text, range(len(text)))), len(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
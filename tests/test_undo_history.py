@@ -0,0 +1,186 @@
+"""Test the novelyst editor's undo history.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.undo_history import UndoHistory
+from nveditorlib.undo_history import get_end_index
+
+
+def type_text(history, text, index='1.0'):
+    """Record typing a text character by character; return the index behind it."""
+    for character in text:
+        history.insert(index, character)
+        index = get_end_index(index, character)
+    return index
+
+
+def texts(steps):
+    """Return the texts of the steps."""
+    return [text for __, __, text in steps]
+
+
+class EndIndexTest(unittest.TestCase):
+    """Test calculating the index behind an inserted text."""
+
+    def test_single_line(self):
+        self.assertEqual(get_end_index('3.4', 'abc'), '3.7')
+
+    def test_line_breaks(self):
+        self.assertEqual(get_end_index('3.4', 'ab\ncd\nefg'), '5.3')
+        self.assertEqual(get_end_index('3.4', 'ab\n'), '4.0')
+
+
+class GroupingTest(unittest.TestCase):
+    """Test merging the steps typed in a row into groups."""
+
+    def test_words(self):
+        history = UndoHistory(1000000)
+        type_text(history, 'one two  three')
+        self.assertEqual(texts(history.undo()), ['three'])
+        self.assertEqual(texts(history.undo()), ['two  '])
+        self.assertEqual(texts(history.undo()), ['one '])
+        self.assertIsNone(history.undo())
+
+    def test_sentences(self):
+        history = UndoHistory(1000000, 'sentence')
+        type_text(history, 'One two. "Three?" Four five\nSix')
+        self.assertEqual(texts(history.undo()), ['Six'])
+        self.assertEqual(texts(history.undo()), ['Four five\n'])
+        self.assertEqual(texts(history.undo()), ['"Three?" '])
+        self.assertEqual(texts(history.undo()), ['One two. '])
+
+    def test_abbreviation_without_space(self):
+        history = UndoHistory(1000000, 'sentence')
+        type_text(history, 'e.g.x y')
+        self.assertEqual(texts(history.undo()), ['e.g.x y'])
+
+    def test_deleting(self):
+        history = UndoHistory(1000000)
+        type_text(history, 'one two')
+        history.separate()
+        # Backspace twice, then delete forward twice.
+        history.delete('1.6', 'o')
+        history.delete('1.5', 'w')
+        history.delete('1.1', 'n')
+        history.delete('1.1', 'e')
+        self.assertEqual(history.undo(), [['i', '1.1', 'ne']])
+        self.assertEqual(history.undo(), [['i', '1.5', 'wo']])
+
+    def test_not_adjacent(self):
+        history = UndoHistory(1000000)
+        history.insert('1.0', 'a')
+        history.insert('2.0', 'b')
+        self.assertEqual(history.undo(), [['d', '2.0', 'b']])
+
+    def test_separate(self):
+        history = UndoHistory(1000000)
+        type_text(history, 'ab')
+        history.separate()
+        type_text(history, 'cd', '1.2')
+        self.assertEqual(texts(history.undo()), ['cd'])
+
+    def test_replace(self):
+        history = UndoHistory(1000000)
+        type_text(history, 'one')
+        history.replace('1.0', 'one', 'two')
+        self.assertEqual(history.undo(), [['d', '1.0', 'two'], ['i', '1.0', 'one']])
+        self.assertEqual(texts(history.undo()), ['one'])
+
+
+class UndoRedoTest(unittest.TestCase):
+    """Test reverting and repeating groups."""
+
+    def setUp(self):
+        self.history = UndoHistory(1000000)
+        type_text(self.history, 'one two')
+
+    def test_undo_then_redo(self):
+        self.assertEqual(self.history.undo(), [['d', '1.4', 'two']])
+        self.assertTrue(self.history.can_redo())
+        self.assertEqual(self.history.redo(), [['i', '1.4', 'two']])
+        self.assertFalse(self.history.can_redo())
+        self.assertEqual(self.history.undo(), [['d', '1.4', 'two']])
+
+    def test_no_merging_after_redo(self):
+        self.history.undo()
+        self.history.redo()
+        self.history.insert('1.7', 's')
+        self.assertEqual(texts(self.history.undo()), ['s'])
+
+    def test_new_change_clears_redo(self):
+        size = self.history.size
+        self.history.undo()
+        self.assertEqual(self.history.size, size)
+        self.history.insert('1.4', 'x')
+        self.assertFalse(self.history.can_redo())
+        self.assertIsNone(self.history.redo())
+        self.assertLess(self.history.size, size)
+
+    def test_clear(self):
+        self.history.undo()
+        self.history.clear()
+        self.assertFalse(self.history.can_undo())
+        self.assertFalse(self.history.can_redo())
+        self.assertEqual(self.history.size, 0)
+
+
+class BudgetTest(unittest.TestCase):
+    """Test dropping the oldest groups when the budget is exceeded."""
+
+    def test_size(self):
+        history = UndoHistory(1000000)
+        type_text(history, 'one')
+        small = history.size
+        type_text(history, 'ne' * 1000, '1.3')
+        self.assertGreater(history.size, small + 1900)
+
+    def test_oldest_groups_are_dropped(self):
+        history = UndoHistory(0)
+        history.insert('1.0', 'x')
+        self.assertFalse(history.can_undo())
+        self.assertEqual(history.size, 0)
+
+        history = UndoHistory(1000)
+        for line in range(1, 21):
+            history.replace(f'{line}.0', '', 'x' * 20)
+        self.assertLessEqual(history.size, 1000)
+        self.assertTrue(history.can_undo())
+        undone = []
+        while history.can_undo():
+            undone.append(history.undo()[0][1])
+        self.assertEqual(undone[0], '20.0')
+        self.assertNotIn('1.0', undone)
+
+    def test_merged_step_exceeding_the_budget(self):
+        history = UndoHistory(2000)
+        type_text(history, 'a' * 3000)
+        # When the growing step is dropped, the next character begins a new group.
+        self.assertLessEqual(history.size, 2000)
+        self.assertLess(len(history.undo()[0][2]), 2000)
+        self.assertFalse(history.can_undo())
+
+    def test_redo_groups_count(self):
+        history = UndoHistory(1000)
+        for line in range(1, 4):
+            history.replace(f'{line}.0', '', 'x' * 20)
+        size = history.size
+        while history.can_undo():
+            history.undo()
+        self.assertEqual(history.size, size)
+        history.redo()
+        history.insert('5.0', 'y' * 2000)
+        # The new group exceeds the budget on its own, and the groups to redo are gone.
+        self.assertFalse(history.can_redo())
+        self.assertFalse(history.can_undo())
+        self.assertEqual(history.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Regression test for the novelyst editor word and character counting.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import random
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.word_counter import WordCounter
+from nveditorlib.word_counter import count_characters
+from nveditorlib.word_counter import count_words
+
+GOLDEN = [
+    # (text, words, characters, characters without spaces)
+    ('', 0, 0, 0),
+    ('One two three.', 3, 14, 12),
+    ('  leading and trailing  ', 3, 24, 18),
+    ('line one\nline two\n', 4, 16, 14),
+    ('tab\tseparated\twords', 3, 19, 17),
+    ('non\u00a0breaking space', 3, 18, 16),
+    # Markup
+    ('[i]italic[/i] and [b]bold[/b]', 3, 15, 13),
+    ('[i]', 0, 0, 0),
+    ('[i] [/i]', 0, 1, 0),
+    ('it[i]al[/i]ic', 1, 6, 6),
+    ('[unknown tag] word', 1, 5, 4),
+    ('[ spaced ]word', 1, 4, 4),
+    ('[[i]]', 1, 1, 1),
+    ('[not closed', 2, 11, 10),
+    ('[i]line\nbreak[/i]', 2, 9, 9),
+    ('[i\n]', 2, 3, 3),
+    # Comments
+    ('/* comment */ text', 1, 5, 4),
+    ('text /* comment */', 1, 5, 4),
+    ('a/* x */b', 1, 2, 2),
+    ('/**/', 1, 4, 4),
+    ('/* open comment', 3, 15, 13),
+    ('/* first */ and /* second */', 1, 5, 3),
+    ('/* multi\nline */', 4, 15, 13),
+    ('[i]/* comment */[/i]', 0, 0, 0),
+    ('/* [i] */ x', 1, 2, 1),
+    # Leading quote marks
+    ('> quoted', 1, 7, 6),
+    ('>quoted', 1, 6, 6),
+    ('> one\n> two', 2, 8, 6),
+    ('not > quoted', 3, 12, 10),
+    ('>', 0, 0, 0),
+    ('>>', 1, 1, 1),
+    (' > indented', 2, 11, 9),
+    ('[i]> x[/i]', 2, 3, 2),
+    # Dashes and hyphens
+    ('well-known', 1, 10, 10),
+    ('one--two', 2, 8, 8),
+    ('one---two', 2, 9, 9),
+    ('one—two–three', 3, 13, 13),
+    ('- item', 1, 6, 5),
+    ('-', 0, 1, 1),
+    ('- - -', 0, 5, 3),
+    ('x-[i]y[/i]', 1, 3, 3),
+    ]
+
+
+def count_words_former(text):
+    """Return the word count the way the former substitutions did."""
+    text = re.sub('--|—|–', ' ', text)
+    text = re.sub(r'\[.+?\]|\/\*.+?\*\/|-|^\>', '', text, flags=re.MULTILINE)
+    return len(text.split())
+
+
+def count_characters_former(text, spaces=True):
+    """Return the character count the way the former substitution did; optionally remove white space afterwards."""
+    text = re.sub(r'\[.+?\]|\/\*.+?\*\/|^\>', '', text, flags=re.MULTILINE)
+    if not spaces:
+        return len(''.join(text.split()))
+
+    return len(text) - text.count('\n')
+
+
+def random_texts(count, seed=1):
+    """Return a list of random texts built from markup, comments, dashes, quote marks, and white space."""
+    pieces = ['a', 'bc', ' ', '\n', '\t', ' ', '-', '--', '—', '–', '[i]', '[/i]', '[b]', '[',
+              ']', '/*', '*/', '/', '*', '>', '> ', '.', 'ü']
+    generator = random.Random(seed)
+    return [''.join(generator.choice(pieces) for __ in range(generator.randint(0, 16))) for __ in range(count)]
+
+
+class GoldenTest(unittest.TestCase):
+    """Compare the counts with the expected values."""
+
+    def test_count_words(self):
+        for text, words, __, __ in GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(count_words(text), words)
+
+    def test_count_characters(self):
+        for text, __, characters, __ in GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(count_characters(text), characters)
+
+    def test_count_characters_without_spaces(self):
+        for text, __, __, characters in GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(count_characters(text, spaces=False), characters)
+
+    def test_word_counter(self):
+        text = '\n'.join(text for text, __, __, __ in GOLDEN)
+        self.assertEqual(WordCounter(text).total, sum(words for __, words, __, __ in GOLDEN))
+
+
+class FormerImplementationTest(unittest.TestCase):
+    """Compare the counts with the former substitution-based implementation."""
+
+    def test_golden_texts(self):
+        for text, __, __, __ in GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(count_words(text), count_words_former(text))
+                self.assertEqual(count_characters(text), count_characters_former(text))
+                self.assertEqual(count_characters(text, spaces=False), count_characters_former(text, spaces=False))
+
+    def test_random_texts(self):
+        for text in random_texts(20000):
+            self.assertEqual(count_words(text), count_words_former(text), repr(text))
+            self.assertEqual(count_characters(text), count_characters_former(text), repr(text))
+            self.assertEqual(count_characters(text, spaces=False), count_characters_former(text, spaces=False), repr(text))
+            self.assertEqual(WordCounter(text).total, count_words_former(text), repr(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Test the novelyst editor's project-wide word count index.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nveditorlib.wordcount_index import WordCountIndex
+
+
+class Stub:
+    """Generic stand-in for novelyst objects."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def make_ui():
+    """Return a stand-in for the novelyst user interface.
+    
+    Chapter 1 has two normal scenes and an unused one, 
+    chapter 2 has one normal scene, and chapter 3 is an unused chapter.
+    """
+    novel = Stub(
+        scenes={
+            '1': Stub(sceneContent='one two', scType=0),
+            '2': Stub(sceneContent='three', scType=0),
+            '3': Stub(sceneContent='not counted', scType=1),
+            '4': Stub(sceneContent='four five six', scType=0),
+            '5': Stub(sceneContent='unused chapter', scType=0),
+            },
+        chapters={
+            '1': Stub(srtScenes=['1', '2', '3'], chType=0),
+            '2': Stub(srtScenes=['4'], chType=0),
+            '3': Stub(srtScenes=['5'], chType=1),
+            },
+        srtChapters=['1', '2', '3'],
+        )
+    return Stub(novel=novel)
+
+
+class TotalsTest(unittest.TestCase):
+    """Test the chapter, project, and session word counts."""
+
+    def setUp(self):
+        self.ui = make_ui()
+        self.index = WordCountIndex(self.ui)
+
+    def test_totals(self):
+        self.assertEqual(self.index.get_totals('1'), (3, 6, 0))
+        self.assertEqual(self.index.get_totals('4'), (3, 6, 0))
+        self.assertEqual(self.index.get_totals('5'), (2, 6, 0))
+
+    def test_editing(self):
+        self.index.get_totals('1')
+        self.assertEqual(self.index.get_totals('1', 5), (6, 9, 3))
+        self.assertEqual(self.index.get_totals('1', 1), (2, 5, -1))
+        self.assertEqual(self.index.get_totals('2'), (2, 5, -1))
+
+    def test_editing_without_walking(self):
+        self.index.get_totals('1')
+        del self.ui.novel.srtChapters[:]
+        self.assertEqual(self.index.get_totals('1', 4), (5, 8, 2))
+
+    def test_scenes_not_counted(self):
+        self.index.get_totals('3')
+        self.assertEqual(self.index.get_totals('3', 10), (3, 6, 0))
+        self.assertEqual(self.index.get_totals('5', 10), (10, 6, 0))
+
+    def test_new_scene(self):
+        self.index.get_totals('1')
+        self.ui.novel.scenes['6'] = Stub(sceneContent='seven eight', scType=0)
+        self.ui.novel.chapters['2'].srtScenes.append('6')
+        self.assertEqual(self.index.get_totals('6'), (5, 8, 2))
+
+    def test_unknown_scene(self):
+        self.assertEqual(self.index.get_totals('99', 10), (0, 6, 0))
+
+    def test_refresh(self):
+        self.index.get_totals('1')
+        self.ui.novel.scenes['4'].sceneContent = 'four'
+        self.assertEqual(self.index.get_totals('1'), (3, 6, 0))
+        self.index.refresh()
+        self.assertEqual(self.index.get_totals('1'), (3, 4, -2))
+
+    def test_reset(self):
+        self.index.get_totals('1')
+        self.index.get_totals('1', 5)
+        self.index.reset()
+        self.ui.novel.scenes['2'].sceneContent = 'three four'
+        self.assertEqual(self.index.get_totals('1'), (4, 7, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+"""Benchmark the novelyst_editor hot paths with a synthetic novel.
+
+Usage: 
+benchmark_novelyst_editor.py [options]
+
+Options:
+    --scenes N       number of scenes (default: 50)
+    --words N        words per scene (default: 3000)
+    --markup D       share of words with italic/bold markup (default: 0.05)
+    --comments D     share of paragraphs with a comment (default: 0.1)
+    --repeat N       number of runs per benchmark (default: 5)
+    --seed N         random seed (default: 1)
+    --output FILE    write the JSON results to FILE instead of stdout
+    --baseline FILE  compare with the JSON results of a previous run
+    --tolerance T    relative slowdown reported as regression (default: 0.2)
+
+The widget benchmarks need a display. On a headless Linux system, 
+run the script with "xvfb-run". Without a display, only the pure 
+Python benchmarks are run: counting, the Tk-independent editing 
+functions, scene batches, searching, and statistics.
+
+Exit status is 1 if a regression compared to the baseline is found.
+
+Copyright (c) 2023 Peter Triesberger
+For further information see https://github.com/peter88213/novelyst_editor
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import os
+import sys
+import argparse
+import json
+import platform
+import random
+import time
+import tkinter as tk
+sys.path.insert(0, f'{os.getcwd()}/../src')
+from novelyst_editor import Plugin
+from novelyst_editor import SETTINGS
+from novelyst_editor import OPTIONS
+from nveditorlib.scene_editor import SceneEditor
+from nveditorlib.text_box import TextBox
+from nveditorlib.editor_style import EditorStyle
+from nveditorlib.word_counter import count_words
+from nveditorlib.word_counter import count_characters
+from nveditorlib.search_index import SearchIndex
+from nveditorlib.text_editing import YW_TAGS
+from nveditorlib.text_editing import remove_format
+from nveditorlib.scene_batch import SceneBatch
+from nveditorlib.manuscript_statistics import get_statistics
+
+SCENE_PREFIX = 'Sc'
+VOCABULARY = ('the', 'a', 'night', 'was', 'dark', 'and', 'stormy', 'she', 'said', 'never', 'well-known',
+              'rain', 'fell', 'in', 'torrents', 'except', 'at', 'occasional', 'intervals', 'when', 'it')
+
+
+class Stub:
+    """Generic stand-in for novelyst objects."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name):
+        # Ignore calls to methods not needed for benchmarking, e.g. menu commands.
+        return lambda *args, **kwargs: None
+
+
+class TreeStub(Stub):
+    """Stand-in for the novelyst tree view, providing the scene order."""
+
+    def __init__(self, scIds):
+        super().__init__(SCENE_PREFIX=SCENE_PREFIX)
+        self.nodes = [f'{SCENE_PREFIX}{scId}' for scId in scIds]
+        self.selected = self.nodes[0]
+        self.tree = Stub(selection=lambda: (self.selected,))
+
+    def next_node(self, thisNode, prevNode):
+        i = self.nodes.index(thisNode) + 1
+        if i < len(self.nodes):
+            return self.nodes[i]
+        return ''
+
+    def prev_node(self, thisNode, prevNode):
+        i = self.nodes.index(thisNode) - 1
+        if i >= 0:
+            return self.nodes[i]
+        return ''
+
+
+def make_scene_text(rnd, words, markup, comments):
+    """Return a synthetic scene text in yWriter markup."""
+    paragraphs = []
+    wordCount = 0
+    while wordCount < words:
+        paragraph = []
+        for __ in range(min(rnd.randint(20, 120), words - wordCount)):
+            word = rnd.choice(VOCABULARY)
+            if rnd.random() < markup:
+                tag = rnd.choice(('i', 'b'))
+                word = f'[{tag}]{word}[/{tag}]'
+            paragraph.append(word)
+        wordCount += len(paragraph)
+        if rnd.random() < comments:
+            paragraph.insert(rnd.randint(0, len(paragraph)), '/* This is a comment. */')
+        paragraphs.append(' '.join(paragraph))
+    return '\n'.join(paragraphs)
+
+
+def make_novel(scenes, words, markup, comments, seed):
+    """Return a stand-in for a novel with one chapter per ten scenes."""
+    rnd = random.Random(seed)
+    novel = Stub(title='Synthetic novel', scenes={}, chapters={}, srtChapters=[])
+    for i in range(scenes):
+        scId = str(i + 1)
+        chId = str(i // 10 + 1)
+        if not chId in novel.chapters:
+            novel.chapters[chId] = Stub(chType=0, srtScenes=[])
+            novel.srtChapters.append(chId)
+        novel.chapters[chId].srtScenes.append(scId)
+        novel.scenes[scId] = Stub(title=f'Scene {scId}',
+                                  sceneContent=make_scene_text(rnd, words, markup, comments),
+                                  scType=0,
+                                  doNotExport=False,
+                                  characters=[],
+                                  )
+    return novel
+
+
+def measure(function, repeat):
+    """Return the best and mean run time of function in seconds."""
+    times = []
+    for __ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return dict(best=min(times), mean=sum(times) / len(times), runs=repeat)
+
+
+def run_pure_benchmarks(novel, repeat):
+    """Run the benchmarks not requiring a display."""
+    texts = [scene.sceneContent for scene in novel.scenes.values()]
+    results = {}
+    results['count_words'] = measure(lambda: [count_words(text) for text in texts], repeat)
+    results['count_characters'] = measure(lambda: [count_characters(text) for text in texts], repeat)
+    for tag in YW_TAGS:
+        results[f'_remove_format_{tag}'] = measure(lambda: [remove_format(text, tag) for text in texts], repeat)
+    results['_remove_format_all'] = measure(lambda: [remove_format(text, *YW_TAGS) for text in texts], repeat)
+    ui = Stub(novel=novel)
+    results['batch_count_words'] = measure(lambda: SceneBatch(ui).count_words(), repeat)
+    results['batch_set_format'] = measure(lambda: SceneBatch(ui).set_format(tag='i'), repeat)
+    results['batch_normalize_markup'] = measure(lambda: SceneBatch(ui).normalize_markup(), repeat)
+    results['search_index_build'] = measure(lambda: list(SearchIndex(ui).find('xyzzy')), repeat)
+    searchIndex = SearchIndex(ui)
+    list(searchIndex.find('xyzzy'))
+    results['search_indexed_miss'] = measure(lambda: list(searchIndex.find('stormy torrents xyzzy')), repeat)
+    results['search_indexed_hits'] = measure(lambda: list(searchIndex.find('stormy', ignoreMarkup=True)), repeat)
+    results['get_statistics'] = measure(lambda: get_statistics(texts), repeat)
+    results['search_regex'] = measure(lambda: list(searchIndex.find('dark\\s+and', regex=True)), repeat)
+    return results
+
+
+def run_widget_benchmarks(novel, repeat):
+    """Run the benchmarks on real widgets."""
+    root = tk.Tk()
+    root.withdraw()
+    scIds = list(novel.scenes)
+    ui = Stub(novel=novel,
+              prjFile=Stub(filePath='synthetic.yw7'),
+              tv=TreeStub(scIds),
+              isLocked=False,
+              isModified=False,
+              sceneMenu=Stub(),
+              chapterMenu=Stub(),
+              toolsMenu=Stub(),
+              helpMenu=Stub(),
+              )
+    plugin = Plugin()
+    plugin.install(ui)
+    plugin._load_resources()
+    # Use the default configuration instead of the user's editor.ini file.
+    plugin.kwargs.update(SETTINGS)
+    plugin.kwargs.update(OPTIONS)
+    plugin.style = EditorStyle(plugin.kwargs, plugin.kwargs)
+    results = {}
+
+    textBox = TextBox(root)
+    texts = [novel.scenes[scId].sceneContent for scId in scIds]
+
+    def set_text():
+        for text in texts:
+            textBox.clear()
+            textBox.set_text(text)
+            textBox.update_idletasks()
+
+    def show_text():
+        # Insert only the first chunk; clearing cancels loading the rest.
+        for text in texts:
+            textBox.clear()
+            textBox.set_text(text)
+
+    def get_text():
+        for __ in texts:
+            textBox.get_text()
+
+    def count():
+        for __ in texts:
+            textBox.count_words()
+
+    def typing():
+        textBox.mark_set('insert', '1.0 lineend')
+        for c in 'The quick brown fox jumps over the lazy dog. ' * 10:
+            textBox.insert('insert', c)
+
+    def keystrokes():
+        # Let the main loop catch up after each key, so idle-time updates such as highlighting are included.
+        textBox.mark_set('insert', '1.0 lineend')
+        for c in 'The [i]quick[/i] brown fox /* jumps */ over the lazy dog. ':
+            textBox.insert('insert', c)
+            textBox.update_idletasks()
+
+    def set_format():
+        for tag in YW_TAGS:
+            textBox.tag_add('sel', '1.0', 'end')
+            textBox._set_format(tag=tag)
+            textBox._set_format(tag=tag)
+        textBox.tag_add('sel', '1.0', 'end')
+        textBox._set_format()
+
+    results['set_text'] = measure(set_text, repeat)
+    results['show_text'] = measure(show_text, repeat)
+    results['get_text'] = measure(get_text, repeat)
+    results['TextBox.count_words'] = measure(count, repeat)
+    results['typing'] = measure(typing, repeat)
+
+    # Keystroke latency should not depend on the text size.
+    for scenes in sorted({1, min(10, len(texts)), len(texts)}):
+        textBox.clear()
+        textBox.set_text('\n'.join(texts[:scenes]))
+        textBox.update_idletasks()
+        results[f'keystrokes_{scenes}_scenes'] = measure(keystrokes, repeat)
+    textBox.clear()
+    textBox.set_text(texts[0])
+    results['_set_format'] = measure(set_format, repeat)
+    textBox.destroy()
+    results['_load_next'] = measure(lambda: traverse(plugin, ui, scIds), repeat)
+    results['open_node'] = measure(lambda: open_close(plugin, ui), repeat)
+    root.destroy()
+    return results
+
+
+def traverse(plugin, ui, scIds):
+    """Open an editor window at the first scene, and page through to the last one."""
+    editor = SceneEditor(plugin, ui, scIds[0], plugin.kwargs['window_geometry'])
+    for __ in scIds[1:]:
+        editor._load_next()
+        editor.update_idletasks()
+    editor.on_quit()
+
+
+def open_close(plugin, ui):
+    """Open and close an editor window for each scene."""
+    for node in ui.tv.nodes:
+        ui.tv.selected = node
+        plugin.open_node()
+        for editor in list(plugin.sceneEditors):
+            if editor.isOpen:
+                editor.update_idletasks()
+                editor.close()
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of benchmarks slower than in the baseline."""
+    regressions = []
+    for name in results:
+        if name in baseline:
+            if results[name]['best'] > baseline[name]['best'] * (1 + tolerance):
+                regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the novelyst_editor hot paths.')
+    parser.add_argument('--scenes', type=int, default=50)
+    parser.add_argument('--words', type=int, default=3000)
+    parser.add_argument('--markup', type=float, default=0.05)
+    parser.add_argument('--comments', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    novel = make_novel(args.scenes, args.words, args.markup, args.comments, args.seed)
+    report = dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        tk=tk.TkVersion,
+        parameters=dict(scenes=args.scenes, words=args.words, markup=args.markup, comments=args.comments, seed=args.seed),
+        characters=sum(len(scene.sceneContent) for scene in novel.scenes.values()),
+        results=run_pure_benchmarks(novel, args.repeat),
+        skipped=[],
+        )
+    try:
+        report['results'].update(run_widget_benchmarks(novel, args.repeat))
+    except tk.TclError as ex:
+        report['skipped'].append(f'widget benchmarks: {ex}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report['results'], baseline['results'], args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if report.get('regressions', None):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()